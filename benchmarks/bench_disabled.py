@@ -0,0 +1,64 @@
+"""Measure overhead of marked regions when profiling is off.
+
+Two configurations are compared to unmarked code:
+
+- not installed: :py:func:`region_profiler.install` is never called
+- disabled: :py:func:`region_profiler.disable` is called before marking functions
+
+Usage::
+
+    python benchmarks/bench_disabled.py [reps]
+"""
+import sys
+import timeit
+
+import region_profiler as rp
+
+
+def foo(x):
+    return x
+
+
+def measure(fn, reps):
+    return min(timeit.repeat(fn, number=reps, repeat=5)) / reps * 1e9
+
+
+def bench_func(wrapped, reps):
+    def call():
+        wrapped(1)
+
+    return measure(call, reps)
+
+
+def bench_region(reps):
+    def block():
+        with rp.region('a'):
+            pass
+
+    return measure(block, reps)
+
+
+def bench_plain(reps):
+    def call():
+        foo(1)
+
+    return measure(call, reps)
+
+
+def main(reps=1000000):
+    plain = bench_plain(reps)
+    not_installed_func = bench_func(rp.func()(foo), reps)
+    not_installed_region = bench_region(reps)
+    rp.disable()
+    disabled_func = bench_func(rp.func()(foo), reps)
+
+    print('plain call:                 {:6.1f} ns'.format(plain))
+    print('func(), not installed:      {:6.1f} ns (+{:.1f} ns)'.
+          format(not_installed_func, not_installed_func - plain))
+    print('func(), disabled:           {:6.1f} ns (+{:.1f} ns)'.
+          format(disabled_func, disabled_func - plain))
+    print('region() block, off:        {:6.1f} ns'.format(not_installed_region))
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,58 @@
+"""Measure ``import region_profiler`` time.
+
+Each measurement starts a fresh interpreter, so the result includes
+interpreter startup. It is reported next to an interpreter,
+that imports nothing. Also the number of modules, loaded by the import,
+is reported.
+
+Usage::
+
+    python benchmarks/bench_import.py [reps]
+"""
+import os
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+COUNT_MODULES = ('import sys; before = set(sys.modules); import region_profiler; '
+                 'print(len(set(sys.modules) - before))')
+
+
+def python(code):
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(p for p in (REPO_ROOT, env.get('PYTHONPATH')) if p)
+    return subprocess.run([sys.executable, '-c', code], env=env, check=True,
+                          stdout=subprocess.PIPE, universal_newlines=True).stdout
+
+
+def startup_ms(code, reps):
+    """Return the best wall time of running ``python -c code`` in milliseconds.
+    """
+    best = float('inf')
+    for _ in range(reps):
+        start = time.perf_counter()
+        python(code)
+        best = min(best, time.perf_counter() - start)
+    return best * 1e3
+
+
+def measure(reps=20):
+    """Return interpreter startup time, startup with ``import region_profiler``
+    and the number of imported modules.
+    """
+    empty = startup_ms('pass', reps)
+    imported = startup_ms('import region_profiler', reps)
+    return empty, imported, int(python(COUNT_MODULES))
+
+
+def main(reps=20):
+    empty, imported, modules = measure(reps)
+    print('python -c pass:             {:6.1f} ms'.format(empty))
+    print('import region_profiler:     {:6.1f} ms (+{:.1f} ms, {} modules)'.
+          format(imported, imported - empty, modules))
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
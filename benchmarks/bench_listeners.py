@@ -0,0 +1,57 @@
+"""Measure region overhead depending on the number of listeners.
+
+Usage::
+
+    python benchmarks/bench_listeners.py [reps]
+"""
+import sys
+import timeit
+
+from region_profiler import RegionProfiler
+from region_profiler.listener import RegionProfilerListener
+
+
+class NopListener(RegionProfilerListener):
+    """Listener, that subscribes to all region events and does nothing.
+    """
+
+    def region_entered(self, profiler, region):
+        pass
+
+    def region_exited(self, profiler, region):
+        pass
+
+    def region_canceled(self, profiler, region):
+        pass
+
+
+class UnsubscribedListener(NopListener):
+    """Listener, that subscribes to no region events.
+    """
+    subscribed_events = ()
+
+
+def region_ns(listeners, reps):
+    """Return time of an empty ``with rp.region('a')`` block in nanoseconds.
+    """
+    rp = RegionProfiler(listeners=listeners)
+
+    def loop():
+        for _ in range(reps):
+            with rp.region('a'):
+                pass
+
+    return min(timeit.repeat(loop, number=1, repeat=5)) / reps * 1e9
+
+
+def main(reps=100000):
+    configs = [('0 listeners', []),
+               ('1 listener', [NopListener()]),
+               ('3 listeners', [NopListener() for _ in range(3)]),
+               ('3 unsubscribed listeners', [UnsubscribedListener() for _ in range(3)])]
+    for name, listeners in configs:
+        print('{:26} {:8.1f} ns'.format(name + ':', region_ns(listeners, reps)))
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,66 @@
+"""Measure memory footprint of region nodes and cost of enter/exit events.
+
+Usage::
+
+    python benchmarks/bench_memory.py [node_count]
+"""
+import sys
+import timeit
+import tracemalloc
+
+from region_profiler import RegionProfiler
+
+
+def bytes_per_node(node_count):
+    """Return average memory, allocated per :py:class:`region_profiler.node.RegionNode`.
+
+    Nodes are created as children of a single parent,
+    so the parent's children dictionary is accounted too.
+    """
+    rp = RegionProfiler()
+    names = ['region {}'.format(i) for i in range(node_count)]
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for n in names:
+        rp.root.get_child(n)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / node_count
+
+
+def node_enter_exit_ns(reps):
+    """Return time of a bare node enter + exit pair in nanoseconds.
+    """
+    node = RegionProfiler().root.get_child('a')
+    enter = node.enter_region
+    exit = node.exit_region
+
+    def loop():
+        for _ in range(reps):
+            enter()
+            exit()
+
+    return min(timeit.repeat(loop, number=1, repeat=5)) / reps * 1e9
+
+
+def region_ns(reps):
+    """Return time of an empty ``with rp.region('a')`` block in nanoseconds.
+    """
+    rp = RegionProfiler()
+
+    def loop():
+        for _ in range(reps):
+            with rp.region('a'):
+                pass
+
+    return min(timeit.repeat(loop, number=1, repeat=5)) / reps * 1e9
+
+
+def main(node_count=100000, reps=100000):
+    print('bytes per node:   {:8.1f}'.format(bytes_per_node(node_count)))
+    print('node enter/exit:  {:8.1f} ns'.format(node_enter_exit_ns(reps)))
+    print('region() block:   {:8.1f} ns'.format(region_ns(reps)))
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,313 @@
+"""Profiler overhead benchmark suite with machine-readable results.
+
+Each benchmark reports one or more metrics (time per operation
+in nanoseconds, time per report in microseconds or bytes per node).
+Results are saved as JSON, so that a run can be compared against
+a stored baseline, e.g. in CI::
+
+    python benchmarks/suite.py --output baseline.json
+    python benchmarks/suite.py --baseline baseline.json --tolerance 25
+
+Exit code is 1 if any metric is worse than the baseline by more than
+``--tolerance`` percents. Use ``--filter`` to run a subset of benchmarks
+and ``--quick`` for a fast smoke run.
+"""
+import argparse
+import contextlib
+import fnmatch
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import timeit
+import tracemalloc
+
+import bench_import
+from region_profiler import RegionProfiler
+from region_profiler.chrome_trace_listener import ChromeTraceListener
+from region_profiler.debug_listener import DebugListener
+from region_profiler.reporters import ConsoleReporter, CsvReporter
+from region_profiler.sampler import StackSampler
+from region_profiler.shm import ShmExporter
+from region_profiler.speedscope_listener import SpeedscopeListener
+
+RESULT_VERSION = 1
+
+BENCHMARKS = []
+
+
+def benchmark(fn):
+    """Register a benchmark.
+
+    A benchmark takes ``reps`` argument and returns
+    a dict of metric name -> (value, unit).
+    """
+    BENCHMARKS.append(fn)
+    return fn
+
+
+def per_op_ns(loop, reps, repeat=5):
+    """Return the best time of ``loop()`` divided by ``reps`` in nanoseconds.
+    """
+    return min(timeit.repeat(loop, number=1, repeat=repeat)) / reps * 1e9
+
+
+def region_loop(rp, reps):
+    def loop():
+        for _ in range(reps):
+            with rp.region('a'):
+                pass
+
+    return loop
+
+
+@contextlib.contextmanager
+def temp_file(suffix):
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    os.close(fd)
+    try:
+        yield path
+    finally:
+        os.remove(path)
+
+
+def listener_ns(listener, reps):
+    rp = RegionProfiler(listeners=[listener])
+    try:
+        return per_op_ns(region_loop(rp, reps), reps)
+    finally:
+        with contextlib.redirect_stderr(io.StringIO()):
+            rp.finalize()
+
+
+@benchmark
+def nesting_depth(reps):
+    """Enter/exit cost of a region nested at different depths.
+    """
+    results = {}
+    for depth in (1, 8, 64):
+        rp = RegionProfiler()
+        with contextlib.ExitStack() as stack:
+            for i in range(depth - 1):
+                stack.enter_context(rp.region('level {}'.format(i)))
+            results['nesting_depth.{}'.format(depth)] = (per_op_ns(region_loop(rp, reps), reps), 'ns')
+    return results
+
+
+@benchmark
+def tree_width(reps):
+    """Enter/exit cost of a region, which parent has many children.
+    """
+    results = {}
+    for width in (1, 100, 10000):
+        rp = RegionProfiler()
+        names = ['child {}'.format(i) for i in range(width)]
+        for n in names:
+            rp.root.get_child(n)
+        cycle = (names * (reps // width + 1))[:reps]
+
+        def loop():
+            for n in cycle:
+                with rp.region(n):
+                    pass
+
+        results['tree_width.{}'.format(width)] = (per_op_ns(loop, reps), 'ns')
+    return results
+
+
+@benchmark
+def markers(reps):
+    """Cost of named and auto-named regions, decorated functions and iterator proxies.
+    """
+    rp = RegionProfiler()
+
+    def auto_named():
+        for _ in range(reps):
+            with rp.region():
+                pass
+
+    @rp.func()
+    def foo():
+        pass
+
+    def func_loop():
+        for _ in range(reps):
+            foo()
+
+    data = list(range(reps))
+
+    def iter_loop():
+        for _ in rp.iter_proxy(data, 'iter', history=0):
+            pass
+
+    def plain_iter_loop():
+        for _ in data:
+            pass
+
+    baseline_iter = per_op_ns(plain_iter_loop, reps)
+    return {'region.named': (per_op_ns(region_loop(rp, reps), reps), 'ns'),
+            'region.auto_named': (per_op_ns(auto_named, reps), 'ns'),
+            'func': (per_op_ns(func_loop, reps), 'ns'),
+            'iter_proxy': (per_op_ns(iter_loop, reps) - baseline_iter, 'ns')}
+
+
+@benchmark
+def listeners(reps):
+    """Enter/exit cost with each listener.
+    """
+    results = {'listener.none': (per_op_ns(region_loop(RegionProfiler(), reps), reps), 'ns')}
+    with temp_file('.json') as path:
+        results['listener.chrome_trace'] = (listener_ns(ChromeTraceListener(path), reps), 'ns')
+    with temp_file('.json') as path:
+        results['listener.chrome_trace_complete'] = (
+            listener_ns(ChromeTraceListener(path, complete_events=True), reps), 'ns')
+    with temp_file('.json') as path:
+        results['listener.speedscope'] = (listener_ns(SpeedscopeListener(path), reps), 'ns')
+    with temp_file('.json') as path:
+        results['listener.speedscope_sampled'] = (
+            listener_ns(SpeedscopeListener(path, evented=False), reps), 'ns')
+    with temp_file('.shm') as path:
+        results['listener.shm'] = (listener_ns(ShmExporter(path, unlink=False), reps), 'ns')
+    results['listener.stack_sampler'] = (listener_ns(StackSampler(stream=None), reps), 'ns')
+    with contextlib.redirect_stderr(io.StringIO()):
+        results['listener.debug'] = (listener_ns(DebugListener(), reps // 10), 'ns')
+    return results
+
+
+@benchmark
+def overhead_measurement(reps):
+    """Enter/exit cost with self-overhead measurement enabled.
+    """
+    rp = RegionProfiler(measure_overhead=True)
+    return {'measure_overhead': (per_op_ns(region_loop(rp, reps), reps), 'ns')}
+
+
+@benchmark
+def report_generation(reps):
+    """Report generation time depending on the node count.
+    """
+    results = {}
+    for node_count in (100, 1000, 10000):
+        rp = RegionProfiler()
+        for i in range(node_count // 10):
+            parent = rp.root.get_child('parent {}'.format(i))
+            for j in range(9):
+                parent.get_child('child {}'.format(j))
+        for name, reporter_cls in (('console', ConsoleReporter), ('csv', CsvReporter)):
+            reporter = reporter_cls(stream=io.StringIO())
+            t = min(timeit.repeat(lambda: reporter.dump_profiler(rp), number=1, repeat=3))
+            results['report.{}.{}'.format(name, node_count)] = (t * 1e6, 'us')
+    return results
+
+
+@benchmark
+def memory(reps):
+    """Memory allocated per region node.
+    """
+    node_count = max(reps, 1000)
+    rp = RegionProfiler()
+    names = ['region {}'.format(i) for i in range(node_count)]
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for n in names:
+        rp.root.get_child(n)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return {'memory.bytes_per_node': ((after - before) / node_count, 'bytes')}
+
+
+@benchmark
+def import_time(reps):
+    """``import region_profiler`` time in a fresh interpreter (minus interpreter startup).
+    """
+    empty, imported, modules = bench_import.measure(max(reps // 20000, 3))
+    return {'import.time': ((imported - empty) * 1e3, 'us'),
+            'import.modules': (modules, 'modules')}
+
+
+def run(pattern='*', reps=100000):
+    """Run registered benchmarks, which names match ``pattern``.
+
+    Returns:
+        dict: results in JSON-serializable format
+    """
+    results = {}
+    for bench in BENCHMARKS:
+        if not fnmatch.fnmatchcase(bench.__name__, pattern):
+            continue
+        for metric, (value, unit) in bench(reps).items():
+            results[metric] = {'value': value, 'unit': unit}
+            print('{:36} {:12.1f} {}'.format(metric, value, unit), file=sys.stderr)
+    return {'version': RESULT_VERSION,
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'reps': reps,
+            'results': results}
+
+
+def compare(results, baseline, tolerance):
+    """Compare results with a baseline and print the comparison table to stderr.
+
+    All metrics are "lower is better".
+
+    Args:
+        results (dict): current run results
+        baseline (dict): baseline run results
+        tolerance (float): allowed relative regression (0.25 means 25%)
+
+    Returns:
+        list of str: regressed metrics
+    """
+    regressions = []
+    print('{:36} {:>12} {:>12} {:>9}'.format('metric', 'baseline', 'current', 'change'),
+          file=sys.stderr)
+    for metric, r in sorted(results['results'].items()):
+        b = baseline['results'].get(metric)
+        if b is None:
+            print('{:36} {:>12} {:12.1f} {:>9}'.format(metric, '-', r['value'], 'new'),
+                  file=sys.stderr)
+            continue
+        change = (r['value'] - b['value']) / b['value'] if b['value'] else 0.
+        flag = ''
+        if change > tolerance:
+            regressions.append(metric)
+            flag = '  REGRESSION'
+        print('{:36} {:12.1f} {:12.1f} {:+8.1f}%{}'.format(metric, b['value'], r['value'],
+                                                          change * 100, flag),
+              file=sys.stderr)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run region_profiler benchmark suite.')
+    parser.add_argument('--output', help='save results to this JSON file')
+    parser.add_argument('--baseline', help='compare results with this JSON file')
+    parser.add_argument('--tolerance', type=float, default=25,
+                        help='allowed regression against the baseline in percents (default: 25)')
+    parser.add_argument('--filter', default='*', help='run benchmarks matching this pattern')
+    parser.add_argument('--reps', type=int, default=100000, help='repetitions per measurement')
+    parser.add_argument('--quick', action='store_true', help='run with few repetitions')
+    args = parser.parse_args(argv)
+
+    results = run(args.filter, 1000 if args.quick else args.reps)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    else:
+        json.dump(results, sys.stdout, indent=2, sort_keys=True)
+        print()
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance / 100)
+        if regressions:
+            print('Regressions: {}'.format(', '.join(regressions)), file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
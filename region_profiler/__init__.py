@@ -13,5 +13,38 @@
 .. moduleauthor:: Viacheslav Kroilov <slavakroilov@gmail.com>
 """
 
-from region_profiler.profiler import RegionProfiler
-from region_profiler.global_instance import install, region, func, iter_proxy
+import importlib
+import sys
+
+from region_profiler.global_instance import (install, disable, region, func, iter_proxy,
+                                             aiter_proxy, io_file)
+
+_LAZY_ATTRIBUTES = {
+    'RegionProfiler': 'region_profiler.profiler',
+    'instrument': 'region_profiler.instrumentation',
+    'uninstrument': 'region_profiler.instrumentation',
+    'attach': 'region_profiler.shm',
+}
+"""Package attributes, that are imported on first access (name -> module).
+
+Profiler, listeners and reporters are not needed until :py:func:`install` is called,
+so they are not imported with the package to keep ``import region_profiler`` cheap.
+"""
+
+
+def __getattr__(name):
+    module = _LAZY_ATTRIBUTES.get(name)
+    if module is None:
+        raise AttributeError("module '{}' has no attribute '{}'".format(__name__, name))
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
+
+
+if sys.version_info < (3, 7):  # module __getattr__ is not supported (PEP 562)
+    for _name in _LAZY_ATTRIBUTES:
+        __getattr__(_name)
@@ -0,0 +1,168 @@
+"""Run a script or a module with profiling installed.
+
+No code changes are needed to get the root region timing
+and timings of instrumented modules::
+
+    python -m region_profiler [options] script.py [args...]
+    python -m region_profiler [options] -m module [args...]
+
+Regions marked with :py:func:`region_profiler.region` and
+:py:func:`region_profiler.func` are timed as well, since the global profiler
+is installed before the target starts. The report is written at exit.
+
+Options can also be passed in ``REGION_PROFILER`` environment variable,
+e.g. ``REGION_PROFILER="--reporter csv --output profile.csv"``.
+They are parsed before the command line options, so the latter take precedence.
+"""
+
+import argparse
+import atexit
+import os
+import runpy
+import shlex
+import signal
+import sys
+
+import region_profiler
+
+ENV_VAR = 'REGION_PROFILER'
+"""Name of the environment variable with default options.
+"""
+
+REPORTERS = ('console', 'csv', 'flamegraph')
+
+
+def signal_number(value):
+    """Convert a signal name (``SIGUSR1`` or ``USR1``) or number to a signal number.
+    """
+    if value.isdigit():
+        return int(value)
+    name = value.upper()
+    if not name.startswith('SIG'):
+        name = 'SIG' + name
+    if not isinstance(getattr(signal, name, None), int):
+        raise argparse.ArgumentTypeError('unknown signal: {}'.format(value))
+    return getattr(signal, name)
+
+
+def make_parser():
+    parser = argparse.ArgumentParser(
+        prog='python -m region_profiler',
+        usage='%(prog)s [options] (script.py | -m module) [args...]',
+        description='Run a Python script or module with region_profiler installed. '
+                    'Default options may be set in {} environment variable.'.format(ENV_VAR))
+    parser.add_argument('--reporter', choices=REPORTERS, default='console',
+                        help='report format (default: console)')
+    parser.add_argument('--output', help='write the report to this file (default: stderr)')
+    parser.add_argument('--chrome-trace', metavar='FILE', help='save Chrome Trace to this file')
+    parser.add_argument('--chrome-trace-complete', action='store_true',
+                        help='write Chrome Trace regions as single complete (X) events')
+    parser.add_argument('--chrome-trace-min-duration', type=float, metavar='SECONDS',
+                        help='omit regions shorter than this from Chrome Trace')
+    parser.add_argument('--speedscope', metavar='FILE', help='save speedscope profile to this file')
+    parser.add_argument('--speedscope-evented', action='store_true',
+                        help='include region timeline in speedscope profile')
+    parser.add_argument('--instrument', metavar='MODULE', action='append', default=[],
+                        help='instrument all functions of the module (may be repeated)')
+    parser.add_argument('--sampling-interval', type=float, metavar='SECONDS',
+                        help='sample the stack with this interval')
+    parser.add_argument('--wait-instrumentation', action='store_true',
+                        help='time contended condition and queue waits')
+    parser.add_argument('--io-instrumentation', action='store_true',
+                        help='time blocking socket I/O')
+    parser.add_argument('--measure-overhead', action='store_true',
+                        help='measure profiler self-overhead')
+    parser.add_argument('--report-signal', type=signal_number, metavar='SIGNAL',
+                        help='write a live report to a timestamped file on this signal, '
+                             'e.g. SIGUSR1')
+    parser.add_argument('--shm', action='store_true',
+                        help='export live stats through shared memory '
+                             '(see python -m region_profiler.top)')
+    parser.add_argument('-m', dest='module', nargs=argparse.REMAINDER,
+                        help='run library module as a script (terminates option list)')
+    parser.add_argument('script', nargs=argparse.REMAINDER, help=argparse.SUPPRESS)
+    return parser
+
+
+def parse_args(argv=None, environ=None):
+    """Parse runner options.
+
+    Args:
+        argv (list of str, optional): command line arguments. Default: ``sys.argv[1:]``
+        environ (dict, optional): environment. Default: :py:data:`os.environ`
+
+    Returns:
+        :py:class:`argparse.Namespace`: parsed options. ``target`` is the script path
+        or the module name, ``is_module`` tells which, ``args`` are target arguments
+    """
+    if argv is None:
+        argv = sys.argv[1:]
+    if environ is None:
+        environ = os.environ
+    parser = make_parser()
+    args = parser.parse_args(shlex.split(environ.get(ENV_VAR, '')) + list(argv))
+    target = args.module or args.script
+    if not target:
+        parser.error('a script or a module (-m) to run is required')
+    args.is_module = bool(args.module)
+    args.target = target[0]
+    args.args = target[1:]
+    return args
+
+
+def make_reporter(name, stream):
+    from region_profiler import reporters
+
+    cls = {'console': reporters.ConsoleReporter,
+           'csv': reporters.CsvReporter,
+           'flamegraph': reporters.FlamegraphReporter}[name]
+    return cls(stream=stream)
+
+
+def main(argv=None, environ=None):
+    """Install the profiler and run the target.
+
+    The target is run in ``__main__`` namespace with ``sys.argv``
+    set to its arguments. If the target calls :py:func:`sys.exit`,
+    :py:exc:`SystemExit` is propagated.
+
+    Args:
+        argv (list of str, optional): command line arguments. Default: ``sys.argv[1:]``
+        environ (dict, optional): environment. Default: :py:data:`os.environ`
+
+    Returns:
+        int: exit code
+    """
+    args = parse_args(argv, environ)
+
+    stream = sys.stderr
+    if args.output:
+        stream = open(args.output, 'w')
+        atexit.register(stream.close)  # runs after the report is dumped
+
+    region_profiler.install(make_reporter(args.reporter, stream),
+                            chrome_trace_file=args.chrome_trace,
+                            chrome_trace_complete_events=args.chrome_trace_complete,
+                            chrome_trace_min_duration=args.chrome_trace_min_duration,
+                            speedscope_file=args.speedscope,
+                            speedscope_evented=args.speedscope_evented,
+                            sampling_interval=args.sampling_interval,
+                            wait_instrumentation=args.wait_instrumentation,
+                            io_instrumentation=args.io_instrumentation,
+                            measure_overhead=args.measure_overhead,
+                            report_signal=args.report_signal,
+                            shm_export=args.shm)
+    if args.instrument:
+        region_profiler.instrument(*args.instrument)
+
+    sys.argv = [args.target] + args.args
+    if args.is_module:
+        runpy.run_module(args.target, run_name='__main__', alter_sys=True)
+    else:
+        sys.path[0] = os.path.dirname(os.path.abspath(args.target))
+        runpy.run_path(args.target, run_name='__main__')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
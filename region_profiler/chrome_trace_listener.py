@@ -10,15 +10,38 @@ class ChromeTraceListener(RegionProfilerListener):
 
     Learn more about `Chrome Trace Viewer
     <https://aras-p.info/blog/2017/01/23/Chrome-Tracing-as-Profiler-Frontend/>`_.
+
+    By default each region is written as a pair of begin (``B``)
+    and end (``E``) events. With ``complete_events=True`` a single
+    complete (``X``) event with the region duration is written on region exit,
+    which roughly halves the trace size and the listener overhead.
+    In this mode canceled regions (e.g. the last fetch of
+    :py:meth:`region_profiler.profiler.RegionProfiler.iter_proxy`)
+    are not written at all, and recursive reentries of a region are
+    merged into the outermost span, like in the region stats.
+
+    With ``min_duration`` regions, that are shorter than the threshold,
+    are not written. As their children are even shorter, the nesting stays valid.
+    The filter implies complete events mode. The number of suppressed regions
+    is written in ``suppressed_regions`` metadata (``M``) event on finalization.
     """
 
-    def __init__(self, trace_filename):
+    def __init__(self, trace_filename, complete_events=False, min_duration=None):
         """Construct ChromeTraceListener.
 
         Args:
             trace_filename: output .json file
+            complete_events (bool): write complete (``X``) events
+                instead of begin and end event pairs
+            min_duration (float, optional): skip regions, shorter than this (in seconds)
         """
         self.trace_filename = trace_filename
+        self.complete_events = complete_events or min_duration is not None
+        self.min_duration = min_duration
+        self.suppressed_count = 0
+        if self.complete_events:
+            self.subscribed_events = ('region_exited', 'region_canceled')
+            self.region_exited = self._region_exited_complete
         self.f = open(trace_filename, 'w')
         self.pending_begin_node = None
         self.last_canceled_node = None
@@ -30,10 +53,25 @@ class ChromeTraceListener(RegionProfilerListener):
                      format(os.getpid(), threading.get_ident()))
 
     def finalize(self):
+        if self.min_duration is not None:
+            self.f.write(',\n{{"name": "suppressed_regions", "ph": "M", "pid": {}, "tid": {},'
+                         '"args": {{"count": {}, "min_duration_us": {}}}}}'.
+                         format(os.getpid(), threading.get_ident(), self.suppressed_count,
+                                self.min_duration * 1000000))
         self.f.write(']')
         self.f.close()
         print('RegionProfiler: Chrome Trace is saved in', self.trace_filename, file=sys.stderr)
 
+    def flush(self):
+        """Write out buffered events.
+
+        The trace file is left unterminated, Chrome Trace Viewer
+        loads such files. The begin event of the last entered region
+        is written after its next event, as the region may yet be canceled.
+        """
+        if not self.f.closed:
+            self.f.flush()
+
     def region_entered(self, profiler, region):
         if self.pending_begin_node:
             self._write_b_event(profiler, self.pending_begin_node)
@@ -58,6 +96,21 @@ class ChromeTraceListener(RegionProfilerListener):
     def region_canceled(self, profiler, region):
         self.last_canceled_node = region
 
+    def _region_exited_complete(self, profiler, region):
+        if region is self.last_canceled_node:
+            self.last_canceled_node = None
+            return
+        self.last_canceled_node = None
+        if region.recursion_depth == 0 or region is profiler.root:
+            if (self.min_duration is not None and region is not profiler.root and
+                    region.timer.end_ts() - region.timer.begin_ts() < self.min_duration):
+                self.suppressed_count += 1
+                return
+            begin = int(region.timer.begin_ts() * 1000000)
+            self.f.write(',\n{{"name": "{}", "ph": "X", "ts": {}, "dur": {}, "pid": {}, "tid": {}}}'.
+                         format(region.name, begin, int(region.timer.end_ts() * 1000000) - begin,
+                                os.getpid(), threading.get_ident()))
+
     def _write_b_event(self, profiler, region):
         self._write_event(region.name, int(region.timer.begin_ts() * 1000000), 'B')
 
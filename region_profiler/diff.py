@@ -0,0 +1,358 @@
+"""Compare two profiles region by region.
+
+Profiles are matched by region path (names of all ancestors
+down to the region itself), so the same region is found
+in both runs even if the tree order differs.
+Profiles may be loaded from CSV files, produced by
+:py:class:`region_profiler.reporters.CsvReporter`,
+or sliced from a live :py:class:`region_profiler.profiler.RegionProfiler`.
+
+The module can be run as a script to compare two CSV reports::
+
+    python -m region_profiler.diff baseline.csv candidate.csv --threshold 5
+
+Exit code is 1 if any region regressed by more than ``--threshold`` percents,
+so the script can be used for gating performance changes in CI.
+"""
+
+import argparse
+import csv
+import sys
+
+from region_profiler.reporters import Slice, get_profiler_slice, quote_csv_field
+from region_profiler.utils import pretty_print_time
+
+DIFF_METRICS = ('total', 'self', 'count', 'avg')
+"""Metrics, that can be used for sorting and thresholding a diff.
+"""
+
+
+def load_csv_profile(stream):
+    """Load a profile, saved by :py:class:`region_profiler.reporters.CsvReporter`.
+
+    The report must contain at least ``id``, ``name``, ``parent_id``,
+    ``total_us`` and ``count`` columns. If ``total_inner_us`` column is missing,
+    inner time is computed from the children totals.
+    Per-tag-value rows (with non-empty ``tags`` column) are skipped.
+    Rows with a wrong number of fields raise :py:exc:`ValueError`.
+
+    Args:
+        stream (file-like object): opened CSV report
+
+    Returns:
+        list of :py:class:`region_profiler.reporters.Slice`: loaded profile
+    """
+    reader = csv.reader(stream, skipinitialspace=True)
+    header = next(reader)
+    required = ('id', 'name', 'parent_id', 'total_us', 'count')
+    missing = [c for c in required if c not in header]
+    if missing:
+        raise ValueError('CSV profile lacks required columns: {}'.format(', '.join(missing)))
+    idx = {c: i for i, c in enumerate(header)}
+
+    def us(row, col):
+        return int(row[idx[col]]) / 1000000 if col in idx and row[idx[col]] else 0
+
+    slices = []
+    by_id = {}
+    for row in reader:
+        if not row:
+            continue
+        if len(row) != len(header):
+            raise ValueError('CSV profile line {} has {} fields instead of {} '
+                             '(unquoted comma in a region name?)'.format(
+                                 reader.line_num, len(row), len(header)))
+        if 'tags' in idx and row[idx['tags']]:
+            continue
+        parent = by_id.get(row[idx['parent_id']]) if row[idx['parent_id']] else None
+        s = Slice(len(slices), row[idx['name']], parent,
+                  parent.call_depth + 1 if parent else 0,
+                  int(row[idx['count']]), us(row, 'total_us'), us(row, 'total_inner_us'),
+                  us(row, 'min_us'), us(row, 'max_us'))
+        by_id[row[idx['id']]] = s
+        slices.append(s)
+
+    if 'total_inner_us' not in idx:
+        child_total = {}
+        for s in slices:
+            if s.parent is not None:
+                child_total[s.parent.id] = child_total.get(s.parent.id, 0) + s.total_time
+        for s in slices:
+            s.total_inner_time = max(s.total_time - child_total.get(s.id, 0), 0)
+
+    return slices
+
+
+def slice_path(s):
+    """Return region path of a slice.
+
+    Args:
+        s (:py:class:`region_profiler.reporters.Slice`): slice
+
+    Returns:
+        tuple of str: names of the slice ancestors, starting from the root, and the slice itself
+    """
+    path = []
+    while s is not None:
+        path.append(s.name)
+        s = s.parent
+    return tuple(reversed(path))
+
+
+def _relative(base, delta):
+    if base:
+        return delta / base
+    return float('inf') if delta > 0 else 0.
+
+
+class RegionDiff:
+    """Difference between a region measurements in two profiles.
+
+    Either ``base`` or ``cand`` may be ``None``,
+    if the region is present only in one of the profiles.
+
+    Attributes:
+        path (tuple of str): region path
+        base (:py:class:`region_profiler.reporters.Slice`, optional): baseline measurement
+        cand (:py:class:`region_profiler.reporters.Slice`, optional): candidate measurement
+    """
+
+    def __init__(self, path, base, cand):
+        self.path = path
+        self.base = base
+        self.cand = cand
+
+    @property
+    def name(self):
+        """Region name.
+        """
+        return self.path[-1]
+
+    def value(self, metric, which):
+        """Return metric value in one of the profiles.
+
+        Args:
+            metric (str): one of :py:data:`DIFF_METRICS`
+            which (str): ``'base'`` or ``'cand'``
+
+        Returns:
+            int or float: metric value, 0 if region is missing in the profile
+        """
+        s = self.base if which == 'base' else self.cand
+        if s is None:
+            return 0
+        if metric == 'total':
+            return s.total_time
+        if metric == 'self':
+            return s.total_inner_time
+        if metric == 'count':
+            return s.count
+        if metric == 'avg':
+            return s.avg_time
+        raise ValueError('Unknown metric: {}'.format(metric))
+
+    def delta(self, metric):
+        """Absolute change of a metric (candidate minus baseline).
+        """
+        return self.value(metric, 'cand') - self.value(metric, 'base')
+
+    def relative(self, metric):
+        """Relative change of a metric.
+
+        Returns:
+            float: change as a fraction of the baseline value,
+                   ``inf`` for regions that are new in the candidate
+        """
+        return _relative(self.value(metric, 'base'), self.delta(metric))
+
+    def __repr__(self):
+        return 'RegionDiff(path={}, total_delta={})'.format(self.path, self.delta('total'))
+
+
+def diff_profiles(base_slices, cand_slices, sort_by='total'):
+    """Match regions of two profiles by path and compute their difference.
+
+    Args:
+        base_slices (list of :py:class:`region_profiler.reporters.Slice`): baseline profile
+        cand_slices (list of :py:class:`region_profiler.reporters.Slice`): candidate profile
+        sort_by (str): metric from :py:data:`DIFF_METRICS`.
+            Diffs are sorted by its absolute change, the largest regression first
+
+    Returns:
+        list of :py:class:`RegionDiff`: per-region differences
+    """
+    if sort_by not in DIFF_METRICS:
+        raise ValueError('Unknown metric: {}'.format(sort_by))
+    base = {slice_path(s): s for s in base_slices}
+    cand = {slice_path(s): s for s in cand_slices}
+    paths = list(base) + [p for p in cand if p not in base]
+    diffs = [RegionDiff(p, base.get(p), cand.get(p)) for p in paths]
+    diffs.sort(key=lambda d: -d.delta(sort_by))
+    return diffs
+
+
+def diff_profilers(base_rp, cand_rp, sort_by='total'):
+    """Compute difference of two :py:class:`region_profiler.profiler.RegionProfiler` states.
+
+    See :py:func:`diff_profiles`.
+    """
+    return diff_profiles(get_profiler_slice(base_rp), get_profiler_slice(cand_rp), sort_by)
+
+
+def find_regressions(diffs, threshold, metric='total', min_delta=0):
+    """Select regions, that regressed by more than ``threshold``.
+
+    Args:
+        diffs (list of :py:class:`RegionDiff`): profile difference
+        threshold (float): allowed relative change (0.05 means 5%)
+        metric (str): metric from :py:data:`DIFF_METRICS`
+        min_delta (int or float): ignore absolute changes below this value.
+            Useful for filtering out noise in short regions
+
+    Returns:
+        list of :py:class:`RegionDiff`: regressed regions
+    """
+    return [d for d in diffs
+            if d.delta(metric) > min_delta and d.relative(metric) > threshold]
+
+
+def _format_relative(r):
+    if r == float('inf'):
+        return 'new'
+    return '{:+.2f}%'.format(r * 100)
+
+
+def _format_time_delta(t):
+    return ('+' if t >= 0 else '-') + pretty_print_time(abs(t))
+
+
+class ConsoleDiffReporter:
+    """Print profile difference as a human-readable table.
+
+    Rows are sorted as returned by :py:func:`diff_profiles`. Example output::
+
+        name            base total  cand total  total delta   total %  self delta    self %  count delta  avg delta    avg %
+        --------------  ----------  ----------  -----------  --------  ----------  --------  -----------  ---------  -------
+        <main> > a > b     20.00 s     40.00 s     +20.00 s  +100.00%    +20.00 s  +100.00%           +1   +3.000 s  +60.00%
+        <main> > a         50.00 s     60.00 s     +10.00 s   +20.00%    -10.00 s   -33.33%           +0   +10.00 s  +20.00%
+        <main> > c            0 ns     5.000 s     +5.000 s       new    +5.000 s       new           +1   +5.000 s      new
+        <main>             100.0 s     100.0 s        +0 ns    +0.00%       +0 ns    +0.00%           +0      +0 ns   +0.00%
+    """
+
+    def __init__(self, stream=sys.stdout):
+        """
+        Args:
+            stream (file-like object): stream for output
+        """
+        self.stream = stream
+
+    def dump_diff(self, diffs):
+        """Print the difference.
+
+        Args:
+            diffs (list of :py:class:`RegionDiff`): profile difference
+        """
+        rows = [['name', 'base total', 'cand total', 'total delta', 'total %',
+                 'self delta', 'self %', 'count delta', 'avg delta', 'avg %']]
+        for d in diffs:
+            rows.append([' > '.join(d.path),
+                         pretty_print_time(d.value('total', 'base')),
+                         pretty_print_time(d.value('total', 'cand')),
+                         _format_time_delta(d.delta('total')),
+                         _format_relative(d.relative('total')),
+                         _format_time_delta(d.delta('self')),
+                         _format_relative(d.relative('self')),
+                         '{:+d}'.format(d.delta('count')),
+                         _format_time_delta(d.delta('avg')),
+                         _format_relative(d.relative('avg'))])
+        col_width = [max(len(r[i]) for r in rows) for i in range(len(rows[0]))]
+        rows.insert(1, ['-' * w for w in col_width])
+        format = '  '.join('{:' + ('<' if i == 0 else '>') + str(w) + '}' for i, w in enumerate(col_width))
+        for r in rows:
+            print(format.format(*r), file=self.stream)
+
+
+class CsvDiffReporter:
+    """Print profile difference in a CSV format.
+
+    Times are reported in microseconds, relative changes in percents.
+    Relative change is empty for regions, that are missing in the baseline.
+    """
+
+    def __init__(self, stream=sys.stdout):
+        """
+        Args:
+            stream (file-like object): stream for output
+        """
+        self.stream = stream
+
+    def dump_diff(self, diffs):
+        """Print the difference.
+
+        Args:
+            diffs (list of :py:class:`RegionDiff`): profile difference
+        """
+        def us(t):
+            return str(int(t * 1000000))
+
+        def pct(r):
+            return '' if r == float('inf') else '{:.2f}'.format(r * 100)
+
+        print(', '.join(['path', 'base_total_us', 'cand_total_us', 'total_delta_us', 'total_pct',
+                         'self_delta_us', 'self_pct', 'count_delta', 'count_pct',
+                         'avg_delta_us', 'avg_pct']), file=self.stream)
+        for d in diffs:
+            print(', '.join([quote_csv_field(';'.join(d.path)),
+                             us(d.value('total', 'base')), us(d.value('total', 'cand')),
+                             us(d.delta('total')), pct(d.relative('total')),
+                             us(d.delta('self')), pct(d.relative('self')),
+                             str(d.delta('count')), pct(d.relative('count')),
+                             us(d.delta('avg')), pct(d.relative('avg'))]),
+                  file=self.stream)
+
+
+def main(argv=None):
+    """Compare two CSV profiles and print the difference.
+
+    Args:
+        argv (list of str, optional): command line arguments
+
+    Returns:
+        int: exit code. 1 if a regression above the threshold is found, 0 otherwise
+    """
+    parser = argparse.ArgumentParser(prog='python -m region_profiler.diff',
+                                     description='Compare two region_profiler CSV reports.')
+    parser.add_argument('baseline', help='baseline CSV report')
+    parser.add_argument('candidate', help='candidate CSV report')
+    parser.add_argument('--format', choices=('console', 'csv'), default='console',
+                        help='output format (default: console)')
+    parser.add_argument('--metric', choices=DIFF_METRICS, default='total',
+                        help='metric used for sorting and regression detection (default: total)')
+    parser.add_argument('--threshold', type=float, default=None,
+                        help='fail if any region regressed by more than THRESHOLD percents')
+    parser.add_argument('--min-delta-us', type=float, default=0,
+                        help='ignore time changes below this value in microseconds')
+    args = parser.parse_args(argv)
+
+    with open(args.baseline) as f:
+        base = load_csv_profile(f)
+    with open(args.candidate) as f:
+        cand = load_csv_profile(f)
+
+    diffs = diff_profiles(base, cand, args.metric)
+    reporter = CsvDiffReporter() if args.format == 'csv' else ConsoleDiffReporter()
+    reporter.dump_diff(diffs)
+
+    if args.threshold is None:
+        return 0
+    min_delta = 0 if args.metric == 'count' else args.min_delta_us / 1000000
+    regressions = find_regressions(diffs, args.threshold / 100, args.metric, min_delta)
+    for d in regressions:
+        print('Regression in {}: {} {}'.format(' > '.join(d.path), args.metric,
+                                                _format_relative(d.relative(args.metric))),
+              file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,10 +1,9 @@
 import atexit
+import functools
 import warnings
 
-from region_profiler.chrome_trace_listener import ChromeTraceListener
-from region_profiler.debug_listener import DebugListener
-from region_profiler.profiler import RegionProfiler
-from region_profiler.reporters import ConsoleReporter
+from region_profiler.node import NullNode
+from region_profiler.stall_analysis import ITER_HISTORY_SIZE
 from region_profiler.utils import NullContext
 
 _profiler = None
@@ -13,17 +12,30 @@ _profiler = None
 This singleton is initialized using :py:func:`install`.
 """
 
+_disabled = False
+"""If True, profiling is permanently disabled, see :py:func:`disable`.
+"""
+
+_null_context = NullContext(NullNode())
+"""Shared context, returned by :py:func:`region` when profiling is off.
+"""
 
-def install(reporter=ConsoleReporter(), chrome_trace_file=None,
-            debug_mode=False, timer_cls=None):
+
+def install(reporter=None, chrome_trace_file=None,
+            debug_mode=False, timer_cls=None, speedscope_file=None,
+            sampling_interval=None, wait_instrumentation=False, io_instrumentation=False,
+            measure_overhead=False, report_signal=None, shm_export=False,
+            chrome_trace_complete_events=False, chrome_trace_min_duration=None,
+            speedscope_evented=False):
     """Enable profiling.
 
     Initialize a global profiler with user arguments
     and register its finalization at application exit.
 
     Args:
-        reporter (:py:class:`region_profiler.reporters.ConsoleReporter`):
+        reporter (:py:class:`region_profiler.reporters.ConsoleReporter`, optional):
             The reporter used to print out the final summary.
+            Default: :py:class:`region_profiler.reporters.ConsoleReporter` with default columns.
             Provided profilers:
 
             - :py:class:`region_profiler.reporters.ConsoleReporter`
@@ -36,18 +48,90 @@ def install(reporter=ConsoleReporter(), chrome_trace_file=None,
             See :py:class:`region_profiler.debug_listener.DebugListener`
         timer_cls: (:py:obj:`region_profiler.utils.Timer`):
             Pass custom timer constructor. Mainly useful for testing.
+        speedscope_file (:py:class:`str`, optional): path to the output speedscope profile.
+            If provided, the region tree (and optionally, the timeline) is saved in
+            `speedscope <https://www.speedscope.app>`_ format.
+            See :py:class:`region_profiler.speedscope_listener.SpeedscopeListener`
+        sampling_interval (:py:class:`float`, optional): if provided, the stack
+            is sampled with this interval (in seconds) and the hottest functions
+            of each region are reported.
+            See :py:class:`region_profiler.sampler.StackSampler`
+        wait_instrumentation (:py:class:`bool`, default=False):
+            Charge contended waits on conditions and queues
+            to ``<lock wait>`` and ``<queue wait>`` child regions.
+            Lock acquisitions are not timed by default.
+            See :py:mod:`region_profiler.wait_instrumentation`
+        io_instrumentation (:py:class:`bool`, default=False):
+            Time socket sends and receives and charge them
+            to ``<io>`` child regions. Files are timed with :py:func:`io_file`.
+            See :py:mod:`region_profiler.io_instrumentation`
+        measure_overhead (:py:class:`bool`, default=False):
+            Measure profiler self-overhead. It is printed
+            in :py:class:`region_profiler.reporters.ConsoleReporter` footer.
+            See :py:mod:`region_profiler.overhead`
+        report_signal (:py:class:`int`, optional): if provided, a handler of this signal
+            (e.g. :py:data:`signal.SIGUSR1`) is registered, that writes a live report
+            with ``reporter`` to a timestamped file and flushes the Chrome Trace.
+            See :py:mod:`region_profiler.signal_report`
+        shm_export (:py:class:`bool`, default=False):
+            Mirror region stats into a shared memory table,
+            that can be read by another process with :py:func:`region_profiler.attach`.
+            See :py:mod:`region_profiler.shm`
+        chrome_trace_complete_events (:py:class:`bool`, default=False):
+            Write Chrome Trace regions as single complete events.
+            See :py:class:`region_profiler.chrome_trace_listener.ChromeTraceListener`
+        chrome_trace_min_duration (:py:class:`float`, optional):
+            Omit regions, shorter than this (in seconds), from Chrome Trace.
+            Implies ``chrome_trace_complete_events``
+        speedscope_evented (:py:class:`bool`, default=False):
+            Save the timeline of region events in the speedscope profile
+            in addition to the region tree. Events are buffered in memory
+            until finalization (about 100 bytes per event, see
+            :py:data:`region_profiler.speedscope_listener.MAX_EVENTS` limit)
     """
     global _profiler
-    if _profiler is None:
+    if _disabled:
+        warnings.warn("region_profiler.install() is ignored, profiling is disabled", stacklevel=2)
+    elif _profiler is None:
+        # Listeners and reporters are imported on demand to keep package import cheap
+        from region_profiler.profiler import RegionProfiler
+
+        if reporter is None:
+            from region_profiler.reporters import ConsoleReporter
+            reporter = ConsoleReporter()
+
         listeners = []
         if chrome_trace_file:
-            listeners.append(ChromeTraceListener(chrome_trace_file))
+            from region_profiler.chrome_trace_listener import ChromeTraceListener
+            listeners.append(ChromeTraceListener(chrome_trace_file,
+                                                 complete_events=chrome_trace_complete_events,
+                                                 min_duration=chrome_trace_min_duration))
+        if speedscope_file:
+            from region_profiler.speedscope_listener import SpeedscopeListener
+            listeners.append(SpeedscopeListener(speedscope_file, evented=speedscope_evented))
+        if sampling_interval:
+            from region_profiler.sampler import StackSampler
+            listeners.append(StackSampler(sampling_interval))
         if debug_mode:
+            from region_profiler.debug_listener import DebugListener
             listeners.append(DebugListener())
+        if shm_export:
+            from region_profiler.shm import ShmExporter
+            listeners.append(ShmExporter())
 
-        _profiler = RegionProfiler(listeners=listeners, timer_cls=timer_cls)
+        _profiler = RegionProfiler(listeners=listeners, timer_cls=timer_cls,
+                                   measure_overhead=measure_overhead)
 
         _profiler.root.enter_region()
+        if wait_instrumentation:
+            from region_profiler.wait_instrumentation import instrument_waits
+            instrument_waits(lambda: _profiler)
+        if io_instrumentation:
+            from region_profiler.io_instrumentation import instrument_io
+            instrument_io(lambda: _profiler)
+        if report_signal is not None:
+            from region_profiler.signal_report import register_report_signal
+            register_report_signal(report_signal, reporter, get_profiler=lambda: _profiler)
         atexit.register(lambda: reporter.dump_profiler(_profiler))
         atexit.register(lambda: _profiler.finalize())
     else:
@@ -55,7 +139,28 @@ def install(reporter=ConsoleReporter(), chrome_trace_file=None,
     return _profiler
 
 
-def region(name=None, asglobal=False):
+def disable():
+    """Disable profiling for the rest of the process lifetime.
+
+    After this call :py:func:`func` returns decorated functions unchanged,
+    :py:func:`iter_proxy` returns iterables unchanged and
+    :py:func:`region` returns a shared no-op context manager,
+    so marked regions have no overhead at all.
+    :py:func:`install` calls are ignored.
+
+    Call this function before importing modules with marked functions,
+    e.g. in production builds.
+    Without this call, functions decorated before :py:func:`install`
+    still check on each invocation, whether profiling has been enabled.
+    """
+    global _disabled
+    if _profiler is not None:
+        warnings.warn("region_profiler.disable() has no effect after install()", stacklevel=2)
+    else:
+        _disabled = True
+
+
+def region(name=None, asglobal=False, tags=None, units=None):
     """Start new region in the current context.
 
     This function implements context manager interface.
@@ -73,19 +178,28 @@ def region(name=None, asglobal=False):
             If None, the name is deducted from region location in source
         asglobal (bool): enter the region from root context, not a current one.
             May be used to merge stats from different call paths
+        tags (:py:class:`dict`, optional): tag names and values, e.g. ``{'bs': 32}``.
+            Region stats are additionally split by tag values,
+            see :py:meth:`region_profiler.profiler.RegionProfiler.region`
+        units (:py:class:`int`, optional): number of items processed in the region.
+            More items or bytes can be recorded using the returned node
 
     Returns:
         :py:class:`region_profiler.node.RegionNode`: node of the region.
+        :py:class:`region_profiler.node.NullNode` if profiling is off
     """
     if _profiler is not None:
-        return _profiler.region(name, asglobal, 0)
+        return _profiler.region(name, asglobal, 0, tags, units)
     else:
-        return NullContext()
+        return _null_context
 
 
 def func(name=None, asglobal=False):
     """Decorator for entering region on a function call.
 
+    Generator, coroutine and async generator functions are timed
+    on each resume, see :py:func:`region_profiler.profiler.wrap_resumable_function`.
+
     Examples::
 
         @rp.func()
@@ -104,13 +218,24 @@ def func(name=None, asglobal=False):
 
     def decorator(fn):
         nonlocal name
+        if _disabled:
+            return fn
+
         if name is None:
             name = fn.__name__
 
         name += '()'
 
+        from region_profiler.profiler import wrap_resumable_function
+        wrapped = wrap_resumable_function(fn, name, asglobal, lambda: _profiler)
+        if wrapped is not None:
+            return wrapped
+
+        @functools.wraps(fn)
         def wrapped(*args, **kwargs):
-            with region(name, asglobal=asglobal):
+            if _profiler is None:
+                return fn(*args, **kwargs)
+            with _profiler.region(name, asglobal, 0):
                 return fn(*args, **kwargs)
 
         return wrapped
@@ -118,18 +243,16 @@ def func(name=None, asglobal=False):
     return decorator
 
 
-def iter_proxy(iterable, name=None, asglobal=False):
+def iter_proxy(iterable, name=None, asglobal=False, history=ITER_HISTORY_SIZE):
     """Wraps an iterable and profiles :func:`next()` calls on this iterable.
 
     This proxy may be useful, when the iterable is some data loader,
     that performs data retrieval on each iteration.
     For instance, it may pull data from an asynchronous process.
 
-    Such proxy was used to identify that when receiving a batch of
-    8 samples from a loader process, first 5 samples were loaded immediately
-    (because they were computed asynchronously during the loop body),
-    but then it stalled on the last 3 iterations meaning that loading had
-    bigger latency than the loop body.
+    The proxy records fetch and loop body times of the last iterations,
+    so that loader stalls can be analyzed, see
+    :py:meth:`region_profiler.profiler.RegionProfiler.iter_proxy`.
 
     Examples::
 
@@ -142,11 +265,64 @@ def iter_proxy(iterable, name=None, asglobal=False):
             If None, the name is deducted from region location in source
         asglobal (bool): enter the region from root context, not a current one.
             May be used to merge stats from different call paths
+        history (int): number of the last iterations to keep for stall analysis.
+            0 disables recording
 
     Returns:
         Iterable: an iterable, that yield same data as the passed one
     """
     if _profiler is not None:
-        return _profiler.iter_proxy(iterable, name, asglobal, 0)
+        return _profiler.iter_proxy(iterable, name, asglobal, 0, history)
     else:
         return iterable
+
+
+def io_file(f):
+    """Time reads and writes of an opened file and charge them to ``<io>`` regions.
+
+    See :py:func:`region_profiler.io_instrumentation.timed_file`.
+
+    Examples::
+
+        with rp.io_file(open('data.csv')) as f:
+            header = f.readline()
+
+    Args:
+        f (file object): file object, e.g. returned by :py:func:`open`
+
+    Returns:
+        file object: ``f`` itself
+    """
+    if _profiler is not None:
+        from region_profiler.io_instrumentation import timed_file
+        return timed_file(f)
+    else:
+        return f
+
+
+def aiter_proxy(aiterable, name=None, asglobal=False, history=ITER_HISTORY_SIZE):
+    """Wraps an async iterable and profiles awaiting its items.
+
+    See :py:meth:`region_profiler.profiler.RegionProfiler.aiter_proxy`.
+
+    Examples::
+
+        async for item in rp.aiter_proxy(queue_stream(q)):
+            ...
+
+    Args:
+        aiterable (AsyncIterable): an async iterable to be wrapped
+        name (:py:class:`str`, optional): region name.
+            If None, the name is deducted from region location in source
+        asglobal (bool): enter the region from root context, not a current one.
+            May be used to merge stats from different call paths
+        history (int): number of the last iterations to keep for stall analysis.
+            0 disables recording
+
+    Returns:
+        AsyncIterable: an async iterable, that yield same data as the passed one
+    """
+    if _profiler is not None:
+        return _profiler.aiter_proxy(aiterable, name, asglobal, 0, history)
+    else:
+        return aiterable
@@ -0,0 +1,309 @@
+"""Automatic instrumentation of whole modules.
+
+:py:func:`instrument` wraps every function and method, defined in the selected
+modules, in a region, so there is no need to mark them with
+:py:func:`region_profiler.func` one by one::
+
+    import region_profiler as rp
+    rp.install()
+    rp.instrument('mypkg.io', 'mypkg.model', exclude=['*._*'], min_duration=1e-5)
+
+    import mypkg.io  # functions are wrapped on import
+
+Modules, that are imported afterwards, are instrumented by an import hook
+(a :py:data:`sys.meta_path` finder). Modules, that are already imported,
+are instrumented immediately.
+
+Region names are computed once at instrumentation time,
+so a call of an instrumented function costs a lookup of the child node
+plus the usual region enter and exit.
+"""
+
+import fnmatch
+import functools
+import importlib.abc
+import sys
+import types
+
+from region_profiler import global_instance
+from region_profiler.profiler import wrap_resumable_function
+
+WARMUP_CALLS = 100
+"""Default number of calls after which ``min_duration`` filter is applied.
+"""
+
+_KEPT_DUNDER_METHODS = ('__init__', '__call__')
+
+_instrumenters = []
+"""Active :py:class:`Instrumenter` instances.
+"""
+
+
+def _match_module(module_name, pattern):
+    """Check if module or its parent package matches a pattern.
+    """
+    return (fnmatch.fnmatchcase(module_name, pattern) or
+            module_name.startswith(pattern + '.'))
+
+
+class InstrumentedFunction:
+    """Region handle of an instrumented function.
+
+    Attributes:
+        name (str): region name
+        fn (Callable): original function
+        owner (module or class): object, that holds the function
+        attr (str): function attribute name in the owner
+        original (object): original attribute value
+            (differs from ``fn`` for static and class methods)
+        wrapped (object): instrumented attribute value
+        calls (int): number of timed calls
+        total (float): total time of timed calls
+        active (bool): True while the function is instrumented
+    """
+
+    __slots__ = ('name', 'fn', 'owner', 'attr', 'original', 'wrapped',
+                 'calls', 'total', 'active')
+
+    def __init__(self, name, fn, owner, attr, original):
+        self.name = name
+        self.fn = fn
+        self.owner = owner
+        self.attr = attr
+        self.original = original
+        self.wrapped = None
+        self.calls = 0
+        self.total = 0
+        self.active = True
+
+    def restore(self):
+        """Put the original function back.
+
+        References to the wrapper, that were saved elsewhere
+        (e.g. imported with ``from module import fn``),
+        call the original function directly after this.
+        """
+        self.active = False
+        if self.owner.__dict__.get(self.attr) is self.wrapped:
+            setattr(self.owner, self.attr, self.original)
+
+
+class _InstrumentingLoader(importlib.abc.Loader):
+    """Loader wrapper, that instruments a module after its execution.
+    """
+
+    def __init__(self, loader, instrumenter):
+        self.loader = loader
+        self.instrumenter = instrumenter
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module):
+        self.loader.exec_module(module)
+        self.instrumenter.instrument_module(module)
+
+    def __getattr__(self, name):
+        return getattr(self.loader, name)
+
+
+class Instrumenter(importlib.abc.MetaPathFinder):
+    """Wraps functions of the matching modules in regions.
+
+    See :py:func:`instrument`.
+    """
+
+    def __init__(self, modules, include=None, exclude=None, min_duration=None,
+                 warmup_calls=WARMUP_CALLS, get_profiler=None):
+        """
+        Args:
+            modules (list of str): module name patterns
+            include (list of str, optional): function name patterns to be instrumented
+            exclude (list of str, optional): function name patterns to be skipped
+            min_duration (float, optional): un-instrument functions,
+                which average call is shorter (in seconds)
+            warmup_calls (int): number of calls before applying ``min_duration``
+            get_profiler (Callable, optional): returns
+                :py:class:`region_profiler.profiler.RegionProfiler` to be used.
+                Default: the global instance
+        """
+        self.modules = list(modules)
+        self.include = list(include or ())
+        self.exclude = list(exclude or ())
+        self.min_duration = min_duration
+        self.warmup_calls = warmup_calls
+        if get_profiler is None:
+            get_profiler = lambda: global_instance._profiler
+        self.get_profiler = get_profiler
+        self.functions = []
+
+    def matches_module(self, module_name):
+        """Check if a module should be instrumented.
+        """
+        return any(_match_module(module_name, p) for p in self.modules)
+
+    def matches_function(self, qualified_name):
+        """Check if a function should be instrumented.
+
+        Args:
+            qualified_name (str): function name in format ``module.Class.method``
+        """
+        if self.include and not any(fnmatch.fnmatchcase(qualified_name, p) for p in self.include):
+            return False
+        return not any(fnmatch.fnmatchcase(qualified_name, p) for p in self.exclude)
+
+    def find_spec(self, fullname, path, target=None):
+        if not self.matches_module(fullname):
+            return None
+        for finder in sys.meta_path:
+            if finder is self or isinstance(finder, Instrumenter):
+                continue
+            find_spec = getattr(finder, 'find_spec', None)
+            if find_spec is None:
+                continue
+            spec = find_spec(fullname, path, target)
+            if spec is None:
+                continue
+            if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+                spec.loader = _InstrumentingLoader(spec.loader, self)
+            return spec
+        return None
+
+    def instrument_module(self, module):
+        """Instrument functions and methods defined in a module.
+
+        Only functions and classes, which ``__module__`` is the module itself,
+        are instrumented, so imported names are left intact.
+        Dunder methods except ``__init__`` and ``__call__`` are skipped.
+
+        Args:
+            module (module): module to be instrumented
+        """
+        module_name = module.__name__
+        for attr, obj in list(vars(module).items()):
+            if getattr(obj, '__module__', None) != module_name:
+                continue
+            if isinstance(obj, types.FunctionType):
+                self._instrument(module, attr, obj, obj)
+            elif isinstance(obj, type):
+                for m_attr, m_obj in list(vars(obj).items()):
+                    if (m_attr.startswith('__') and m_attr.endswith('__') and
+                            m_attr not in _KEPT_DUNDER_METHODS):
+                        continue
+                    if isinstance(m_obj, (staticmethod, classmethod)):
+                        self._instrument(obj, m_attr, m_obj.__func__, m_obj)
+                    elif isinstance(m_obj, types.FunctionType):
+                        self._instrument(obj, m_attr, m_obj, m_obj)
+
+    def restore(self):
+        """Remove instrumentation from all functions.
+        """
+        for f in self.functions:
+            if f.active:
+                f.restore()
+
+    def _instrument(self, owner, attr, fn, original):
+        if hasattr(fn, '__region_profiler_handle__'):
+            return
+        if not self.matches_function('{}.{}'.format(fn.__module__, fn.__qualname__)):
+            return
+
+        handle = InstrumentedFunction(fn.__qualname__ + '()', fn, owner, attr, original)
+        wrapped = wrap_resumable_function(fn, handle.name, False, self.get_profiler)
+        if wrapped is None:
+            wrapped = self._wrap_function(handle)
+        wrapped.__region_profiler_handle__ = handle
+        if isinstance(original, staticmethod):
+            wrapped = staticmethod(wrapped)
+        elif isinstance(original, classmethod):
+            wrapped = classmethod(wrapped)
+
+        handle.wrapped = wrapped
+        setattr(owner, attr, wrapped)
+        self.functions.append(handle)
+
+    def _wrap_function(self, handle):
+        fn = handle.fn
+        name = handle.name
+        get_profiler = self.get_profiler
+        min_duration = self.min_duration
+        warmup_calls = self.warmup_calls
+
+        @functools.wraps(fn)
+        def wrapped(*args, **kwargs):
+            rp = get_profiler()
+            if rp is None or not handle.active:
+                return fn(*args, **kwargs)
+            node = rp.current_node.get_child(name)
+            rp._push_region(node)
+            if min_duration is None:
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    rp._pop_region()
+
+            # node timer is shared by recursive calls, so time the call itself
+            clock = rp.root.timer.clock
+            start = clock()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                handle.total += clock() - start
+                rp._pop_region()
+                handle.calls += 1
+                if (handle.calls >= warmup_calls and
+                        handle.total < min_duration * handle.calls):
+                    handle.restore()
+
+        return wrapped
+
+
+def instrument(*modules, include=None, exclude=None, min_duration=None,
+               warmup_calls=WARMUP_CALLS):
+    """Instrument all functions and methods of the selected modules.
+
+    Each function is wrapped in a region named ``func()`` (``Class.method()`` for methods),
+    like with :py:func:`region_profiler.func` decorator.
+    Regions are timed using the global profiler, see :py:func:`region_profiler.install`.
+
+    Examples::
+
+        rp.instrument('mypkg.io', 'mypkg.model.*', exclude=['*.test_*'])
+
+    Args:
+        *modules (str): module name patterns (in :py:mod:`fnmatch` syntax).
+            Submodules of a matching package are instrumented too
+        include (list of str, optional): if provided, only functions, matching one of
+            these patterns, are instrumented. Patterns are matched against
+            qualified function name, e.g. ``mypkg.io.Reader.read``
+        exclude (list of str, optional): functions, matching one of these patterns,
+            are not instrumented
+        min_duration (float, optional): after ``warmup_calls`` calls, functions,
+            which average call is shorter than ``min_duration`` seconds,
+            are un-instrumented to avoid profiling overhead on trivial functions.
+            Generator and coroutine functions are never un-instrumented
+        warmup_calls (int): number of calls before applying ``min_duration``
+
+    Returns:
+        :py:class:`Instrumenter`: the installed instrumenter,
+        None if profiling is disabled (see :py:func:`region_profiler.disable`)
+    """
+    if global_instance._disabled:
+        return None
+    instrumenter = Instrumenter(modules, include, exclude, min_duration, warmup_calls)
+    for name, module in list(sys.modules.items()):
+        if module is not None and instrumenter.matches_module(name):
+            instrumenter.instrument_module(module)
+    sys.meta_path.insert(0, instrumenter)
+    _instrumenters.append(instrumenter)
+    return instrumenter
+
+
+def uninstrument():
+    """Remove the import hooks and instrumentation, installed by :py:func:`instrument`.
+    """
+    while _instrumenters:
+        instrumenter = _instrumenters.pop()
+        if instrumenter in sys.meta_path:
+            sys.meta_path.remove(instrumenter)
+        instrumenter.restore()
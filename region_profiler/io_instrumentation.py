@@ -0,0 +1,184 @@
+"""Attribute blocking I/O to regions.
+
+:py:func:`instrument_io` patches :py:class:`socket.socket` send and receive methods,
+so that each socket I/O call in the profiled thread is timed and
+
+- its duration and the number of transferred bytes are accumulated
+  in ``io_time`` and ``io_bytes`` of the current region node
+  (see ``io_time``, ``io_bytes`` and ``io_percent`` report columns)
+- its duration is charged to ``<io>`` child of the current region,
+  so the region inner time excludes I/O
+
+The methods are patched on the class, so sockets remain
+:py:class:`socket.socket` instances, and file objects, returned
+by :py:meth:`socket.socket.makefile`, are timed as well.
+
+File I/O is not instrumented globally: replacing :py:func:`open` would either
+return objects, that are not :py:class:`io.IOBase` instances,
+or charge files, written by the profiler itself (reports, traces), to ``<io>``.
+Instead, files are timed on request with :py:func:`timed_file`
+(or :py:func:`region_profiler.io_file`)::
+
+    with rp.io_file(open('data.bin', 'rb')) as f:
+        header = f.read(16)
+
+The file object itself is returned, with ``read*`` and ``write*`` methods
+replaced by timed ones on the instance. Line iteration (``for line in f``)
+bypasses instance attributes and is not timed, use :py:meth:`io.IOBase.readline`.
+For text files transferred size is counted in characters.
+"""
+
+import functools
+import socket
+import threading
+
+from region_profiler import global_instance
+
+IO_REGION = '<io>'
+"""Name of the synthetic region for I/O calls.
+"""
+
+_SOCKET_METHODS = {
+    'send': lambda args, result: result,
+    'sendall': lambda args, result: len(args[1]),
+    'sendto': lambda args, result: result,
+    'recv': lambda args, result: len(result),
+    'recv_into': lambda args, result: result,
+    'recvfrom': lambda args, result: len(result[0]),
+    'recvfrom_into': lambda args, result: result[0],
+}
+"""Patched socket methods and functions, that extract the number
+of transferred bytes from call arguments (including ``self``) and the result.
+"""
+
+_FILE_METHODS = {
+    'read': lambda args, result: len(result) if result is not None else 0,
+    'read1': lambda args, result: len(result),
+    'readline': lambda args, result: len(result),
+    'readlines': lambda args, result: sum(len(line) for line in result),
+    'readinto': lambda args, result: result,
+    'readinto1': lambda args, result: result,
+    'write': lambda args, result: result,
+    'writelines': lambda args, result: sum(len(line) for line in args[0]),
+}
+"""Timed file methods, that extract the number of transferred bytes
+from call arguments (without ``self``) and the result.
+"""
+
+_originals = {}
+"""Patched objects, saved for :py:func:`uninstrument_io`.
+"""
+
+
+class _IoRecorder:
+    """Charge I/O calls to the current region of the profiler.
+
+    Nested I/O calls (e.g. socket reads inside a file object,
+    returned by :py:meth:`socket.socket.makefile`) are not recorded separately.
+    """
+
+    def __init__(self, get_profiler):
+        self.get_profiler = get_profiler
+        self.depth = 0
+
+    def call(self, fn, args, kwargs, count_bytes):
+        """Call an I/O function and record its duration and transferred bytes.
+
+        Args:
+            fn (Callable): I/O function
+            args (tuple): positional arguments
+            kwargs (dict): keyword arguments
+            count_bytes (Callable): returns the number of transferred bytes
+                given ``args`` and the call result
+        """
+        rp = self.get_profiler()
+        if rp is None or self.depth or rp.thread_id != threading.get_ident():
+            return fn(*args, **kwargs)
+        clock = rp.root.timer.clock
+        self.depth += 1
+        start = clock()
+        try:
+            result = fn(*args, **kwargs)
+        finally:
+            duration = clock() - start
+            self.depth -= 1
+        rp.current_node.add_io(duration, count_bytes(args, result) or 0)
+        rp.add_synthetic_child(IO_REGION, duration)
+        return result
+
+
+def _timed_method(fn, recorder, count_bytes):
+    @functools.wraps(fn)
+    def timed(*args, **kwargs):
+        return recorder.call(fn, args, kwargs, count_bytes)
+
+    return timed
+
+
+def _timed_writelines(fn, recorder, count_bytes):
+    @functools.wraps(fn)
+    def timed(lines):
+        # Lines may be a generator, that can be consumed only once
+        return recorder.call(fn, (list(lines),), {}, count_bytes)
+
+    return timed
+
+
+def timed_file(f, get_profiler=None):
+    """Time reads and writes of an opened file.
+
+    See module description for details.
+
+    Args:
+        f (file object): file object, e.g. returned by :py:func:`open`
+        get_profiler (Callable, optional): returns
+            :py:class:`region_profiler.profiler.RegionProfiler` to be used.
+            Default: the global instance
+
+    Returns:
+        file object: ``f`` itself
+    """
+    if get_profiler is None:
+        get_profiler = lambda: global_instance._profiler
+    recorder = _IoRecorder(get_profiler)
+    for name, count_bytes in _FILE_METHODS.items():
+        fn = getattr(f, name, None)
+        if fn is None:
+            continue
+        wrap = _timed_writelines if name == 'writelines' else _timed_method
+        setattr(f, name, wrap(fn, recorder, count_bytes))
+    return f
+
+
+def instrument_io(get_profiler=None):
+    """Start timing socket I/O.
+
+    See module description for details. Calling this function again
+    has no effect until :py:func:`uninstrument_io` is called.
+
+    Args:
+        get_profiler (Callable, optional): returns
+            :py:class:`region_profiler.profiler.RegionProfiler` to be used.
+            Default: the global instance
+    """
+    if _originals:
+        return
+    if get_profiler is None:
+        get_profiler = lambda: global_instance._profiler
+    recorder = _IoRecorder(get_profiler)
+
+    for name, count_bytes in _SOCKET_METHODS.items():
+        fn = getattr(socket.socket, name)
+        _originals[(socket.socket, name)] = socket.socket.__dict__.get(name)
+        setattr(socket.socket, name, _timed_method(fn, recorder, count_bytes))
+
+
+def uninstrument_io():
+    """Restore patched socket methods.
+    """
+    for (owner, attr), original in _originals.items():
+        if original is None:
+            delattr(owner, attr)
+        else:
+            setattr(owner, attr, original)
+    _originals.clear()
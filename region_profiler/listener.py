@@ -1,6 +1,3 @@
-from abc import abstractmethod
-
-
 class RegionProfilerListener:
     """Base class for profiler listeners, that can augment profiler functionality.
 
@@ -10,15 +7,38 @@ class RegionProfilerListener:
     - Exit region
     - Cancel region
     - Finish profiling
+    - Flush (e.g. on a live report request, see :py:mod:`region_profiler.signal_report`)
+
+    Region events are dispatched only to the listeners, that subscribe
+    to them in :py:attr:`subscribed_events`. The profiler collects
+    the subscribed hooks on construction, so a listener, that does not need
+    some events, costs nothing on these events.
+    Root region enter and exit events as well as 'Finish profiling' event
+    are delivered to all listeners.
+    Hooks, that are not overridden, do nothing.
+
+    Attributes:
+        subscribed_events (tuple of str): names of region event hooks,
+            that should be called by the profiler.
+            Default: all region events.
     """
 
-    @abstractmethod
+    subscribed_events = ('region_entered', 'region_exited', 'region_canceled')
+
     def finalize(self):
         """Hook 'Finish profiling' event.
         """
-        raise NotImplementedError
+        pass
+
+    def flush(self):
+        """Hook 'Flush' event.
+
+        Listeners, that buffer their output, should write out
+        as much as possible without breaking the later output.
+        May be called while regions are open.
+        """
+        pass
 
-    @abstractmethod
     def region_entered(self, profiler, region):
         """Hook 'Enter region' event.
 
@@ -28,9 +48,8 @@ class RegionProfilerListener:
             region (:py:class:`region_profiler.node.RegionNode`):
                 Region associated with the event
         """
-        raise NotImplementedError
+        pass
 
-    @abstractmethod
     def region_exited(self, profiler, region):
         """Hook 'Exit region' event.
 
@@ -40,9 +59,8 @@ class RegionProfilerListener:
             region (:py:class:`region_profiler.node.RegionNode`):
                 Region associated with the event
         """
-        raise NotImplementedError
+        pass
 
-    @abstractmethod
     def region_canceled(self, profiler, region):
         """Hook 'Cancel region' event.
 
@@ -52,4 +70,4 @@ class RegionProfilerListener:
             region (:py:class:`region_profiler.node.RegionNode`):
                 Region associated with the event
         """
-        raise NotImplementedError
+        pass
@@ -1,7 +1,16 @@
 import warnings
+from collections import OrderedDict
 
 from region_profiler.utils import SeqStats, Timer
 
+MAX_TAG_VALUES = 32
+"""Default limit of distinct tag values, tracked per region.
+"""
+
+OTHER_TAGS = '<other>'
+"""Name of the bucket, that accumulates stats of evicted tag values.
+"""
+
 
 class RegionNode:
     """RegionNode represents a single entry in a region tree.
@@ -17,26 +26,49 @@ class RegionNode:
 
     Attributes:
         name (str): Node name.
+        parent (RegionNode, optional): Parent node, None for the root.
         stats (SeqStats): Measurement statistics.
+        consumer_stats (SeqStats, optional): For iterator proxy regions,
+            statistics of time spent by the loop body between iterations.
+        iter_history (:py:class:`region_profiler.stall_analysis.IterHistory`, optional):
+            For iterator proxy regions, timings of the last iterations.
+        tag_stats (:py:class:`collections.OrderedDict`, optional): For tagged regions,
+            measurement statistics per tag value, see :py:meth:`add_tagged`.
+        items (int): Number of items processed inside the region, see :py:meth:`add_items`.
+        bytes (int): Number of bytes processed inside the region, see :py:meth:`add_bytes`.
+        io_time (float): Time spent in instrumented I/O calls inside the region,
+            see :py:mod:`region_profiler.io_instrumentation`.
+        io_bytes (int): Number of bytes transferred by instrumented I/O calls.
     """
 
-    def __init__(self, name, timer_cls=Timer):
+    __slots__ = ('name', 'parent', 'timer_cls', 'timer', 'cancelled', 'stats',
+                 'children', 'recursion_depth', 'consumer_stats', 'iter_history',
+                 'tag_stats', 'items', 'bytes', 'io_time', 'io_bytes')
+
+    def __init__(self, name, timer_cls=Timer, parent=None):
         """Create new instance of ``RegionNode`` with the given name.
 
         Args:
             name (str): node name
             timer_cls (class): class, used for creating timers.
                 Default: ``region_profiler.utils.Timer``
+            parent (RegionNode, optional): parent node
         """
         self.name = name
-        self.optimized_class = False
+        self.parent = parent
         self.timer_cls = timer_cls
         self.timer = self.timer_cls()
         self.cancelled = False
         self.stats = SeqStats()
         self.children = dict()
         self.recursion_depth = 0
-        self.last_event_time = 0
+        self.consumer_stats = None
+        self.iter_history = None
+        self.tag_stats = None
+        self.items = 0
+        self.bytes = 0
+        self.io_time = 0
+        self.io_bytes = 0
 
     def enter_region(self):
         """Start timing current region.
@@ -75,6 +107,68 @@ class RegionNode:
             else:
                 self.timer.mark_aux_event()
 
+    def add_items(self, n=1):
+        """Record items processed inside the region.
+
+        Reporters use the counter for throughput columns
+        (items/s, ns/item).
+
+        Args:
+            n (int): number of items
+        """
+        self.items += n
+
+    def add_bytes(self, b):
+        """Record bytes processed inside the region.
+
+        Reporters use the counter for MB/s column.
+
+        Args:
+            b (int): number of bytes
+        """
+        self.bytes += b
+
+    def add_io(self, duration, nbytes):
+        """Record an I/O call inside the region.
+
+        Args:
+            duration (float): I/O call duration
+            nbytes (int): number of transferred bytes
+        """
+        self.io_time += duration
+        self.io_bytes += nbytes
+
+    def add_tagged(self, tags, x, max_tag_values=MAX_TAG_VALUES):
+        """Update statistics of a tag value with a measurement.
+
+        At most ``max_tag_values`` distinct values are tracked.
+        When a new value exceeds the limit, the least recently used value
+        is folded into :py:data:`OTHER_TAGS` bucket.
+
+        Args:
+            tags (str): tag value, see :py:func:`region_profiler.utils.format_tags`
+            x (float): measurement
+            max_tag_values (int): limit of distinct tag values
+        """
+        if self.tag_stats is None:
+            self.tag_stats = OrderedDict()
+        tag_stats = self.tag_stats
+        try:
+            stats = tag_stats[tags]
+            tag_stats.move_to_end(tags)
+        except KeyError:
+            if len(tag_stats) - (OTHER_TAGS in tag_stats) >= max_tag_values:
+                if OTHER_TAGS not in tag_stats:
+                    tag_stats[OTHER_TAGS] = SeqStats()
+                lru = next((t for t in tag_stats if t != OTHER_TAGS), None)
+                if lru is None:
+                    stats = tag_stats[OTHER_TAGS]
+                    stats.add(x)
+                    return
+                tag_stats[OTHER_TAGS].merge(tag_stats.pop(lru))
+            stats = tag_stats[tags] = SeqStats()
+        stats.add(x)
+
     def get_child(self, name, timer_cls=None):
         """Get node child with the given name.
 
@@ -91,7 +185,7 @@ class RegionNode:
         try:
             return self.children[name]
         except KeyError:
-            c = RegionNode(name, timer_cls or self.timer_cls)
+            c = RegionNode(name, timer_cls or self.timer_cls, self)
             self.children[name] = c
             return c
 
@@ -108,6 +202,21 @@ class RegionNode:
             format(str(self), repr(self.stats), self.timer_cls)
 
 
+class NullNode:
+    """Placeholder for a region node, when profiling is disabled.
+
+    It accepts throughput counters and ignores them.
+    """
+
+    __slots__ = ()
+
+    def add_items(self, n=1):
+        pass
+
+    def add_bytes(self, b):
+        pass
+
+
 class _RootNodeStats:
     """Proxy object that wraps timer in the
     :py:class:`region_profiler.utils.SeqStats` interface.
@@ -117,6 +226,8 @@ class _RootNodeStats:
     Proxy properties return current timer values.
     """
 
+    __slots__ = ('timer',)
+
     def __init__(self, timer):
         self.timer = timer
 
@@ -147,6 +258,8 @@ class RootNode(RegionNode):
     the real stats of previous measurements.
     """
 
+    __slots__ = ()
+
     def __init__(self, name='<root>', timer_cls=Timer):
         super(RootNode, self).__init__(name, timer_cls)
         self.enter_region()
@@ -0,0 +1,97 @@
+"""Measure profiler self-overhead.
+
+If a profiler is constructed with ``measure_overhead=True``
+(or :py:func:`region_profiler.install` is called with ``measure_overhead=True``),
+it times its own work with :py:func:`time.perf_counter`:
+
+- region enter, exit and cancel handling
+- each listener hooks
+- automatic region name resolution
+
+and counts region events. Collected totals are available
+as :py:attr:`region_profiler.profiler.RegionProfiler.overhead`
+and printed in :py:class:`region_profiler.reporters.ConsoleReporter` footer.
+Timing the overhead adds a few clock reads per event, that are not accounted.
+"""
+
+import time
+
+from region_profiler.utils import pretty_print_time
+
+
+class OverheadStats:
+    """Profiler self-overhead totals.
+
+    Attributes:
+        clock (Callable): clock, used for measurements
+        counts (dict): number of ``'enter'``, ``'exit'`` and ``'cancel'`` events
+        core_time (float): time spent handling region events
+            (excluding listener hooks)
+        listener_names (list of str): names of registered listeners
+        listener_time (list of float): time spent in hooks of each listener
+        naming_time (float): time spent resolving automatic region names
+        naming_count (int): number of automatic region name resolutions
+    """
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.counts = {'enter': 0, 'exit': 0, 'cancel': 0}
+        self.core_time = 0
+        self.listener_names = []
+        self.listener_time = []
+        self.naming_time = 0
+        self.naming_count = 0
+
+    def add_listener(self, listener):
+        """Start accounting a new listener.
+
+        Returns:
+            int: listener index in :py:attr:`listener_time`
+        """
+        self.listener_names.append(type(listener).__name__)
+        self.listener_time.append(0)
+        return len(self.listener_time) - 1
+
+    @property
+    def event_count(self):
+        """Total number of region events.
+        """
+        return sum(self.counts.values())
+
+    @property
+    def total(self):
+        """Total measured overhead.
+        """
+        return self.core_time + sum(self.listener_time) + self.naming_time
+
+    def fraction(self, total_time):
+        """Overhead as a fraction of the profiled time.
+
+        Args:
+            total_time (float): profiled time, e.g. the root region total
+
+        Returns:
+            float: overhead fraction, 0 if ``total_time`` is 0
+        """
+        return self.total / total_time if total_time else 0.
+
+    def summary(self, total_time):
+        """Get human-readable overhead summary.
+
+        Args:
+            total_time (float): profiled time, e.g. the root region total
+
+        Returns:
+            list of str: summary lines
+        """
+        lines = ['Profiler overhead: {} ({:.2f}% of {}), {} enter, {} exit, {} cancel events'.format(
+            pretty_print_time(self.total), self.fraction(total_time) * 100,
+            pretty_print_time(total_time),
+            self.counts['enter'], self.counts['exit'], self.counts['cancel'])]
+        lines.append('  region events: {}'.format(pretty_print_time(self.core_time)))
+        if self.naming_count:
+            lines.append('  name resolution: {} ({} calls)'.format(
+                pretty_print_time(self.naming_time), self.naming_count))
+        for name, t in zip(self.listener_names, self.listener_time):
+            lines.append('  {}: {}'.format(name, pretty_print_time(t)))
+        return lines
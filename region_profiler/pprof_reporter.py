@@ -0,0 +1,161 @@
+"""Export profiler state in `pprof <https://github.com/google/pprof>`_ format.
+
+The profile is encoded as a gzip-compressed ``Profile`` protobuf message
+(see `profile.proto <https://github.com/google/pprof/blob/master/proto/profile.proto>`_).
+The encoder below implements just the subset of protobuf wire format
+required for this message, so no protobuf package is needed.
+"""
+
+import gzip
+import sys
+import time
+
+from region_profiler.reporters import get_profiler_slice
+
+_WIRE_VARINT = 0
+_WIRE_LENGTH_DELIMITED = 2
+
+
+def _varint(value):
+    """Encode an unsigned (or non-negative) integer as protobuf varint.
+    """
+    if value < 0:
+        value += 1 << 64
+    out = bytearray()
+    while True:
+        bits = value & 0x7f
+        value >>= 7
+        if value:
+            out.append(bits | 0x80)
+        else:
+            out.append(bits)
+            return bytes(out)
+
+
+def _key(field, wire_type):
+    return _varint((field << 3) | wire_type)
+
+
+def _int_field(field, value):
+    """Encode int64/uint64 field. Default (zero) values are omitted.
+    """
+    if not value:
+        return b''
+    return _key(field, _WIRE_VARINT) + _varint(value)
+
+
+def _bytes_field(field, data):
+    return _key(field, _WIRE_LENGTH_DELIMITED) + _varint(len(data)) + data
+
+
+def _packed_field(field, values):
+    if not values:
+        return b''
+    return _bytes_field(field, b''.join(_varint(v) for v in values))
+
+
+class _StringTable:
+    """Deduplicated string table. Index 0 is always an empty string.
+    """
+
+    def __init__(self):
+        self.index = {'': 0}
+        self.strings = ['']
+
+    def __call__(self, s):
+        try:
+            return self.index[s]
+        except KeyError:
+            i = self.index[s] = len(self.strings)
+            self.strings.append(s)
+            return i
+
+
+SAMPLE_TYPES = (('count', 'count'), ('total', 'nanoseconds'), ('self', 'nanoseconds'))
+"""Sample value types, reported for each region.
+"""
+
+
+def encode_profile(rp):
+    """Encode profiler state as a serialized pprof ``Profile`` message.
+
+    Each region becomes a sample with a stack of its path,
+    every distinct region name is represented by a single
+    function and location. Sample values are defined by :py:data:`SAMPLE_TYPES`.
+
+    Args:
+        rp(:py:class:`region_profiler.profiler.RegionProfiler`): region profiler
+
+    Returns:
+        bytes: uncompressed protobuf message
+    """
+    slices = get_profiler_slice(rp)
+    strings = _StringTable()
+    locations = {}
+    stacks = []
+    samples = []
+
+    for s in slices:
+        try:
+            loc = locations[s.name]
+        except KeyError:
+            loc = locations[s.name] = len(locations) + 1
+        stack = [loc] if s.parent is None else [loc] + stacks[s.parent.id]
+        stacks.append(stack)
+        values = [s.count, int(s.total_time * 1e9), int(s.total_inner_time * 1e9)]
+        samples.append(_bytes_field(2, _packed_field(1, stack) + _packed_field(2, values)))
+
+    msg = [_bytes_field(1, _int_field(1, strings(t)) + _int_field(2, strings(u)))
+           for t, u in SAMPLE_TYPES]
+    msg.extend(samples)
+    for loc in locations.values():
+        line = _int_field(1, loc)
+        msg.append(_bytes_field(4, _int_field(1, loc) + _bytes_field(4, line)))
+    for name, loc in locations.items():
+        name_idx = strings(name)
+        msg.append(_bytes_field(5, _int_field(1, loc) + _int_field(2, name_idx) +
+                                _int_field(3, name_idx)))
+    time_nanos = int(time.time() * 1e9)
+    duration_nanos = int(slices[0].total_time * 1e9)
+    period_type = _int_field(1, strings('wall')) + _int_field(2, strings('nanoseconds'))
+    default_sample_type = strings('self')
+
+    msg.extend(_bytes_field(6, st.encode('utf-8')) for st in strings.strings)
+    msg.append(_int_field(9, time_nanos))
+    msg.append(_int_field(10, duration_nanos))
+    msg.append(_bytes_field(11, period_type))
+    msg.append(_int_field(14, default_sample_type))
+    return b''.join(msg)
+
+
+class PprofReporter:
+    """Save profiler state as a gzip-compressed pprof profile.
+
+    The resulting file can be opened with ``go tool pprof`` or any other
+    tool, that consumes pprof profiles::
+
+        go tool pprof -http=:8080 profile.pb.gz
+
+    Each region is reported with its hit count, total time and
+    time excluding its child regions (``self``, the default sample type).
+    Note that pprof sums up values along the stack for cumulative views,
+    so ``self`` is the only value type, that aggregates correctly.
+    """
+
+    def __init__(self, filename):
+        """Initialize the reporter.
+
+        Args:
+            filename (str): output file name, conventionally ``*.pb.gz``
+        """
+        self.filename = filename
+
+    def dump_profiler(self, rp):
+        """Dump the profiler state.
+
+        Args:
+            rp(:py:class:`region_profiler.profiler.RegionProfiler`): region profiler
+        """
+        with gzip.open(self.filename, 'wb') as f:
+            f.write(encode_profile(rp))
+        print('RegionProfiler: pprof profile is saved in', self.filename, file=sys.stderr)
@@ -1,7 +1,148 @@
+import functools
+import threading
+import types
 from contextlib import contextmanager
 
-from region_profiler.node import RootNode
-from region_profiler.utils import Timer, get_name_by_callsite
+from region_profiler.node import MAX_TAG_VALUES, RootNode
+from region_profiler.overhead import OverheadStats
+from region_profiler.stall_analysis import ITER_HISTORY_SIZE, IterHistory
+from region_profiler.utils import SeqStats, Timer, format_tags, get_name_by_callsite
+
+
+# Code object flags, same as in :py:mod:`inspect`, which is slow to import
+_CO_GENERATOR = 0x20
+_CO_COROUTINE = 0x80
+_CO_ASYNC_GENERATOR = 0x200
+
+
+def _nop():
+    pass
+
+
+def _code_flags(fn):
+    """Return code flags of a function, unwrapping partials and bound methods.
+    """
+    while isinstance(fn, functools.partial):
+        fn = fn.func
+    fn = getattr(fn, '__func__', fn)
+    code = getattr(fn, '__code__', None)
+    return code.co_flags if code is not None else 0
+
+
+@types.coroutine
+def _resume_timed(gen, enter, exit):
+    """Drive a generator or a coroutine, calling ``enter()`` before
+    and ``exit()`` after each its resume.
+
+    Sent values and thrown exceptions are forwarded to ``gen``,
+    so time spent by the consumer (or awaiting the event loop)
+    between resumes is not timed.
+
+    Returns:
+        value returned by ``gen``
+    """
+    value = None
+    exc = None
+    while True:
+        enter()
+        try:
+            item = gen.send(value) if exc is None else gen.throw(exc)
+        except StopIteration as e:
+            return e.value
+        finally:
+            exit()
+        exc = None
+        try:
+            value = yield item
+        except GeneratorExit:
+            enter()
+            try:
+                gen.close()
+            finally:
+                exit()
+            raise
+        except BaseException as e:
+            exc = e
+            value = None
+
+
+async def _resume_timed_async_generator(agen, enter, exit):
+    """Drive an async generator, timing each its resume.
+    See :py:func:`_resume_timed`.
+    """
+    value = None
+    exc = None
+    while True:
+        try:
+            if exc is None:
+                item = await _resume_timed(agen.asend(value), enter, exit)
+            else:
+                item = await _resume_timed(agen.athrow(exc), enter, exit)
+        except StopAsyncIteration:
+            return
+        exc = None
+        try:
+            value = yield item
+        except GeneratorExit:
+            await _resume_timed(agen.aclose(), enter, exit)
+            raise
+        except BaseException as e:
+            exc = e
+            value = None
+
+
+def wrap_resumable_function(fn, name, asglobal, get_profiler):
+    """Wrap a generator, coroutine or async generator function
+    in a region, that is timed on each resume.
+
+    Timing only a call of such functions is meaningless,
+    as it just creates a generator (coroutine) object.
+    Instead, the region is entered each time the generator (coroutine)
+    is resumed and exited when it yields (awaits) again.
+    Thus the region time excludes time spent by the consumer
+    or awaiting other tasks, and the region count
+    is the number of resumes.
+
+    The region node is selected when the generator is created
+    (for coroutines and async generators, on their first resume).
+
+    Args:
+        fn (Callable): generator, coroutine or async generator function
+        name (str): region name
+        asglobal (bool): enter the region from root context, not a current one
+        get_profiler (Callable): returns :py:class:`RegionProfiler` to be used.
+            If it returns None, the function is not timed
+
+    Returns:
+        Callable: wrapped function of the same kind as ``fn``,
+                  or None if ``fn`` is a regular function
+    """
+
+    def timing_hooks():
+        profiler = get_profiler()
+        if profiler is None:
+            return _nop, _nop
+        parent = profiler.root if asglobal else profiler.current_node
+        node = parent.get_child(name)
+        return functools.partial(profiler._push_region, node), profiler._pop_region
+
+    flags = _code_flags(fn)
+    if flags & _CO_GENERATOR:
+        @functools.wraps(fn)
+        def wrapped(*args, **kwargs):
+            return _resume_timed(fn(*args, **kwargs), *timing_hooks())
+    elif flags & _CO_COROUTINE:
+        @functools.wraps(fn)
+        async def wrapped(*args, **kwargs):
+            return await _resume_timed(fn(*args, **kwargs), *timing_hooks())
+    elif flags & _CO_ASYNC_GENERATOR:
+        @functools.wraps(fn)
+        def wrapped(*args, **kwargs):
+            return _resume_timed_async_generator(fn(*args, **kwargs), *timing_hooks())
+    else:
+        return None
+
+    return wrapped
 
 
 class RegionProfiler:
@@ -25,7 +166,8 @@ class RegionProfiler:
 
     ROOT_NODE_NAME = '<main>'
 
-    def __init__(self, timer_cls=None, listeners=None):
+    def __init__(self, timer_cls=None, listeners=None, max_tag_values=MAX_TAG_VALUES,
+                 measure_overhead=False):
         """Construct new :py:class:`RegionProfiler`.
 
         Args:
@@ -34,17 +176,43 @@ class RegionProfiler:
             listeners (:py:class:`list` of
                 :py:class:`region_profiler.listener.RegionProfilerListener`, optional):
                 optional list of listeners, that can augment region enter and exit events.
+            max_tag_values (int): limit of distinct tag values, tracked per tagged region,
+                see :py:meth:`region_profiler.node.RegionNode.add_tagged`
+            measure_overhead (bool): measure profiler self-overhead,
+                see :py:mod:`region_profiler.overhead`
         """
         if timer_cls is None:
             timer_cls = Timer
         self.root = RootNode(name=self.ROOT_NODE_NAME, timer_cls=timer_cls)
         self.node_stack = [self.root]
-        self.listeners = listeners or []
-        for l in self.listeners:
-            l.region_entered(self, self.root)
+        self.thread_id = threading.get_ident()
+        self.max_tag_values = max_tag_values
+        self.overhead = OverheadStats() if measure_overhead else None
+        self.listeners = []
+        self._update_dispatch()
+        for l in listeners or []:
+            self.add_listener(l)
+
+    def add_listener(self, listener):
+        """Register a new listener.
+
+        Listeners must be registered using this method (not by modifying
+        :py:attr:`listeners` directly), so that the event dispatch is updated.
+        The listener receives 'Enter region' event for the root region
+        regardless of its subscriptions.
+
+        Args:
+            listener (:py:class:`region_profiler.listener.RegionProfilerListener`):
+                listener to be added
+        """
+        self.listeners.append(listener)
+        if self.overhead is not None:
+            self.overhead.add_listener(listener)
+        self._update_dispatch()
+        listener.region_entered(self, self.root)
 
     @contextmanager
-    def region(self, name=None, asglobal=False, indirect_call_depth=0):
+    def region(self, name=None, asglobal=False, indirect_call_depth=0, tags=None, units=None):
         """Start new region in the current context.
 
         This function implements context manager interface.
@@ -57,6 +225,18 @@ class RegionProfiler:
             with rp.region('A'):
                 ...
 
+        Tags split region stats by some key without creating
+        a separate region per key value::
+
+            with rp.region('infer', tags={'bs': batch_size}):
+                ...
+
+        Processed items and bytes are recorded for throughput columns
+        (items/s, MB/s, ns/item)::
+
+            with rp.region('decode', units=len(batch)) as node:
+                node.add_bytes(sum(len(x) for x in batch))
+
         Args:
             name (:py:class:`str`, optional): region name.
                 If None, the name is deducted from region location in source
@@ -64,22 +244,36 @@ class RegionProfiler:
                 May be used to merge stats from different call paths
             indirect_call_depth (:py:class:`int`, optional): adjust call depth
                 to correctly identify the callsite position for automatic naming
+            tags (:py:class:`dict`, optional): tag names and values.
+                Measurements are additionally collected per tag value
+                in ``tag_stats`` attribute of the region node
+            units (:py:class:`int`, optional): number of items processed in the region,
+                see :py:meth:`region_profiler.node.RegionNode.add_items`
 
         Returns:
             :py:class:`region_profiler.node.RegionNode`: node of the region.
         """
         if name is None:
-            name = get_name_by_callsite(indirect_call_depth + 2)
+            name = self._name_by_callsite(indirect_call_depth + 2)
         parent = self.root if asglobal else self.current_node
-        self.node_stack.append(parent.get_child(name))
+        node = parent.get_child(name)
+        count = node.stats.count
+        self.node_stack.append(node)
         self._enter_current_region()
-        yield self.current_node
+        yield node
         self._exit_current_region()
         self.node_stack.pop()
+        if units is not None:
+            node.items += units
+        if tags is not None and node.stats.count != count:
+            node.add_tagged(format_tags(tags), node.timer.elapsed(), self.max_tag_values)
 
     def func(self, name=None, asglobal=False):
         """Decorator for entering region on a function call.
 
+        Generator, coroutine and async generator functions are timed
+        on each resume, see :py:func:`wrap_resumable_function`.
+
         Examples::
 
             @rp.func()
@@ -103,6 +297,11 @@ class RegionProfiler:
 
             name += '()'
 
+            wrapped = wrap_resumable_function(fn, name, asglobal, lambda: self)
+            if wrapped is not None:
+                return wrapped
+
+            @functools.wraps(fn)
             def wrapped(*args, **kwargs):
                 with self.region(name, asglobal):
                     return fn(*args, **kwargs)
@@ -111,17 +310,26 @@ class RegionProfiler:
 
         return decorator
 
-    def iter_proxy(self, iterable, name=None, asglobal=False, indirect_call_depth=0):
+    def iter_proxy(self, iterable, name=None, asglobal=False, indirect_call_depth=0,
+                   history=ITER_HISTORY_SIZE):
         """Wraps an iterable and profiles :func:`next()` calls on this iterable.
 
         This proxy may be useful, when the iterable is some data loader,
         that performs data retrieval on each iteration.
         For instance, it may pull data from an asynchronous process.
 
-        Such proxy was used to identify that when receiving a batch of
-        8 samples from a loader process, first 5 samples were loaded immediately
+        In addition to the region stats, the proxy collects time spent
+        in the loop body between iterations (``consumer_stats`` attribute
+        of the region node) and keeps per-iteration fetch and consumer times
+        (``iter_history`` attribute). Use
+        :py:func:`region_profiler.stall_analysis.analyze_stalls` or
+        :py:class:`region_profiler.stall_analysis.StallReporter`
+        to find out whether the loop is stalled by the loader.
+
+        For instance, it detects that when receiving a batch of
+        8 samples from a loader process, first 5 samples are loaded immediately
         (because they were computed asynchronously during the loop body),
-        but then it stalled on the last 3 iterations meaning that loading had
+        but then it stalls on the last 3 iterations meaning that loading has
         bigger latency than the loop body.
 
         Examples::
@@ -137,19 +345,28 @@ class RegionProfiler:
                 May be used to merge stats from different call paths
             indirect_call_depth (:py:class:`int`, optional): adjust call depth
                 to correctly identify the callsite position for automatic naming
+            history (int): number of the last iterations to keep for stall analysis.
+                0 disables recording
 
         Returns:
             Iterable: an iterable, that yield same data as the passed one
         """
         it = iter(iterable)
         if name is None:
-            name = get_name_by_callsite(indirect_call_depth + 1)
+            name = self._name_by_callsite(indirect_call_depth + 1)
         parent = self.root if asglobal else self.current_node
         node = parent.get_child(name)
+        consumer_stats, hist = self._iter_proxy_records(node, history)
+        last_item_ts = last_fetch = None
 
         while True:
             self.node_stack.append(node)
             self._enter_current_region()
+            fetch_ts = node.timer.last_event_time
+            if last_item_ts is not None:
+                consumer_stats.add(fetch_ts - last_item_ts)
+                if hist is not None:
+                    hist.iterations.append((last_fetch, fetch_ts - last_item_ts))
             try:
                 x = next(it)
             except StopIteration:
@@ -158,9 +375,87 @@ class RegionProfiler:
             finally:
                 self._exit_current_region()
                 self.node_stack.pop()
+            last_item_ts = node.timer.last_event_time
+            last_fetch = last_item_ts - fetch_ts
 
             yield x
 
+    async def aiter_proxy(self, aiterable, name=None, asglobal=False, indirect_call_depth=0,
+                          history=ITER_HISTORY_SIZE):
+        """Wraps an async iterable and profiles awaiting its items.
+
+        This is an asynchronous counterpart of :py:meth:`iter_proxy`
+        for ``async for`` loops over data streams (e.g. network bodies
+        or async queues). Each ``__anext__`` await is timed as the region,
+        including time when the loop is suspended waiting for data.
+        Time spent in the loop body between receiving an item and requesting
+        the next one is collected separately in ``consumer_stats``
+        attribute of the region node.
+        Comparing them tells whether the pipeline is stalled on input,
+        see also stall analysis in :py:meth:`iter_proxy`.
+
+        Other tasks may enter their regions while the proxy waits,
+        so the region is not entered on the profiler region stack:
+        it can't have child regions and listeners are not notified.
+        Each await is timed on its own (the node timer is not used),
+        so awaits of concurrent proxies with the same name overlap freely
+        and each of them is counted.
+
+        Examples::
+
+            async for chunk in rp.aiter_proxy(response.content.iter_chunked(1024)):
+                ...
+
+        Args:
+            aiterable (AsyncIterable): an async iterable to be wrapped
+            name (:py:class:`str`, optional): region name.
+                If None, the name is deducted from region location in source
+            asglobal (bool): enter the region from root context, not a current one.
+                May be used to merge stats from different call paths
+            indirect_call_depth (:py:class:`int`, optional): adjust call depth
+                to correctly identify the callsite position for automatic naming
+            history (int): number of the last iterations to keep for stall analysis.
+                0 disables recording
+
+        Returns:
+            AsyncIterable: an async iterable, that yield same data as the passed one
+        """
+        it = aiterable.__aiter__()
+        if name is None:
+            name = self._name_by_callsite(indirect_call_depth + 1)
+        parent = self.root if asglobal else self.current_node
+        node = parent.get_child(name)
+        consumer_stats, hist = self._iter_proxy_records(node, history)
+        clock = self.root.timer.clock
+        last_item_ts = last_fetch = None
+
+        while True:
+            fetch_ts = clock()
+            if last_item_ts is not None:
+                consumer_stats.add(fetch_ts - last_item_ts)
+                if hist is not None:
+                    hist.iterations.append((last_fetch, fetch_ts - last_item_ts))
+            try:
+                x = await it.__anext__()
+            except StopAsyncIteration:
+                return
+            except BaseException:
+                node.stats.add(clock() - fetch_ts)
+                raise
+            last_item_ts = clock()
+            last_fetch = last_item_ts - fetch_ts
+            node.stats.add(last_fetch)
+
+            yield x
+
+    @staticmethod
+    def _iter_proxy_records(node, history):
+        if node.consumer_stats is None:
+            node.consumer_stats = SeqStats()
+        if history and node.iter_history is None:
+            node.iter_history = IterHistory(history)
+        return node.consumer_stats, node.iter_history if history else None
+
     def finalize(self):
         """Perform profiler finalization on application shutdown.
         Finalize all associated listeners.
@@ -170,20 +465,126 @@ class RegionProfiler:
             l.region_exited(self, self.root)
             l.finalize()
 
-    def _enter_current_region(self):
-        self.current_node.enter_region()
-        for l in self.listeners:
-            l.region_entered(self, self.current_node)
+    def flush(self):
+        """Ask all associated listeners to write out buffered data.
 
-    def _exit_current_region(self):
-        self.current_node.exit_region()
+        See :py:meth:`region_profiler.listener.RegionProfilerListener.flush`.
+        """
         for l in self.listeners:
-            l.region_exited(self, self.current_node)
+            l.flush()
 
-    def _cancel_current_region(self):
-        self.current_node.cancel_region()
-        for l in self.listeners:
-            l.region_canceled(self, self.current_node)
+    def add_synthetic_child(self, name, duration):
+        """Record a measurement of a child region, that was not timed by the profiler.
+
+        The measurement is added to the child of the current region
+        without entering it, so listeners are not notified.
+        This is used for charging externally measured durations
+        (e.g. waits on synchronization primitives) to the current region.
+
+        Args:
+            name (str): child region name
+            duration (float): measured duration
+        """
+        self.current_node.get_child(name).stats.add(duration)
+
+    def _name_by_callsite(self, stack_depth):
+        if self.overhead is None:
+            return get_name_by_callsite(stack_depth + 1)
+        start = self.overhead.clock()
+        name = get_name_by_callsite(stack_depth + 1)
+        self.overhead.naming_time += self.overhead.clock() - start
+        self.overhead.naming_count += 1
+        return name
+
+    def _push_region(self, node):
+        self.node_stack.append(node)
+        self._enter_current_region()
+
+    def _pop_region(self):
+        self._exit_current_region()
+        self.node_stack.pop()
+
+    def _update_dispatch(self):
+        """Collect listener hooks per event and select event handlers.
+
+        If no listener is subscribed to an event,
+        a handler without a listener loop is used.
+        """
+        self._enter_hooks = tuple(l.region_entered for l in self.listeners
+                                  if 'region_entered' in l.subscribed_events)
+        self._exit_hooks = tuple(l.region_exited for l in self.listeners
+                                 if 'region_exited' in l.subscribed_events)
+        self._cancel_hooks = tuple(l.region_canceled for l in self.listeners
+                                   if 'region_canceled' in l.subscribed_events)
+        self._enter_current_region = (self._enter_current_region_notify if self._enter_hooks
+                                      else self._enter_current_region_silent)
+        self._exit_current_region = (self._exit_current_region_notify if self._exit_hooks
+                                     else self._exit_current_region_silent)
+        self._cancel_current_region = (self._cancel_current_region_notify if self._cancel_hooks
+                                       else self._cancel_current_region_silent)
+        if self.overhead is not None:
+            self._enter_hooks = self._indexed_hooks('region_entered')
+            self._exit_hooks = self._indexed_hooks('region_exited')
+            self._cancel_hooks = self._indexed_hooks('region_canceled')
+            self._enter_current_region = self._enter_current_region_measured
+            self._exit_current_region = self._exit_current_region_measured
+            self._cancel_current_region = self._cancel_current_region_measured
+
+    def _indexed_hooks(self, event):
+        return tuple((i, getattr(l, event)) for i, l in enumerate(self.listeners)
+                     if event in l.subscribed_events)
+
+    def _enter_current_region_silent(self):
+        self.node_stack[-1].enter_region()
+
+    def _enter_current_region_notify(self):
+        node = self.node_stack[-1]
+        node.enter_region()
+        for hook in self._enter_hooks:
+            hook(self, node)
+
+    def _exit_current_region_silent(self):
+        self.node_stack[-1].exit_region()
+
+    def _exit_current_region_notify(self):
+        node = self.node_stack[-1]
+        node.exit_region()
+        for hook in self._exit_hooks:
+            hook(self, node)
+
+    def _cancel_current_region_silent(self):
+        self.node_stack[-1].cancel_region()
+
+    def _cancel_current_region_notify(self):
+        node = self.node_stack[-1]
+        node.cancel_region()
+        for hook in self._cancel_hooks:
+            hook(self, node)
+
+    def _measured(self, event, node_method, hooks):
+        overhead = self.overhead
+        clock = overhead.clock
+        start = clock()
+        node = self.node_stack[-1]
+        getattr(node, node_method)()
+        ts = clock()
+        overhead.core_time += ts - start
+        overhead.counts[event] += 1
+        listener_time = overhead.listener_time
+        for i, hook in hooks:
+            hook(self, node)
+            end = clock()
+            listener_time[i] += end - ts
+            ts = end
+
+    def _enter_current_region_measured(self):
+        self._measured('enter', 'enter_region', self._enter_hooks)
+
+    def _exit_current_region_measured(self):
+        self._measured('exit', 'exit_region', self._exit_hooks)
+
+    def _cancel_current_region_measured(self):
+        self._measured('cancel', 'cancel_region', self._cancel_hooks)
 
     @property
     def current_node(self):
@@ -113,3 +113,70 @@ def max_us(this_slice, all_slices):
 @as_column()
 def max(this_slice, all_slices):
     return pretty_print_time(this_slice.max_time)
+
+
+@as_column()
+def consumer_us(this_slice, all_slices):
+    return str(int(this_slice.consumer_time * 1000000))
+
+
+@as_column()
+def consumer(this_slice, all_slices):
+    return pretty_print_time(this_slice.consumer_time)
+
+
+@as_column()
+def tags(this_slice, all_slices):
+    return this_slice.tags
+
+
+@as_column()
+def items(this_slice, all_slices):
+    return str(this_slice.items)
+
+
+@as_column()
+def bytes(this_slice, all_slices):
+    return str(this_slice.bytes)
+
+
+@as_column('items/s')
+def items_per_sec(this_slice, all_slices):
+    if not this_slice.items or not this_slice.total_time:
+        return ''
+    return '{:.1f}'.format(this_slice.items / this_slice.total_time)
+
+
+@as_column('MB/s')
+def mb_per_sec(this_slice, all_slices):
+    if not this_slice.bytes or not this_slice.total_time:
+        return ''
+    return '{:.2f}'.format(this_slice.bytes / this_slice.total_time / 1e6)
+
+
+@as_column('ns/item')
+def ns_per_item(this_slice, all_slices):
+    if not this_slice.items:
+        return ''
+    return str(int(this_slice.total_time * 1e9 / this_slice.items))
+
+
+@as_column()
+def io_time_us(this_slice, all_slices):
+    return str(int(this_slice.io_time * 1000000))
+
+
+@as_column()
+def io_time(this_slice, all_slices):
+    return pretty_print_time(this_slice.io_time)
+
+
+@as_column()
+def io_bytes(this_slice, all_slices):
+    return str(this_slice.io_bytes)
+
+
+@as_column('io %')
+def io_percent(this_slice, all_slices):
+    p = this_slice.io_time * 100. / this_slice.total_time if this_slice.total_time else 0
+    return '{:.2f}%'.format(p)
@@ -27,10 +27,23 @@ class Slice:
                                  minus total time of all node ancestors
         min_time(float): minimal duration, spent in the corresponding region
         max_time(float): maximal duration, spent in the corresponding region
+        consumer_time(float): for iterator proxy regions, total time spent
+                              in the loop body between iterations
+        items(int): number of items processed inside the region
+        bytes(int): number of bytes processed inside the region
+        io_time(float): time spent in instrumented I/O calls inside the region
+        io_bytes(int): number of bytes transferred by instrumented I/O calls
+        tags(str): tag value for slices of tagged region stats, empty for regular slices
+        tag_slices(list of :py:class:`Slice`): stats of the region per tag value.
+                                               These slices share ``id`` and ``parent``
+                                               with the region slice. Child regions
+                                               are not split by tags, so their inner time
+                                               equals their total time
     """
 
     def __init__(self, id, name, parent, call_depth, count,
-                 total_time, total_inner_time, min_time, max_time):
+                 total_time, total_inner_time, min_time, max_time, consumer_time=0, tags='',
+                 items=0, bytes=0, io_time=0, io_bytes=0):
         """
         Args:
             id(int): unique slice id
@@ -43,6 +56,13 @@ class Slice:
                                      minus total time of all node descendants
             min_time(float): minimal duration, spent in the corresponding region
             max_time(float): maximal duration, spent in the corresponding region
+            consumer_time(float): for iterator proxy regions, total time spent
+                                  in the loop body between iterations
+            tags(str): tag value, if the slice represents stats of a single tag value
+            items(int): number of items processed inside the region
+            bytes(int): number of bytes processed inside the region
+            io_time(float): time spent in instrumented I/O calls inside the region
+            io_bytes(int): number of bytes transferred by instrumented I/O calls
         """
         self.id = id
         self.name = name
@@ -54,6 +74,13 @@ class Slice:
         self.avg_time = total_time / count if count else 0
         self.min_time = min_time
         self.max_time = max_time
+        self.consumer_time = consumer_time
+        self.tags = tags
+        self.tag_slices = []
+        self.items = items
+        self.bytes = bytes
+        self.io_time = io_time
+        self.io_bytes = io_bytes
 
     @property
     def parent_name(self):
@@ -66,7 +93,8 @@ class Slice:
             '{}={}'.format(k, getattr(self, k)) for k in
             ('id', 'name', 'parent_name', 'call_depth',
              'count', 'total_time', 'total_inner_time',
-             'min_time', 'max_time')
+             'min_time', 'max_time', 'consumer_time', 'tags', 'items', 'bytes',
+             'io_time', 'io_bytes')
         ))
 
     def __repr__(self):
@@ -75,13 +103,15 @@ class Slice:
     def __eq__(self, other):
         return all(getattr(self, n) == getattr(other, n) for n in
                    ('id', 'name', 'parent_name', 'call_depth', 'count',
-                    'total_time', 'total_inner_time', 'min_time', 'max_time'))
+                    'total_time', 'total_inner_time', 'min_time', 'max_time',
+                    'consumer_time', 'tags', 'items', 'bytes', 'io_time', 'io_bytes'))
 
 
 def get_node_slice(slices, node, parent_slice, call_depth):
     """Serialize a node and its descendants data in a list of :py:class:`Slice`.
 
     Descendants are serialized sorted by their total time in decreasing order.
+    The tree is walked iteratively, so its depth is not limited by the recursion limit.
 
     Args:
         slices (list of :py:class:`Slice`): global list of slices
@@ -89,17 +119,45 @@ def get_node_slice(slices, node, parent_slice, call_depth):
         parent_slice (:py:class:`Slice`, optional): link to a slice of the parent node
         call_depth (int): depth of the node in the hierarchy
     """
-    s = Slice(len(slices), node.name, parent_slice, call_depth, node.stats.count,
-              node.stats.total, 0, node.stats.min, node.stats.max)
-    slices.append(s)
+    stack = [(node, parent_slice, call_depth)]
 
-    child_total = 0
+    while stack:
+        node, parent_slice, call_depth = stack.pop()
+        s = Slice(len(slices), node.name, parent_slice, call_depth, node.stats.count,
+                  node.stats.total, 0, node.stats.min, node.stats.max,
+                  node.consumer_stats.total if node.consumer_stats else 0,
+                  items=node.items, bytes=node.bytes,
+                  io_time=node.io_time, io_bytes=node.io_bytes)
+        slices.append(s)
 
-    for ch in sorted(node.children.values(), key=lambda n: -n.stats.total):
-        get_node_slice(slices, ch, s, call_depth + 1)
-        child_total += ch.stats.total
+        children = sorted(node.children.values(), key=lambda n: -n.stats.total)
+        child_total = sum(ch.stats.total for ch in children)
+        s.total_inner_time = max(s.total_time - child_total, 0)
 
-    s.total_inner_time = max(s.total_time - child_total, 0)
+        if node.tag_stats:
+            for tags, st in sorted(node.tag_stats.items(), key=lambda t: -t[1].total):
+                s.tag_slices.append(Slice(s.id, s.name, parent_slice, call_depth, st.count,
+                                          st.total, st.total, st.min, st.max, tags=tags))
+
+        stack.extend((ch, s, call_depth + 1) for ch in reversed(children))
+
+
+def iter_report_slices(slices, columns):
+    """Iterate over slices to be reported.
+
+    If ``columns`` include :py:func:`region_profiler.reporter_columns.tags`,
+    each region slice is followed by its per-tag-value slices.
+
+    Args:
+        slices (list of :py:class:`Slice`): profiler slice
+        columns (list of report columns): reported columns
+
+    Returns:
+        Iterable of :py:class:`Slice`: slices in the report order
+    """
+    if cols.tags not in columns:
+        return iter(slices)
+    return (t for s in slices for t in [s] + s.tag_slices)
 
 
 def get_profiler_slice(rp):
@@ -118,6 +176,23 @@ def get_profiler_slice(rp):
     return slices
 
 
+def quote_csv_field(value):
+    """Quote a CSV field, if it contains a separator, a quote or a line break.
+
+    Fields are quoted as in :py:mod:`csv`, so a report with ``", "`` separator
+    is read back with ``csv.reader(stream, skipinitialspace=True)``.
+
+    Args:
+        value (str): field value
+
+    Returns:
+        str: field, safe to be joined with ``", "``
+    """
+    if any(c in value for c in ',"\r\n') or value[:1].isspace():
+        return '"{}"'.format(value.replace('"', '""'))
+    return value
+
+
 DEFAULT_CONSOLE_COLUMNS = (cols.indented_name, cols.total,
                            cols.percents_of_total, cols.count,
                            cols.min, cols.average, cols.max)
@@ -155,6 +230,9 @@ class ConsoleReporter:
         . . . iter                  400.9 ms      43.36%      4  100.2 ms  100.2 ms  100.2 ms
         . . init                    12.85 ms       1.39%      2  5.776 ms  6.426 ms  7.076 ms
         . . bar() <example2.py:40>  7.866 ms       0.85%      1  7.866 ms  7.866 ms  7.866 ms
+
+    If the profiler measures its overhead, a summary is printed after the table,
+    see :py:meth:`region_profiler.overhead.OverheadStats.summary`.
     """
 
     def __init__(self, columns=DEFAULT_CONSOLE_COLUMNS, stream=sys.stderr):
@@ -178,7 +256,7 @@ class ConsoleReporter:
         rows = [[col.column_print_name for col in self.columns]]
         col_width = [len(n) for n in rows[0]]
 
-        for s in slices:
+        for s in iter_report_slices(slices, self.columns):
             row = [col(s, slices) for col in self.columns]
             rows.append(row)
             for i, c in enumerate(row):
@@ -189,6 +267,10 @@ class ConsoleReporter:
         sys.stdout.flush()
         for r in rows:
             print(format.format(*r), file=self.stream)
+        if rp.overhead is not None:
+            print(file=self.stream)
+            for line in rp.overhead.summary(slices[0].total_time):
+                print(line, file=self.stream)
 
 
 DEFAULT_CSV_COLUMNS = (cols.node_id, cols.name, cols.parent_id, cols.parent_name,
@@ -206,7 +288,8 @@ class CsvReporter:
     total_inner_us, count, min_us, average_us, max_us).
 
     Nodes are printed in a depth-first order with siblings processed
-    sorted by the total time descending.
+    sorted by the total time descending. Fields, that contain commas
+    or quotes (e.g. region names), are quoted.
 
     By default, these column are reported:
 
@@ -231,6 +314,13 @@ class CsvReporter:
         4, init, 1, bar(), 35456, 35456, 2, 16589, 17728, 18867
         5, bar() <example2.py:42>, 1, bar(), 8935, 8935, 1, 8935, 8935, 8935
 
+    If ``columns`` include ``tags`` column, each tagged region row is followed
+    by rows with stats per tag value (see :py:func:`iter_report_slices`)::
+
+        id, name, parent_id, tags, total_us, count
+        3, infer, 0, , 300000, 3
+        3, infer, 0, bs=32, 200000, 2
+        3, infer, 0, bs=8, 100000, 1
     """
 
     def __init__(self, columns=DEFAULT_CSV_COLUMNS, stream=sys.stderr):
@@ -253,12 +343,58 @@ class CsvReporter:
 
         rows = [[col.column_name for col in self.columns]]
 
-        for s in slices:
+        for s in iter_report_slices(slices, self.columns):
             row = [col(s, slices) for col in self.columns]
             rows.append(row)
 
         for r in rows:
-            print(', '.join(r), file=self.stream)
+            print(', '.join(quote_csv_field(v) for v in r), file=self.stream)
+
+
+class FlamegraphReporter:
+    """Print profiler state in a collapsed stack format.
+
+    Each line contains a region path with names separated by ``;``
+    and the time spent inside this region excluding its child regions
+    in microseconds. Regions with zero inner time are omitted.
+    The output can be rendered with
+    `FlameGraph <https://github.com/brendangregg/FlameGraph>`_ scripts
+    or loaded into flame graph viewers, that accept collapsed stacks.
+
+    Example output::
+
+        <main> 443352
+        <main>;bar() 68080
+        <main>;bar();loop 9517
+        <main>;bar();loop;iter 400877
+        <main>;bar();init 35456
+        <main>;bar();bar() <example2.py:42> 8935
+    """
+
+    def __init__(self, stream=sys.stderr):
+        """Initialize the reporter.
+
+        Args:
+            stream (file-like object): stream for output
+        """
+        self.stream = stream
+
+    def dump_profiler(self, rp):
+        """Dump the profiler state.
+
+        Args:
+            rp(:py:class:`region_profiler.profiler.RegionProfiler`): region profiler
+        """
+        slices = get_profiler_slice(rp)
+        stacks = []
+
+        for s in slices:
+            frame = s.name.replace(';', ':')
+            stack = frame if s.parent is None else stacks[s.parent.id] + ';' + frame
+            stacks.append(stack)
+            weight = int(s.total_inner_time * 1000000)
+            if weight > 0:
+                print(stack, weight, file=self.stream)
 
 
 class SilentReporter:
@@ -287,7 +423,7 @@ class SilentReporter:
 
         rows = [[col.column_name for col in self.columns]]
 
-        for s in slices:
+        for s in iter_report_slices(slices, self.columns):
             row = [col(s, slices) for col in self.columns]
             rows.append(row)
 
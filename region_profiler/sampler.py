@@ -0,0 +1,136 @@
+import os
+import sys
+import threading
+from collections import Counter
+
+from region_profiler.listener import RegionProfilerListener
+
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _is_internal_frame(frame):
+    """Check if a frame belongs to region_profiler or :py:mod:`contextlib` machinery.
+    """
+    filename = frame.f_code.co_filename
+    return (os.path.dirname(os.path.abspath(filename)) == _PACKAGE_DIR or
+            filename.endswith('contextlib.py'))
+
+
+class StackSampler(RegionProfilerListener):
+    """This listener runs a background thread, that periodically
+    samples the stack of the profiled thread.
+
+    Each sample is attributed to the region, that is active at the moment,
+    and to the innermost function outside of region_profiler.
+    Thus, it shows which functions are hot inside each region
+    without marking them explicitly. Region timing stays exact,
+    while the sampler costs nothing on region events.
+
+    On profiler finalization top functions per region are printed::
+
+        Stack samples (interval 1.000 ms):
+        <main> > train: 1204 samples
+            62.3%  forward (model.py:42)
+            20.1%  loss (model.py:80)
+
+    Samples are available as :py:attr:`samples`.
+    """
+
+    subscribed_events = ()
+
+    def __init__(self, interval=0.001, top=5, stream=sys.stderr):
+        """Construct StackSampler.
+
+        The sampling thread is started, when the listener is registered
+        in a profiler, and stopped on profiler finalization.
+
+        Args:
+            interval (float): sampling interval in seconds
+            top (int): number of functions per region in the report
+            stream (file-like object): stream for the report output. If None, nothing is printed
+        """
+        self.interval = interval
+        self.top = top
+        self.stream = stream
+        self.profiler = None
+        self.samples = {}
+        self.sample_count = 0
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def region_entered(self, profiler, region):
+        if self.profiler is None:
+            self.profiler = profiler
+            self._thread = threading.Thread(target=self._run, name='region_profiler.StackSampler',
+                                            daemon=True)
+            self._thread.start()
+
+    def finalize(self):
+        self.stop()
+        if self.stream is not None:
+            self.dump(self.stream)
+
+    def stop(self):
+        """Stop the sampling thread.
+        """
+        self._stop_event.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def sample(self):
+        """Take a sample of the profiled thread stack.
+        """
+        frame = sys._current_frames().get(self.profiler.thread_id)
+        if frame is None:
+            return
+        node = self.profiler.node_stack[-1]
+        while frame is not None and _is_internal_frame(frame):
+            frame = frame.f_back
+        if frame is None:
+            return
+        code = frame.f_code
+        key = (code.co_name, code.co_filename, code.co_firstlineno)
+        try:
+            counter = self.samples[node]
+        except KeyError:
+            counter = self.samples[node] = Counter()
+        counter[key] += 1
+        self.sample_count += 1
+
+    def hot_functions(self, node, top=None):
+        """Return the most sampled functions inside a region.
+
+        Args:
+            node (:py:class:`region_profiler.node.RegionNode`): region node
+            top (int, optional): number of functions. Default: all
+
+        Returns:
+            list of ((str, str, int), int): ((function name, file name, first line), sample count)
+            pairs, sorted by sample count in decreasing order
+        """
+        counter = self.samples.get(node)
+        return counter.most_common(top) if counter else []
+
+    def dump(self, stream):
+        """Print top functions per region.
+
+        Args:
+            stream (file-like object): output stream
+        """
+        print('Stack samples (interval {:.3f} ms):'.format(self.interval * 1000), file=stream)
+        stack = [((self.profiler.root.name,), self.profiler.root)] if self.profiler else []
+        while stack:
+            path, node = stack.pop()
+            counter = self.samples.get(node)
+            if counter:
+                total = sum(counter.values())
+                print('{}: {} samples'.format(' > '.join(path), total), file=stream)
+                for (name, filename, line), count in counter.most_common(self.top):
+                    print('    {:5.1f}%  {} ({}:{})'.format(count / total * 100, name,
+                                                            os.path.basename(filename), line),
+                          file=stream)
+            stack.extend((path + (ch.name,), ch) for ch in reversed(list(node.children.values())))
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            self.sample()
@@ -0,0 +1,318 @@
+"""Export live region stats through shared memory.
+
+:py:class:`ShmExporter` mirrors per-node stats of a running profiler
+into a memory-mapped file under ``/dev/shm``, so another process can read them
+at any moment with :py:func:`attach` without any cooperation
+from the profiled process::
+
+    rp.install(shm_export=True)
+
+    # in another process
+    snapshot = region_profiler.attach(pid)
+    for s in snapshot.slices():
+        print(s.name, s.count, s.total_time)
+
+The file is a fixed-layout table of native 8-byte words.
+The header contains (in this order) magic bytes, layout version, table capacity,
+record size in words, number of used records, a sequence counter, writer pid
+and start time (seconds since the epoch). Each record contains parent record index
+(-1 for the root), count, total, min, max and last duration,
+a histogram of durations (see :py:func:`histogram_bucket`) and a NUL-padded
+UTF-8 name, truncated to :py:data:`NAME_SIZE` bytes.
+
+The writer updates a record only if the region stats changed on exit,
+so the hot path cost is a few stores per exit.
+The sequence counter works as a seqlock: the writer makes it odd before
+an update and even after it, and the reader retries a copy, that overlapped
+an update. Measurements, recorded without exit events
+(e.g. synthetic ``<lock wait>`` and ``<io>`` regions), are not exported.
+"""
+
+import math
+import mmap
+import os
+import struct
+import tempfile
+import time
+from collections import namedtuple
+
+from region_profiler.listener import RegionProfilerListener
+from region_profiler.reporters import Slice
+
+SHM_DIR = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+"""Default directory for exported tables.
+"""
+
+FILE_NAME = 'region_profiler.{pid}'
+"""Exported table file name template.
+"""
+
+MAGIC = b'RPSTATS\0'
+VERSION = 1
+
+DEFAULT_CAPACITY = 4096
+"""Default maximum number of exported nodes.
+"""
+
+HIST_BUCKETS = 32
+"""Number of duration histogram buckets.
+"""
+
+NAME_SIZE = 64
+"""Maximum exported node name size in bytes.
+"""
+
+# Header word offsets
+_MAGIC, _VERSION, _CAPACITY, _RECORD_WORDS, _NODE_COUNT, _SEQ, _PID, _START_TIME = range(8)
+HEADER_WORDS = 8
+
+# Record word offsets
+_PARENT, _COUNT, _TOTAL, _MIN, _MAX, _LAST = range(6)
+_HIST = 6
+_NAME = _HIST + HIST_BUCKETS
+RECORD_WORDS = _NAME + NAME_SIZE // 8
+
+_WORD = struct.Struct('@q')
+
+ShmRecord = namedtuple('ShmRecord', ['index', 'name', 'parent', 'count', 'total',
+                                     'min', 'max', 'last', 'histogram'])
+"""Exported stats of a single node.
+"""
+
+
+def histogram_bucket(duration):
+    """Get histogram bucket of a duration.
+
+    Bucket 0 contains durations below 1 us, bucket ``k`` contains
+    durations in ``[2 ** (k - 1), 2 ** k)`` us. The last bucket is unbounded.
+
+    Args:
+        duration (float): duration in seconds
+
+    Returns:
+        int: bucket index
+    """
+    if duration < 1e-6:
+        return 0
+    return min(math.frexp(duration * 1e6)[1], HIST_BUCKETS - 1)
+
+
+def histogram_percentile(histogram, q):
+    """Estimate a percentile of durations from a histogram.
+
+    Args:
+        histogram (sequence of int): bucket counts, see :py:func:`histogram_bucket`
+        q (float): percentile as a fraction, e.g. 0.95
+
+    Returns:
+        float: upper bound of the bucket, that contains the percentile (in seconds),
+        None if the histogram is empty
+    """
+    rank = q * sum(histogram)
+    cumulative = 0
+    for k, n in enumerate(histogram):
+        cumulative += n
+        if n and cumulative >= rank:
+            return 2 ** k * 1e-6
+    return None
+
+
+def table_path(pid, directory=None):
+    """Get path of the table, exported by a process.
+
+    Args:
+        pid (int): process id
+        directory (str, optional): table directory. Default: :py:data:`SHM_DIR`
+    """
+    return os.path.join(directory or SHM_DIR, FILE_NAME.format(pid=pid))
+
+
+class ShmExporter(RegionProfilerListener):
+    """Listener, that mirrors region stats into a shared memory table.
+
+    See module description for the table layout.
+    Nodes, that do not fit in the table, are not exported.
+    """
+
+    subscribed_events = ('region_exited',)
+
+    def __init__(self, path=None, capacity=DEFAULT_CAPACITY, unlink=True):
+        """
+        Args:
+            path (str, optional): table file path. Default: see :py:func:`table_path`
+            capacity (int): maximum number of exported nodes
+            unlink (bool): remove the file on finalization
+        """
+        self.path = path or table_path(os.getpid())
+        self.capacity = capacity
+        self.unlink = unlink
+        self.slots = {}
+        size = (HEADER_WORDS + capacity * RECORD_WORDS) * 8
+        with open(self.path, 'w+b') as f:
+            f.truncate(size)
+            self.mm = mmap.mmap(f.fileno(), size)
+        self.words = memoryview(self.mm).cast('q')
+        self.floats = memoryview(self.mm).cast('d')
+        self.mm[:8] = MAGIC
+        self.words[_VERSION] = VERSION
+        self.words[_CAPACITY] = capacity
+        self.words[_RECORD_WORDS] = RECORD_WORDS
+        self.words[_PID] = os.getpid()
+        self.floats[_START_TIME] = time.time()
+
+    def finalize(self):
+        self.words.release()
+        self.floats.release()
+        self.mm.close()
+        if self.unlink:
+            os.remove(self.path)
+
+    def region_exited(self, profiler, region):
+        try:
+            i = self.slots[region]
+        except KeyError:
+            i = self._allocate(region)
+        if i is None:
+            return
+        words = self.words
+        stats = region.stats
+        if words[i + _COUNT] == stats.count:
+            return  # canceled or recursive exit
+        floats = self.floats
+        last = region.timer.elapsed()
+        words[_SEQ] += 1
+        words[i + _COUNT] = stats.count
+        floats[i + _TOTAL] = stats.total
+        floats[i + _MIN] = stats.min
+        floats[i + _MAX] = stats.max
+        floats[i + _LAST] = last
+        words[i + _HIST + histogram_bucket(last)] += 1
+        words[_SEQ] += 1
+
+    def _allocate(self, node):
+        """Allocate records for a node and its ancestors, that have no records yet.
+
+        Returns:
+            int: word offset of the node record, None if the table is full
+        """
+        chain = []
+        while node is not None and node not in self.slots:
+            chain.append(node)
+            node = node.parent
+        i = self.slots[node] if node is not None else -1
+        for node in reversed(chain):
+            if i is not None:
+                parent = (i - HEADER_WORDS) // RECORD_WORDS if i >= 0 else -1
+                i = self._add_record(node.name, parent)
+            self.slots[node] = i
+        return i
+
+    def _add_record(self, name, parent):
+        n = self.words[_NODE_COUNT]
+        if n >= self.capacity:
+            return None
+        i = HEADER_WORDS + n * RECORD_WORDS
+        name = name.encode('utf-8')[:NAME_SIZE]
+        self.words[_SEQ] += 1
+        self.words[i + _PARENT] = parent
+        self.mm[(i + _NAME) * 8:(i + _NAME) * 8 + len(name)] = name
+        self.words[_NODE_COUNT] = n + 1
+        self.words[_SEQ] += 1
+        return i
+
+
+class ShmSnapshot:
+    """Consistent copy of a table, exported by :py:class:`ShmExporter`.
+
+    Attributes:
+        pid (int): profiled process id
+        start_time (float): profiling start time (seconds since the epoch)
+        time (float): snapshot time (seconds since the epoch)
+        records (list of :py:class:`ShmRecord`): exported nodes,
+            parents precede their children
+    """
+
+    def __init__(self, pid, start_time, time, records):
+        self.pid = pid
+        self.start_time = start_time
+        self.time = time
+        self.records = records
+
+    def slices(self):
+        """Convert the snapshot to report slices.
+
+        The root region total is the time since profiling start,
+        until the root stats are exported at finalization.
+
+        Returns:
+            list of :py:class:`region_profiler.reporters.Slice`: slices in the report order
+        """
+        children = [[] for _ in self.records]
+        roots = []
+        for r in self.records:
+            (children[r.parent] if r.parent >= 0 else roots).append(r)
+
+        slices = []
+        stack = [(r, None, 0) for r in reversed(roots)]
+        while stack:
+            r, parent_slice, depth = stack.pop()
+            count, total, min_time, max_time = r.count, r.total, r.min, r.max
+            if r.parent < 0 and count == 0:
+                count = 1
+                total = min_time = max_time = self.time - self.start_time
+            ch = sorted(children[r.index], key=lambda c: -c.total)
+            inner = max(total - sum(c.total for c in ch), 0)
+            s = Slice(len(slices), r.name, parent_slice, depth, count, total, inner,
+                      min_time if count else 0, max_time)
+            slices.append(s)
+            stack.extend((c, s, depth + 1) for c in reversed(ch))
+        return slices
+
+
+def _parse(data, taken_at):
+    if data[:8] != MAGIC:
+        raise ValueError('not a region_profiler stats table')
+    header = struct.unpack_from('@{}q'.format(HEADER_WORDS), data)
+    if header[_VERSION] != VERSION or header[_RECORD_WORDS] != RECORD_WORDS:
+        raise ValueError('unsupported stats table version {}'.format(header[_VERSION]))
+    start_time = struct.unpack_from('@d', data, _START_TIME * 8)[0]
+    fmt = struct.Struct('@2q4d{}q{}s'.format(HIST_BUCKETS, NAME_SIZE))
+    records = []
+    for n in range(header[_NODE_COUNT]):
+        v = fmt.unpack_from(data, (HEADER_WORDS + n * RECORD_WORDS) * 8)
+        hist = v[_HIST:_NAME]
+        name = v[_NAME].rstrip(b'\0').decode('utf-8', 'ignore')
+        records.append(ShmRecord(n, name, v[_PARENT], v[_COUNT], v[_TOTAL],
+                                 v[_MIN], v[_MAX], v[_LAST], hist))
+    return ShmSnapshot(header[_PID], start_time, taken_at, records)
+
+
+def attach(target, directory=None, retries=1000):
+    """Read live region stats of a process, exported by :py:class:`ShmExporter`.
+
+    Args:
+        target (int or str): process id or table file path
+        directory (str, optional): table directory, if ``target`` is a pid.
+            Default: :py:data:`SHM_DIR`
+        retries (int): maximum number of attempts to copy the table
+            while it is not being updated
+
+    Returns:
+        :py:class:`ShmSnapshot`: snapshot of the stats
+    """
+    if isinstance(target, int) or str(target).isdigit():
+        path = table_path(int(target), directory)
+    else:
+        path = target
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        seq_offset = _SEQ * 8
+        for _ in range(retries):
+            seq = _WORD.unpack_from(mm, seq_offset)[0]
+            if seq % 2:
+                time.sleep(0)
+                continue
+            taken_at = time.time()
+            data = mm[:]
+            if _WORD.unpack_from(mm, seq_offset)[0] == seq:
+                return _parse(data, taken_at)
+    raise RuntimeError('could not read a consistent snapshot of {}'.format(path))
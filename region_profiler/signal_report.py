@@ -0,0 +1,137 @@
+"""Write a live report on a signal.
+
+When a long-running process is slow right now, waiting for the report
+at exit is not an option. :py:func:`register_report_signal` installs
+a signal handler, that
+
+- writes the current region tree through a copy of the reporter
+  to a new timestamped file
+- flushes buffered listener output, e.g. pending Chrome Trace events
+  (see :py:meth:`region_profiler.listener.RegionProfilerListener.flush`)
+
+Use it with :py:func:`region_profiler.install`::
+
+    rp.install(report_signal=signal.SIGUSR1)
+
+and trigger a report with ``kill -USR1 <pid>``.
+
+Signal handlers are executed in the main thread between bytecode instructions,
+so the region tree does not change while the report is generated.
+Regions may be open at that moment: the root region reports its time so far,
+other regions report their completed calls only.
+"""
+
+import copy
+import os
+import signal
+import sys
+import time
+import warnings
+
+from region_profiler import global_instance
+
+REPORT_FILE = 'region_profiler.{pid}.{timestamp}.txt'
+"""Default report file name template.
+"""
+
+_originals = {}
+"""Replaced signal handlers, saved for :py:func:`unregister_report_signal`.
+"""
+
+
+def report_filename(template):
+    """Format a report file name.
+
+    Args:
+        template (str): file name template with ``{pid}``
+            and ``{timestamp}`` fields
+
+    Returns:
+        str: file name
+    """
+    now = time.time()
+    timestamp = '{}.{:03d}'.format(time.strftime('%Y%m%d-%H%M%S', time.localtime(now)),
+                                   int(now * 1000) % 1000)
+    return template.format(pid=os.getpid(), timestamp=timestamp)
+
+
+def dump_report(rp, reporter, filename):
+    """Write a report of the current profiler state to a file
+    and flush profiler listeners.
+
+    Reporters with ``stream`` (or ``filename``) attribute are copied
+    with the stream replaced by the file (the file name replaced),
+    so the original reporter is left intact. Other reporters
+    write to their own destination, and ``filename`` is not created.
+
+    Args:
+        rp (:py:class:`region_profiler.profiler.RegionProfiler`): profiler
+        reporter: reporter, e.g. :py:class:`region_profiler.reporters.ConsoleReporter`
+        filename (str): output file name
+
+    Returns:
+        bool: True if the report was written to ``filename``
+    """
+    written = True
+    if hasattr(reporter, 'stream'):
+        with open(filename, 'w') as f:
+            reporter = copy.copy(reporter)
+            reporter.stream = f
+            reporter.dump_profiler(rp)
+    elif hasattr(reporter, 'filename'):
+        reporter = copy.copy(reporter)
+        reporter.filename = filename
+        reporter.dump_profiler(rp)
+    else:
+        reporter.dump_profiler(rp)
+        written = False
+    rp.flush()
+    return written
+
+
+def register_report_signal(signum=signal.SIGUSR1, reporter=None, filename=REPORT_FILE,
+                           get_profiler=None):
+    """Write a live report on each receipt of a signal.
+
+    Must be called from the main thread.
+
+    Args:
+        signum (int): signal number. Default: ``SIGUSR1``
+        reporter (optional): reporter, used for the live report.
+            Default: :py:class:`region_profiler.reporters.ConsoleReporter`
+        filename (str): report file name template with ``{pid}``
+            and ``{timestamp}`` fields
+        get_profiler (Callable, optional): returns
+            :py:class:`region_profiler.profiler.RegionProfiler` to be used.
+            Default: the global instance
+    """
+    if reporter is None:
+        from region_profiler.reporters import ConsoleReporter
+        reporter = ConsoleReporter()
+    if get_profiler is None:
+        get_profiler = lambda: global_instance._profiler
+
+    def handler(signum, frame):
+        rp = get_profiler()
+        if rp is None:
+            return
+        path = report_filename(filename)
+        try:
+            written = dump_report(rp, reporter, path)
+        except Exception as e:
+            # E.g. a reentrant write, if the signal interrupted the same stream
+            warnings.warn('RegionProfiler: live report failed: {!r}'.format(e))
+        else:
+            if written:
+                print('RegionProfiler: live report is saved in', path, file=sys.stderr)
+
+    previous = signal.signal(signum, handler)
+    _originals.setdefault(signum, previous)
+
+
+def unregister_report_signal():
+    """Restore signal handlers, replaced by :py:func:`register_report_signal`.
+    """
+    for signum, handler in _originals.items():
+        signal.signal(signum, handler)
+    _originals.clear()
@@ -0,0 +1,168 @@
+import json
+import os
+import sys
+import threading
+import warnings
+
+from region_profiler.listener import RegionProfilerListener
+from region_profiler.reporters import get_profiler_slice
+
+MAX_EVENTS = 1000000
+"""Default limit of buffered timeline events (about 100 MB).
+"""
+
+
+class SpeedscopeListener(RegionProfilerListener):
+    """This listener produces a profile in `speedscope <https://www.speedscope.app>`_ format.
+
+    The profile file contains:
+
+    - a "sampled" profile, built from the region tree.
+      Each region is represented by a stack of the region path
+      weighted by the time spent inside the region excluding its child regions.
+    - if ``evented`` is enabled, an "evented" profile per thread with
+      a timeline of region enter and exit events.
+
+    Region names are stored once in the shared frame table,
+    so the resulting file is much smaller than a Chrome Trace log.
+    The file is written on profiler finalization.
+
+    The sampled profile costs nothing until finalization. The timeline, however,
+    is buffered in memory until the file is written: each region enter and exit
+    event takes about 100 bytes. Once ``max_events`` are buffered,
+    the timeline is truncated (regions, that are still open, are closed
+    at the last recorded event), so long-running jobs don't grow without bound.
+    """
+
+    def __init__(self, filename, evented=False, max_events=MAX_EVENTS):
+        """Construct SpeedscopeListener.
+
+        Args:
+            filename: output .json file
+            evented (bool): record region timeline in addition to the aggregated profile
+            max_events (int): limit of buffered timeline events
+        """
+        self.filename = filename
+        self.evented = evented
+        self.max_events = max_events
+        if not evented:
+            self.subscribed_events = ()
+        self.profiler = None
+        self.frames = {}
+        self.frame_names = []
+        self.events = {}
+        self.event_count = 0
+        self.last_canceled_node = None
+
+    def finalize(self):
+        profiles = [self._sampled_profile()] if self.profiler else []
+        for tid, events in sorted(self.events.items()):
+            if events:
+                profiles.append(self._evented_profile(tid, events))
+
+        with open(self.filename, 'w') as f:
+            json.dump({'$schema': 'https://www.speedscope.app/file-format-schema.json',
+                       'shared': {'frames': [{'name': n} for n in self.frame_names]},
+                       'profiles': profiles,
+                       'name': os.path.basename(sys.argv[0]),
+                       'activeProfileIndex': 0,
+                       'exporter': 'region_profiler'}, f)
+        print('RegionProfiler: speedscope profile is saved in', self.filename, file=sys.stderr)
+
+    def region_entered(self, profiler, region):
+        if self.profiler is None:
+            self.profiler = profiler
+        self.last_canceled_node = None
+        if self.evented and self._reserve_event():
+            self._thread_events().append(('O', self._frame(region.name), region.timer.last_event_time))
+
+    def region_exited(self, profiler, region):
+        if not self.evented:
+            return
+        events = self._thread_events()
+        frame = self._frame(region.name)
+        if self.last_canceled_node is region:
+            self.last_canceled_node = None
+            # Drop canceled region, unless it has nested events
+            if events and events[-1][0] == 'O' and events[-1][1] == frame:
+                events.pop()
+                self.event_count -= 1
+                return
+        if self._reserve_event():
+            events.append(('C', frame, region.timer.last_event_time))
+
+    def region_canceled(self, profiler, region):
+        self.last_canceled_node = region
+
+    def _reserve_event(self):
+        """Count a new timeline event.
+
+        Returns:
+            bool: False if the event buffer is full
+        """
+        if self.event_count >= self.max_events:
+            if self.evented:
+                self.evented = False
+                warnings.warn('RegionProfiler: speedscope timeline is truncated '
+                              'after {} events'.format(self.max_events))
+            return False
+        self.event_count += 1
+        return True
+
+    def _thread_events(self):
+        tid = threading.get_ident()
+        try:
+            return self.events[tid]
+        except KeyError:
+            events = self.events[tid] = []
+            return events
+
+    def _frame(self, name):
+        try:
+            return self.frames[name]
+        except KeyError:
+            idx = self.frames[name] = len(self.frame_names)
+            self.frame_names.append(name)
+            return idx
+
+    def _sampled_profile(self):
+        slices = get_profiler_slice(self.profiler)
+        stacks = []
+        samples = []
+        weights = []
+        for s in slices:
+            stack = [self._frame(s.name)]
+            if s.parent is not None:
+                stack = stacks[s.parent.id] + stack
+            stacks.append(stack)
+            weight = int(s.total_inner_time * 1000000)
+            if weight > 0:
+                samples.append(stack)
+                weights.append(weight)
+        return {'type': 'sampled',
+                'name': 'Region tree',
+                'unit': 'microseconds',
+                'startValue': 0,
+                'endValue': sum(weights),
+                'samples': samples,
+                'weights': weights}
+
+    def _evented_profile(self, tid, events):
+        start = self.profiler.root.timer.begin_ts()
+        # Close regions, that are still open (e.g. if finalized prematurely)
+        open_frames = []
+        for e in events:
+            if e[0] == 'O':
+                open_frames.append(e[1])
+            else:
+                open_frames.pop()
+        end = events[-1][2]
+        events = events + [('C', f, end) for f in reversed(open_frames)]
+
+        return {'type': 'evented',
+                'name': 'Thread {}'.format(tid),
+                'unit': 'microseconds',
+                'startValue': 0,
+                'endValue': int((end - start) * 1000000),
+                'events': [{'type': t, 'frame': f, 'at': int((at - start) * 1000000)}
+                           for t, f, at in events]}
@@ -0,0 +1,237 @@
+"""Detect input pipeline stalls from iterator proxy timings.
+
+:py:meth:`region_profiler.profiler.RegionProfiler.iter_proxy` and
+:py:meth:`region_profiler.profiler.RegionProfiler.aiter_proxy` record
+fetch latency (time spent waiting for the next item) and consumer time
+(time spent in the loop body) of the last iterations in
+:py:class:`IterHistory`. :py:func:`analyze_stalls` turns these series into
+a :py:class:`StallReport`:
+
+- stall ratio -- fraction of the loop time spent waiting for data
+- stall pattern, e.g. "first 5 items immediate, then 3 blocking",
+  typical for loaders, that prefetch a fixed number of items
+- prefetch depth, that would be needed to hide fetch latency
+  behind the loop body
+"""
+
+import math
+import sys
+from collections import Counter, deque
+
+from region_profiler.utils import pretty_print_time
+
+ITER_HISTORY_SIZE = 1000
+"""Default number of iterations, recorded by iterator proxies.
+"""
+
+MIN_IMMEDIATE_THRESHOLD = 50e-6
+"""Fetches faster than this (in seconds) are always considered immediate.
+"""
+
+
+class IterHistory:
+    """Fetch latency and consumer time of the last iterations of an iterator proxy.
+
+    An iteration is recorded, when the loop body requests the next item,
+    so both times are stored together and stay aligned after old iterations
+    are dropped.
+
+    Attributes:
+        iterations (deque of tuple): ``(fetch, consumer)`` pairs -- time spent
+            waiting for an item and time spent in the loop body after it
+    """
+
+    __slots__ = ('iterations',)
+
+    def __init__(self, maxlen=ITER_HISTORY_SIZE):
+        """
+        Args:
+            maxlen (int): number of iterations to keep
+        """
+        self.iterations = deque(maxlen=maxlen)
+
+    @property
+    def fetch(self):
+        """list of float: time spent waiting for each item.
+        """
+        return [f for f, _ in self.iterations]
+
+    @property
+    def consumer(self):
+        """list of float: time spent in the loop body after each item.
+        """
+        return [c for _, c in self.iterations]
+
+
+class StallReport:
+    """Result of :py:func:`analyze_stalls`.
+
+    Attributes:
+        iterations (int): number of analyzed iterations
+        fetch_time (float): total time spent waiting for items
+        consumer_time (float): total time spent in the loop body
+        stall_ratio (float): ``fetch_time / (fetch_time + consumer_time)``
+        immediate_threshold (float): fetches faster than this are considered immediate
+        blocking_count (int): number of blocking fetches
+        pattern (tuple of int, optional): ``(k, m)`` if the loop repeatedly receives
+            ``k`` items immediately and then blocks on ``m`` items
+        prefetch_depth (int): number of items, that should be prefetched
+            to hide the fetch latency. 0 if the loop does not stall
+    """
+
+    def __init__(self, iterations, fetch_time, consumer_time, immediate_threshold,
+                 blocking_count, pattern, prefetch_depth):
+        self.iterations = iterations
+        self.fetch_time = fetch_time
+        self.consumer_time = consumer_time
+        total = fetch_time + consumer_time
+        self.stall_ratio = fetch_time / total if total else 0.
+        self.immediate_threshold = immediate_threshold
+        self.blocking_count = blocking_count
+        self.pattern = pattern
+        self.prefetch_depth = prefetch_depth
+
+    @property
+    def description(self):
+        """Human-readable description of the stall pattern.
+        """
+        if not self.blocking_count:
+            return 'no stalls'
+        if self.blocking_count == self.iterations:
+            return 'all items blocking'
+        if self.pattern:
+            return 'first {} items immediate, then {} blocking'.format(*self.pattern)
+        return '{} of {} items blocking'.format(self.blocking_count, self.iterations)
+
+    def __str__(self):
+        return ('{} iterations, stall ratio {:.1f}% (fetch {}, consumer {}), {}, '
+                'prefetch depth needed: {}'.format(
+                    self.iterations, self.stall_ratio * 100,
+                    pretty_print_time(self.fetch_time), pretty_print_time(self.consumer_time),
+                    self.description, self.prefetch_depth))
+
+    def __repr__(self):
+        return ('StallReport(iterations={}, stall_ratio={}, pattern={}, prefetch_depth={})'
+                .format(self.iterations, self.stall_ratio, self.pattern, self.prefetch_depth))
+
+
+def _median(values):
+    values = sorted(values)
+    n = len(values)
+    if not n:
+        return 0
+    return values[n // 2] if n % 2 else (values[n // 2 - 1] + values[n // 2]) / 2
+
+
+def _find_pattern(blocking):
+    """Find the most common (immediate run, blocking run) pair,
+    if it covers most of the iterations.
+    """
+    runs = []
+    i = 0
+    n = len(blocking)
+    while i < n:
+        k = 0
+        while i < n and not blocking[i]:
+            k += 1
+            i += 1
+        m = 0
+        while i < n and blocking[i]:
+            m += 1
+            i += 1
+        if m:
+            runs.append((k, m))
+
+    if len(runs) < 2:
+        return None
+    (k, m), hits = Counter(runs).most_common(1)[0]
+    if k and hits >= 2 and hits * (k + m) >= 0.75 * n:
+        return k, m
+    return None
+
+
+def analyze_stalls(history, immediate_threshold=None, skip_first=1):
+    """Analyze iterator proxy history.
+
+    A fetch is considered blocking, if it takes longer than
+    ``immediate_threshold``. Prefetch depth is estimated by Little's law:
+    to hide latency ``L`` of a blocking fetch while the loop body
+    takes ``C`` per item, ``ceil(L / C)`` more items must be in flight
+    in addition to the ``k`` items, that are currently received immediately.
+
+    Args:
+        history (:py:class:`IterHistory`): recorded iterations
+        immediate_threshold (float, optional): blocking fetch threshold in seconds.
+            Default: 10% of the median consumer time, but at least
+            :py:data:`MIN_IMMEDIATE_THRESHOLD`
+        skip_first (int): number of warm-up iterations excluded from the analysis
+
+    Returns:
+        :py:class:`StallReport`: analysis result, None if there are no iterations to analyze
+    """
+    fetch = history.fetch[skip_first:]
+    consumer = history.consumer[skip_first:]
+    if not fetch:
+        return None
+
+    mean_consumer = sum(consumer) / len(consumer) if consumer else 0
+    if immediate_threshold is None:
+        immediate_threshold = max(0.1 * _median(consumer), MIN_IMMEDIATE_THRESHOLD)
+
+    blocking = [f > immediate_threshold for f in fetch]
+    blocking_count = sum(blocking)
+    pattern = _find_pattern(blocking)
+
+    prefetch_depth = 0
+    if blocking_count:
+        blocked_time = sum(f for f, b in zip(fetch, blocking) if b)
+        if pattern:
+            k, m = pattern
+            cycles = max(blocking_count / m, 1)
+            stall_per_cycle = blocked_time / cycles
+        else:
+            k = 0
+            stall_per_cycle = blocked_time / blocking_count
+        if mean_consumer > 0:
+            # Tolerate rounding errors, so that exact multiples are not rounded up
+            prefetch_depth = k + int(math.ceil(stall_per_cycle / mean_consumer - 1e-9))
+        else:
+            prefetch_depth = k + 1
+
+    return StallReport(len(fetch), sum(fetch), sum(consumer), immediate_threshold,
+                       blocking_count, pattern, prefetch_depth)
+
+
+class StallReporter:
+    """Print stall analysis for all iterator proxy regions.
+
+    Example output::
+
+        <main> > train > fetch_batch: 99 iterations, stall ratio 22.1% (fetch 1.504 s,
+            consumer 5.301 s), first 5 items immediate, then 3 blocking, prefetch depth needed: 8
+    """
+
+    def __init__(self, stream=sys.stderr, immediate_threshold=None):
+        """Initialize the reporter.
+
+        Args:
+            stream (file-like object): stream for output
+            immediate_threshold (float, optional): see :py:func:`analyze_stalls`
+        """
+        self.stream = stream
+        self.immediate_threshold = immediate_threshold
+
+    def dump_profiler(self, rp):
+        """Dump stall analysis.
+
+        Args:
+            rp(:py:class:`region_profiler.profiler.RegionProfiler`): region profiler
+        """
+        stack = [((rp.root.name,), rp.root)]
+        while stack:
+            path, node = stack.pop()
+            if node.iter_history is not None:
+                report = analyze_stalls(node.iter_history, self.immediate_threshold)
+                if report is not None:
+                    print('{}: {}'.format(' > '.join(path), report), file=self.stream)
+            stack.extend((path + (ch.name,), ch) for ch in reversed(list(node.children.values())))
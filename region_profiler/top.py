@@ -0,0 +1,308 @@
+"""Live terminal viewer of region stats.
+
+Shows a refreshing table of regions of a process, that exports its stats
+through shared memory (see :py:mod:`region_profiler.shm`)::
+
+    python -m region_profiler.top <pid | table file> [--interval 1]
+
+Regions are sorted by their self time during the last refresh interval.
+Columns are computed from differences between consecutive snapshots:
+
+- ``calls/s`` -- region exits per second
+- ``self %`` and ``total %`` -- region self and total time as a share of the interval
+- ``avg``, ``p50``, ``p95``, ``p99`` -- average and percentiles of region durations.
+  Percentiles are upper bounds of log2 histogram buckets
+
+Regions, that were not exited during the interval, show their all-time average
+and percentiles. Keys:
+
+- ``Up``/``Down`` -- select a region
+- ``Space``/``Enter`` -- expand or collapse the selected region
+- ``t`` -- toggle tree and flat views
+- ``+``/``-`` -- change the refresh interval
+- ``q`` -- quit
+
+Use ``--once`` to print a single table, e.g. when there is no terminal.
+"""
+
+import argparse
+import sys
+import time
+
+from region_profiler.shm import attach, histogram_percentile
+from region_profiler.utils import pretty_print_time
+
+PERCENTILES = (0.5, 0.95, 0.99)
+
+COLUMNS = ('name', 'calls/s', 'self %', 'total %', 'avg', 'p50', 'p95', 'p99', 'count')
+
+
+class TopRow:
+    """Stats of a region during the last refresh interval.
+
+    Attributes:
+        index (int): record index in the snapshot
+        name (str): region name
+        depth (int): region depth in the tree
+        count (int): all-time number of region exits
+        rate (float): region exits per second
+        self_time (float): self time during the interval
+        total_time (float): total time during the interval
+        avg (float, optional): average duration
+        percentiles (list of float): duration percentiles, see :py:data:`PERCENTILES`
+        has_children (bool): True if the region has child regions
+        collapsed (bool): True if child regions are hidden
+    """
+
+    __slots__ = ('index', 'name', 'depth', 'count', 'rate', 'self_time', 'total_time',
+                 'avg', 'percentiles', 'has_children', 'collapsed')
+
+    def __init__(self, index, name, depth, count, rate, self_time, total_time,
+                 avg, percentiles, has_children, collapsed):
+        self.index = index
+        self.name = name
+        self.depth = depth
+        self.count = count
+        self.rate = rate
+        self.self_time = self_time
+        self.total_time = total_time
+        self.avg = avg
+        self.percentiles = percentiles
+        self.has_children = has_children
+        self.collapsed = collapsed
+
+
+def _totals(snapshot):
+    """Get total and self time of each record of a snapshot.
+    """
+    totals = [r.total for r in snapshot.records]
+    for r in snapshot.records:
+        if r.parent < 0 and r.count == 0:
+            totals[r.index] = snapshot.time - snapshot.start_time
+    self_times = list(totals)
+    for r in snapshot.records:
+        if r.parent >= 0:
+            self_times[r.parent] -= totals[r.index]
+    return totals, self_times
+
+
+class TopModel:
+    """Table model of the viewer.
+
+    The model is fed with consecutive snapshots and computes
+    per-interval stats of regions in :py:attr:`rows`.
+
+    Attributes:
+        tree (bool): if True, regions are shown as a tree,
+            with siblings sorted by self time. Otherwise, as a flat list
+        collapsed (set of int): indices of regions, which children are hidden
+        interval (float): time between the last two snapshots
+        rows (list of :py:class:`TopRow`): visible rows
+    """
+
+    def __init__(self, tree=True):
+        self.tree = tree
+        self.collapsed = set()
+        self.interval = 0
+        self.rows = []
+        self._snapshot = None
+        self._prev = None
+        self._stats = []
+
+    def update(self, snapshot):
+        """Compute stats since the previous snapshot.
+
+        The first snapshot is compared with the profiling start.
+
+        Args:
+            snapshot (:py:class:`region_profiler.shm.ShmSnapshot`): new snapshot
+        """
+        prev = self._snapshot
+        if prev is not None and prev.pid != snapshot.pid:
+            prev = None
+        self._prev, self._snapshot = prev, snapshot
+        self.interval = snapshot.time - (prev.time if prev else snapshot.start_time)
+
+        totals, self_times = _totals(snapshot)
+        prev_totals, prev_self_times = _totals(prev) if prev else ([], [])
+        self._stats = []
+        for r in snapshot.records:
+            old = prev.records[r.index] if prev and r.index < len(prev.records) else None
+            d_count = r.count - (old.count if old else 0)
+            d_total = totals[r.index] - (prev_totals[r.index] if old else 0)
+            d_self = self_times[r.index] - (prev_self_times[r.index] if old else 0)
+            histogram = r.histogram
+            if d_count:
+                avg = d_total / d_count
+                if old:
+                    histogram = [a - b for a, b in zip(r.histogram, old.histogram)]
+            else:
+                avg = r.total / r.count if r.count else None
+            self._stats.append((d_count, d_self, d_total, avg,
+                                [histogram_percentile(histogram, q) for q in PERCENTILES]))
+        self._build_rows()
+
+    def toggle(self, index):
+        """Expand or collapse a region.
+
+        Args:
+            index (int): record index
+        """
+        self.collapsed ^= {index}
+        self._build_rows()
+
+    def toggle_tree(self):
+        """Switch between tree and flat views.
+        """
+        self.tree = not self.tree
+        self._build_rows()
+
+    def _make_row(self, r, depth, has_children):
+        d_count, d_self, d_total, avg, percentiles = self._stats[r.index]
+        rate = d_count / self.interval if self.interval > 0 else 0
+        return TopRow(r.index, r.name, depth, r.count, rate, d_self, d_total, avg, percentiles,
+                      has_children, r.index in self.collapsed)
+
+    def _build_rows(self):
+        if self._snapshot is None:
+            return
+        records = self._snapshot.records
+        children = [[] for _ in records]
+        roots = []
+        for r in records:
+            (children[r.parent] if r.parent >= 0 else roots).append(r)
+
+        def by_self_time(r):
+            return -self._stats[r.index][1]
+
+        if not self.tree:
+            self.rows = [self._make_row(r, 0, False) for r in sorted(records, key=by_self_time)]
+            return
+        self.rows = []
+        stack = [(r, 0) for r in sorted(roots, key=by_self_time, reverse=True)]
+        while stack:
+            r, depth = stack.pop()
+            self.rows.append(self._make_row(r, depth, bool(children[r.index])))
+            if r.index not in self.collapsed:
+                stack.extend((c, depth + 1) for c in
+                             sorted(children[r.index], key=by_self_time, reverse=True))
+
+
+def _format_time(t):
+    return pretty_print_time(t) if t is not None else '-'
+
+
+def format_rows(model):
+    """Format the model as text table lines.
+
+    Args:
+        model (:py:class:`TopModel`): viewer model
+
+    Returns:
+        list of str: header line followed by a line per row
+    """
+    interval = model.interval
+    table = [list(COLUMNS)]
+    for row in model.rows:
+        marker = ('+ ' if row.collapsed else '- ') if row.has_children else '  '
+        table.append(['  ' * row.depth + marker + row.name,
+                      '{:.1f}'.format(row.rate),
+                      '{:.2f}%'.format(row.self_time / interval * 100 if interval > 0 else 0),
+                      '{:.2f}%'.format(row.total_time / interval * 100 if interval > 0 else 0),
+                      _format_time(row.avg)] +
+                     [_format_time(p) for p in row.percentiles] +
+                     [str(row.count)])
+    widths = [max(len(r[i]) for r in table) for i in range(len(COLUMNS))]
+    fmt = '  '.join('{:' + ('<' if i == 0 else '>') + str(w) + '}' for i, w in enumerate(widths))
+    return [fmt.format(*r) for r in table]
+
+
+def _run_curses(stdscr, target, interval):
+    import curses
+
+    curses.curs_set(0)
+    model = TopModel()
+    selected = 0
+    while True:
+        try:
+            snapshot = attach(target)
+        except FileNotFoundError:
+            return 'RegionProfiler: stats of {} are not available'.format(target)
+        model.update(snapshot)
+
+        deadline = time.time() + interval
+        while True:
+            selected = max(0, min(selected, len(model.rows) - 1))
+            height, width = stdscr.getmaxyx()
+            stdscr.erase()
+            stdscr.addnstr(0, 0, 'region_profiler top: pid {}, interval {:.1f} s'.
+                           format(snapshot.pid, interval), width - 1)
+            lines = format_rows(model)
+            stdscr.addnstr(2, 0, lines[0], width - 1, curses.A_BOLD)
+            first = max(0, selected - (height - 5))
+            for y, line in enumerate(lines[1 + first:height - 3 + first]):
+                attr = curses.A_REVERSE if y + first == selected else curses.A_NORMAL
+                stdscr.addnstr(3 + y, 0, line, width - 1, attr)
+            stdscr.refresh()
+
+            stdscr.timeout(max(int((deadline - time.time()) * 1000), 0))
+            key = stdscr.getch()
+            if key == -1:
+                break
+            if key in (ord('q'), 27):
+                return None
+            if key == curses.KEY_UP:
+                selected -= 1
+            elif key == curses.KEY_DOWN:
+                selected += 1
+            elif key in (ord(' '), ord('\n'), curses.KEY_ENTER) and model.rows:
+                model.toggle(model.rows[selected].index)
+            elif key == ord('t'):
+                model.toggle_tree()
+            elif key == ord('+'):
+                interval *= 2
+            elif key == ord('-'):
+                interval = max(interval / 2, 0.1)
+
+
+def main(argv=None):
+    """Run the viewer.
+
+    Args:
+        argv (list of str, optional): command line arguments
+
+    Returns:
+        int: exit code
+    """
+    parser = argparse.ArgumentParser(prog='python -m region_profiler.top',
+                                     description='Show live region stats of a process.')
+    parser.add_argument('target', help='pid of a process, profiled with shm_export=True, '
+                                       'or a stats table file')
+    parser.add_argument('--interval', type=float, default=1.0,
+                        help='refresh interval in seconds (default: 1)')
+    parser.add_argument('--once', action='store_true',
+                        help='print stats for a single interval and exit')
+    args = parser.parse_args(argv)
+
+    try:
+        if args.once:
+            model = TopModel()
+            model.update(attach(args.target))
+            time.sleep(args.interval)
+            model.update(attach(args.target))
+            for line in format_rows(model):
+                print(line)
+            return 0
+
+        import curses
+        error = curses.wrapper(_run_curses, args.target, args.interval)
+    except FileNotFoundError:
+        error = 'RegionProfiler: stats of {} are not available'.format(args.target)
+    if error:
+        print(error, file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,5 +1,5 @@
-import inspect
 import os
+import sys
 import time
 from collections import namedtuple
 
@@ -18,6 +18,8 @@ class SeqStats:
     statistics are calculated online.
     """
 
+    __slots__ = ('count', 'total', 'min', 'max')
+
     def __init__(self, count=0, total=0, min=0, max=0):
         self.count = count
         self.total = total
@@ -35,6 +37,23 @@ class SeqStats:
         self.max = x if self.count == 1 else max(self.max, x)
         self.min = x if self.count == 1 else min(self.min, x)
 
+    def merge(self, other):
+        """Update statistics with all values of another sequence.
+
+        Args:
+            other (:py:class:`SeqStats`): stats of another sequence
+        """
+        if not other.count:
+            return
+        if self.count:
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+        else:
+            self.min = other.min
+            self.max = other.max
+        self.count += other.count
+        self.total += other.total
+
     @property
     def avg(self):
         """Calculate sequence average.
@@ -75,6 +94,8 @@ class Timer:
     :py:meth:`current_elapsed` or :py:meth:`total_elapsed()`.
     """
 
+    __slots__ = ('clock', '_begin_ts', '_end_ts', '_running', 'last_event_time')
+
     def __init__(self, clock=default_clock):
         """
         Args:
@@ -158,6 +179,22 @@ class Timer:
             else (self.clock() - self._begin_ts)
 
 
+def format_tags(tags):
+    """Get region tags as a string.
+
+    Examples:
+
+        - {'bs': 32, 'model': 'resnet'} => 'bs=32;model=resnet'
+
+    Args:
+        tags (dict): tag names and values
+
+    Returns:
+        str: tags sorted by name in format ``name=value`` separated by ``;``
+    """
+    return ';'.join('{}={}'.format(k, tags[k]) for k in sorted(tags))
+
+
 CallerInfo = namedtuple('CallerInfo', ['file', 'line', 'name'])
 
 
@@ -178,8 +215,8 @@ def get_caller_info(stack_depth=1):
         CallerInfo:  information about the caller
 
     """
-    frame = inspect.stack()[stack_depth + 1]
-    info = CallerInfo(frame[1], frame[2], frame[3])
+    frame = sys._getframe(stack_depth + 1)
+    info = CallerInfo(frame.f_code.co_filename, frame.f_lineno, frame.f_code.co_name)
     del frame  # prevents cycle reference
     return info
 
@@ -208,8 +245,17 @@ class NullContext:
     """Empty context manager.
     """
 
+    __slots__ = ('enter_result',)
+
+    def __init__(self, enter_result=None):
+        """
+        Args:
+            enter_result: value returned on context entering
+        """
+        self.enter_result = enter_result
+
     def __enter__(self):
-        pass
+        return self.enter_result
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         pass
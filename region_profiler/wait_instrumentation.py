@@ -0,0 +1,224 @@
+"""Time waits on synchronization primitives.
+
+Time spent blocked on a lock or a queue is normally charged
+to the region, that happens to be active, with no hint of contention.
+:py:func:`instrument_waits` patches :py:mod:`threading` and :py:mod:`queue`,
+so that such waits are charged to a synthetic child of the current region:
+
+- ``<lock wait>`` -- :py:meth:`threading.Condition.wait` (and so
+  :py:meth:`threading.Event.wait`) and, if enabled, acquisition
+  of a :py:class:`threading.Lock` (or :py:class:`threading.RLock`)
+- ``<queue wait>`` -- :py:meth:`queue.Queue.get` and :py:meth:`queue.Queue.put`
+
+Only contended waits are timed: a lock acquisition (a queue operation)
+is first attempted without blocking, and only if it fails,
+the blocking call is timed. Uncontended operations cost
+a single extra method call. Waits are recorded only in the profiled thread,
+see :py:meth:`region_profiler.profiler.RegionProfiler.add_synthetic_child`.
+
+Conditions and queues are pure Python classes, so their methods are patched in place.
+Locks are implemented in C, and timing them requires replacing
+:py:func:`threading.Lock` and :py:func:`threading.RLock` factories
+with ones, that return a Python wrapper. This is opt-in
+(``instrument_waits(locks=True)``), since it affects the whole process:
+
+- every lock, created after :py:func:`instrument_waits` call by any module
+  (including :py:mod:`threading` and :py:mod:`queue` internals),
+  pays a Python-level call on each acquisition, even in threads, that are not profiled
+- the wrappers are not instances of the type of native locks,
+  so checks like ``isinstance(lock, type(threading.Lock()))`` fail
+- locks, created before the call (or while instrumentation was inactive),
+  are not timed
+"""
+
+import functools
+import queue
+import threading
+
+from region_profiler import global_instance
+
+LOCK_WAIT_REGION = '<lock wait>'
+"""Name of the synthetic region for lock waits.
+"""
+
+QUEUE_WAIT_REGION = '<queue wait>'
+"""Name of the synthetic region for queue waits.
+"""
+
+_originals = {}
+"""Patched objects, saved for :py:func:`uninstrument_waits`.
+"""
+
+
+class _WaitRecorder:
+    """Charge waits to the current region of the profiler.
+
+    Nested waits (e.g. lock acquisition inside :py:meth:`queue.Queue.get`)
+    are not recorded separately.
+    """
+
+    def __init__(self, get_profiler):
+        self.get_profiler = get_profiler
+        self.depth = 0
+
+    def begin(self):
+        """Start timing a wait.
+
+        Returns:
+            profiler and start timestamp, or None if the wait should not be recorded
+        """
+        rp = self.get_profiler()
+        if rp is None or rp.thread_id != threading.get_ident():
+            return None
+        self.depth += 1
+        if self.depth > 1:
+            return rp, None
+        return rp, rp.root.timer.clock()
+
+    def end(self, token, name):
+        """Stop timing a wait and record it.
+
+        Args:
+            token: value returned by :py:meth:`begin`
+            name (str): synthetic region name
+        """
+        if token is None:
+            return
+        self.depth -= 1
+        rp, start = token
+        if start is not None:
+            rp.add_synthetic_child(name, rp.root.timer.clock() - start)
+
+
+class _TimedLock:
+    """Lock wrapper, that times contended acquisitions.
+    """
+
+    __slots__ = ('_lock', '_recorder')
+
+    def __init__(self, lock, recorder):
+        self._lock = lock
+        self._recorder = recorder
+
+    def acquire(self, blocking=True, timeout=-1):
+        if self._lock.acquire(False):
+            return True
+        if not blocking:
+            return False
+        token = self._recorder.begin()
+        try:
+            return self._lock.acquire(True, timeout)
+        finally:
+            self._recorder.end(token, LOCK_WAIT_REGION)
+
+    def release(self):
+        self._lock.release()
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._lock.release()
+
+    def __getattr__(self, name):
+        return getattr(self._lock, name)
+
+    def __repr__(self):
+        return '<timed {!r}>'.format(self._lock)
+
+
+def _lock_factory(factory, recorder):
+    @functools.wraps(factory)
+    def create(*args, **kwargs):
+        return _TimedLock(factory(*args, **kwargs), recorder)
+
+    return create
+
+
+def _timed_condition_wait(wait, recorder):
+    @functools.wraps(wait)
+    def timed_wait(self, timeout=None):
+        token = recorder.begin()
+        try:
+            return wait(self, timeout)
+        finally:
+            recorder.end(token, LOCK_WAIT_REGION)
+
+    return timed_wait
+
+
+def _timed_queue_get(get, recorder):
+    @functools.wraps(get)
+    def timed_get(self, block=True, timeout=None):
+        try:
+            return get(self, False)
+        except queue.Empty:
+            if not block:
+                raise
+        token = recorder.begin()
+        try:
+            return get(self, True, timeout)
+        finally:
+            recorder.end(token, QUEUE_WAIT_REGION)
+
+    return timed_get
+
+
+def _timed_queue_put(put, recorder):
+    @functools.wraps(put)
+    def timed_put(self, item, block=True, timeout=None):
+        try:
+            return put(self, item, False)
+        except queue.Full:
+            if not block:
+                raise
+        token = recorder.begin()
+        try:
+            return put(self, item, True, timeout)
+        finally:
+            recorder.end(token, QUEUE_WAIT_REGION)
+
+    return timed_put
+
+
+def instrument_waits(get_profiler=None, locks=False):
+    """Start timing contended waits on conditions and queues (and optionally, locks).
+
+    See module description for details. Calling this function again
+    has no effect until :py:func:`uninstrument_waits` is called.
+
+    Args:
+        get_profiler (Callable, optional): returns
+            :py:class:`region_profiler.profiler.RegionProfiler` to be used.
+            Default: the global instance
+        locks (bool): also replace :py:func:`threading.Lock`
+            and :py:func:`threading.RLock` factories to time lock acquisitions.
+            See module description for side effects
+    """
+    if _originals:
+        return
+    if get_profiler is None:
+        get_profiler = lambda: global_instance._profiler
+    recorder = _WaitRecorder(get_profiler)
+
+    _originals.update({(threading.Condition, 'wait'): threading.Condition.wait,
+                       (queue.Queue, 'get'): queue.Queue.get,
+                       (queue.Queue, 'put'): queue.Queue.put})
+    if locks:
+        _originals.update({(threading, 'Lock'): threading.Lock,
+                           (threading, 'RLock'): threading.RLock})
+        threading.Lock = _lock_factory(threading.Lock, recorder)
+        threading.RLock = _lock_factory(threading.RLock, recorder)
+    threading.Condition.wait = _timed_condition_wait(threading.Condition.wait, recorder)
+    queue.Queue.get = _timed_queue_get(queue.Queue.get, recorder)
+    queue.Queue.put = _timed_queue_put(queue.Queue.put, recorder)
+
+
+def uninstrument_waits():
+    """Restore patched synchronization primitives.
+
+    Locks, created while instrumentation was active, remain timed.
+    """
+    for (owner, attr), original in _originals.items():
+        setattr(owner, attr, original)
+    _originals.clear()
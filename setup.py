@@ -16,6 +16,7 @@ setup_args = {
     'url': 'https://github.com/metopa/region_profiler',
     'author': 'Viacheslav Kroilov',
     'author_email': 'slavakroilov@gmail.com',
+    'python_requires': '>=3.6',
     'setup_requires': ['pytest-runner', 'setuptools>=18.0'],
     'tests_require': ['pytest<=4.0.2', 'pytest-cov==2.6.0', 'codecov'],
     'data_files': [('region_profiler', ['LICENSE.rst'])],
@@ -26,8 +27,6 @@ setup_args = {
         'Operating System :: OS Independent',
         'Programming Language :: Python',
         'Programming Language :: Python :: 3',
-        'Programming Language :: Python :: 3.4',
-        'Programming Language :: Python :: 3.5',
         'Programming Language :: Python :: 3.6',
         'Programming Language :: Python :: 3.7',
         'Topic :: Software Development :: Libraries :: Python Modules',
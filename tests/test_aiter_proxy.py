@@ -0,0 +1,118 @@
+import asyncio
+from unittest import mock
+
+import pytest
+
+from region_profiler import RegionProfiler
+from region_profiler.utils import Timer
+
+
+def run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+async def async_range(n, delay=0):
+    for i in range(n):
+        await asyncio.sleep(delay)
+        yield i
+
+
+@pytest.mark.parametrize('iter_cnt', [0, 1, 10])
+def test_aiter_proxy_proper_values(iter_cnt):
+    """Test that aiter_proxy properly forwards values.
+    """
+    rp = RegionProfiler()
+
+    async def consume():
+        return [x async for x in rp.aiter_proxy(async_range(iter_cnt), 'test_loop')]
+
+    assert run(consume()) == list(range(iter_cnt))
+    assert list(rp.root.children.keys()) == ['test_loop']
+    n = rp.root.children['test_loop']
+    assert n.stats.count == iter_cnt
+    assert n.consumer_stats.count == iter_cnt
+    assert n.recursion_depth == 0
+
+
+def test_aiter_proxy_consumer_time():
+    """Test that waiting and consumer time are measured separately.
+    """
+    mock_clock = mock.Mock()
+    mock_clock.side_effect = list(range(0, 100, 1))
+    rp = RegionProfiler(timer_cls=lambda: Timer(mock_clock))
+
+    async def consume():
+        async for _ in rp.aiter_proxy(async_range(2), 'iter'):
+            with rp.region('body'):
+                pass
+
+    run(consume())
+
+    n = rp.root.children['iter']
+    assert n.stats.count == 2
+    assert n.stats.total == 2
+    assert n.consumer_stats.count == 2
+    assert n.consumer_stats.total == 6
+    assert rp.root.children['body'].stats.count == 2
+
+
+def test_aiter_proxy_real_time():
+    """Test with a real timer, that stalls of a slow stream are detected.
+    """
+    rp = RegionProfiler()
+
+    async def consume():
+        async for _ in rp.aiter_proxy(async_range(3, 0.05), 'iter'):
+            await asyncio.sleep(0.01)
+
+    run(consume())
+
+    n = rp.root.children['iter']
+    assert 0.15 <= n.stats.total < 0.3
+    assert 0.03 <= n.consumer_stats.total < 0.1
+
+
+def test_aiter_proxy_concurrent_tasks():
+    """Test that overlapping awaits of concurrent proxies with the same name are all timed.
+    """
+    rp = RegionProfiler()
+
+    async def worker():
+        async for _ in rp.aiter_proxy(async_range(5, 0.02), 'fetch'):
+            pass
+
+    async def main():
+        await asyncio.gather(*[worker() for _ in range(4)])
+
+    run(main())
+
+    n = rp.root.children['fetch']
+    assert n.stats.count == 20
+    assert n.consumer_stats.count == 20
+    assert 0.35 <= n.stats.total < 0.8
+    assert n.recursion_depth == 0
+
+
+def test_aiter_proxy_exception():
+    """Test that aiter_proxy properly handles stream exceptions.
+    """
+    rp = RegionProfiler()
+
+    async def failing():
+        yield 1
+        raise RuntimeError('Dummy')
+
+    async def consume():
+        async for _ in rp.aiter_proxy(failing(), 'iter'):
+            pass
+
+    with pytest.raises(RuntimeError):
+        run(consume())
+
+    n = rp.root.children['iter']
+    assert n.stats.count == 2
+    assert n.recursion_depth == 0
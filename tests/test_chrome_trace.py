@@ -141,3 +141,80 @@ def test_chrome_trace_parent_node_canceled(tmpdir, capsys):
     with trace_file.open() as f:
         trace = json.load(f)
     assert trace[2:] == expected
+
+
+def test_chrome_trace_complete_events(tmpdir, capsys):
+    """Test that complete events mode writes a single event per region
+    and skips canceled regions.
+    """
+    trace_file = tmpdir.join('trace.json')
+    mock_clock = mock.Mock()
+    mock_clock.side_effect = list(range(0, 100, 1))
+    rp = RegionProfiler(listeners=[ChromeTraceListener(str(trace_file), complete_events=True)],
+                        timer_cls=lambda: Timer(mock_clock))
+
+    @rp.func()
+    def rec(n):
+        if n:
+            rec(n - 1)
+
+    with rp.region('a'):
+        for _ in rp.iter_proxy([1, 2], 'b'):
+            with rp.region('c'):
+                pass
+        rec(1)
+
+    rp.finalize()
+
+    pid = os.getpid()
+    tid = threading.get_ident()
+    expected = [
+        {'name': 'b', 'ph': 'X', 'ts': 2000000, 'dur': 1000000, 'pid': pid, 'tid': tid},
+        {'name': 'c', 'ph': 'X', 'ts': 4000000, 'dur': 1000000, 'pid': pid, 'tid': tid},
+        {'name': 'b', 'ph': 'X', 'ts': 6000000, 'dur': 1000000, 'pid': pid, 'tid': tid},
+        {'name': 'c', 'ph': 'X', 'ts': 8000000, 'dur': 1000000, 'pid': pid, 'tid': tid},
+        {'name': 'rec()', 'ph': 'X', 'ts': 14000000, 'dur': 1000000, 'pid': pid, 'tid': tid},
+        {'name': 'rec()', 'ph': 'X', 'ts': 13000000, 'dur': 3000000, 'pid': pid, 'tid': tid},
+        {'name': 'a', 'ph': 'X', 'ts': 1000000, 'dur': 16000000, 'pid': pid, 'tid': tid},
+        {'name': rp.ROOT_NODE_NAME, 'ph': 'X', 'ts': 0, 'dur': 18000000, 'pid': pid, 'tid': tid},
+    ]
+
+    with trace_file.open() as f:
+        trace = json.load(f)
+    assert trace[2:] == expected
+
+
+def test_chrome_trace_min_duration(tmpdir, capsys):
+    """Test that regions shorter than the threshold are omitted and counted.
+    """
+    trace_file = tmpdir.join('trace.json')
+    ts = [0, 1, 2, 2.5, 3, 3.2, 3.3, 3.4, 3.5, 6, 7, 8]
+    mock_clock = mock.Mock()
+    mock_clock.side_effect = ts
+    rp = RegionProfiler(listeners=[ChromeTraceListener(str(trace_file), min_duration=0.6)],
+                        timer_cls=lambda: Timer(mock_clock))
+
+    with rp.region('a'):
+        with rp.region('short'):
+            pass
+        with rp.region('long'):
+            with rp.region('nested short'):
+                pass
+            with rp.region('nested short 2'):
+                pass
+
+    rp.finalize()
+
+    pid = os.getpid()
+    tid = threading.get_ident()
+    expected = [
+        {'name': 'long', 'ph': 'X', 'ts': 3000000, 'dur': 3000000, 'pid': pid, 'tid': tid},
+        {'name': 'a', 'ph': 'X', 'ts': 1000000, 'dur': 6000000, 'pid': pid, 'tid': tid},
+        {'name': rp.ROOT_NODE_NAME, 'ph': 'X', 'ts': 0, 'dur': 8000000, 'pid': pid, 'tid': tid},
+        {'name': 'suppressed_regions', 'ph': 'M', 'pid': pid, 'tid': tid,
+         'args': {'count': 3, 'min_duration_us': 600000.0}},
+    ]
+
+    with trace_file.open() as f:
+        trace = json.load(f)
+    assert trace[2:] == expected
@@ -0,0 +1,153 @@
+import io
+
+import pytest
+
+from region_profiler import RegionProfiler
+from region_profiler import reporter_columns as cols
+from region_profiler.diff import (ConsoleDiffReporter, CsvDiffReporter,
+                                  diff_profiles, find_regressions,
+                                  load_csv_profile, main)
+from region_profiler.reporters import CsvReporter, Slice
+
+
+def make_profile(a_total, b_total, b_count, with_c=False):
+    slices = [Slice(0, '<main>', None, 0, 1, 100, 0, 100, 100),
+              Slice(1, 'a', None, 1, 1, a_total, 0, a_total, a_total),
+              Slice(2, 'b', None, 2, b_count, b_total, b_total, 1, 1)]
+    slices[1].parent = slices[0]
+    slices[2].parent = slices[1]
+    slices[1].total_inner_time = a_total - b_total
+    if with_c:
+        slices.append(Slice(3, 'c', slices[0], 1, 1, 5, 5, 5, 5))
+    return slices
+
+
+def test_diff_matches_by_path():
+    """Test that regions are matched by path and deltas are computed.
+    """
+    base = make_profile(50, 20, 4)
+    cand = make_profile(60, 40, 5, with_c=True)
+
+    diffs = diff_profiles(base, cand)
+    by_path = {d.path: d for d in diffs}
+
+    assert set(by_path) == {('<main>',), ('<main>', 'a'), ('<main>', 'a', 'b'), ('<main>', 'c')}
+    b = by_path[('<main>', 'a', 'b')]
+    assert b.delta('total') == 20
+    assert b.relative('total') == pytest.approx(1.)
+    assert b.delta('count') == 1
+    assert b.delta('avg') == pytest.approx(40 / 5 - 20 / 4)
+    a = by_path[('<main>', 'a')]
+    assert a.delta('self') == -10
+    assert a.relative('self') == pytest.approx(-1 / 3)
+    c = by_path[('<main>', 'c')]
+    assert c.base is None
+    assert c.relative('total') == float('inf')
+
+    assert [d.path for d in diffs[:2]] == [('<main>', 'a', 'b'), ('<main>', 'a')]
+
+
+def test_find_regressions():
+    """Test regression thresholding.
+    """
+    diffs = diff_profiles(make_profile(50, 20, 4), make_profile(52, 40, 5, with_c=True))
+
+    assert [d.name for d in find_regressions(diffs, 0.5)] == ['b', 'c']
+    assert [d.name for d in find_regressions(diffs, 0.5, min_delta=10)] == ['b']
+    assert [d.name for d in find_regressions(diffs, 0.01, 'self')] == ['b', 'c']
+
+
+def test_csv_roundtrip(tmpdir):
+    """Test that a profile, saved by CsvReporter, is loaded back correctly.
+    """
+    rp = RegionProfiler()
+    with rp.region('a'):
+        with rp.region('b'):
+            pass
+    with rp.region('b'):
+        pass
+    rp.finalize()
+
+    stream = io.StringIO()
+    CsvReporter(stream=stream).dump_profiler(rp)
+    stream.seek(0)
+    slices = load_csv_profile(stream)
+
+    assert [(s.name, s.parent_name, s.call_depth) for s in slices] == \
+           [(RegionProfiler.ROOT_NODE_NAME, '', 0), ('a', RegionProfiler.ROOT_NODE_NAME, 1),
+            ('b', 'a', 2), ('b', RegionProfiler.ROOT_NODE_NAME, 1)]
+
+    stream = io.StringIO()
+    CsvReporter([cols.node_id, cols.name, cols.parent_id, cols.count, cols.total_us],
+                stream=stream).dump_profiler(rp)
+    stream.seek(0)
+    slices_no_inner = load_csv_profile(stream)
+    assert slices_no_inner[2].total_inner_time == slices_no_inner[2].total_time
+    assert slices_no_inner[1].total_inner_time == pytest.approx(
+        slices_no_inner[1].total_time - slices_no_inner[2].total_time)
+
+
+def test_csv_quoted_names():
+    """Test that region names with commas and quotes survive a CSV roundtrip
+    and unquoted extra fields are rejected.
+    """
+    rp = RegionProfiler()
+    with rp.region('a, b'):
+        with rp.region('say "hi"'):
+            pass
+    rp.finalize()
+
+    stream = io.StringIO()
+    CsvReporter(stream=stream).dump_profiler(rp)
+    assert ', "a, b", ' in stream.getvalue()
+    stream.seek(0)
+    assert [s.name for s in load_csv_profile(stream)] == \
+           [RegionProfiler.ROOT_NODE_NAME, 'a, b', 'say "hi"']
+
+    stream = io.StringIO('id, name, parent_id, total_us, count\n0, a, b, , 10, 1\n')
+    with pytest.raises(ValueError, match='line 2 has 6 fields instead of 5'):
+        load_csv_profile(stream)
+
+
+def test_diff_reporters():
+    """Test that diff reporters print a row per region.
+    """
+    diffs = diff_profiles(make_profile(50, 20, 4), make_profile(60, 40, 5, with_c=True))
+
+    stream = io.StringIO()
+    ConsoleDiffReporter(stream).dump_diff(diffs)
+    lines = stream.getvalue().strip().split('\n')
+    assert len(lines) == len(diffs) + 2
+    assert lines[2].startswith('<main> > a > b')
+    assert any(l.startswith('<main> > c') and 'new' in l for l in lines)
+
+    stream = io.StringIO()
+    CsvDiffReporter(stream).dump_diff(diffs)
+    rows = [[c.strip() for c in r.split(',')] for r in stream.getvalue().strip().split('\n')]
+    assert rows[1][:5] == ['<main>;a;b', '20000000', '40000000', '20000000', '100.00']
+
+
+def test_cli_exit_code(tmpdir, capsys):
+    """Test that the command line tool fails on regressions above threshold.
+    """
+    def save(slices, path):
+        with open(path, 'w') as f:
+            print('id, name, parent_id, parent_name, total_us, total_inner_us, count', file=f)
+            for s in slices:
+                print(', '.join([str(s.id), s.name, str(s.parent.id) if s.parent else '',
+                                 s.parent_name, str(int(s.total_time * 1000000)),
+                                 str(int(s.total_inner_time * 1000000)), str(s.count)]), file=f)
+
+    base = str(tmpdir.join('base.csv'))
+    cand = str(tmpdir.join('cand.csv'))
+    save(make_profile(50, 20, 4), base)
+    save(make_profile(55, 22, 4), cand)
+
+    assert main([base, cand]) == 0
+    assert main([base, cand, '--threshold', '20']) == 0
+    assert main([base, cand, '--threshold', '5']) == 1
+    assert main([base, cand, '--threshold', '5', '--min-delta-us', '3000000']) == 1
+    assert main([base, cand, '--threshold', '5', '--min-delta-us', '6000000']) == 0
+    assert main([base, cand, '--format', 'csv', '--metric', 'count', '--threshold', '0']) == 0
+    out, err = capsys.readouterr()
+    assert 'Regression in <main> > a' in err
@@ -0,0 +1,151 @@
+import sys
+import textwrap
+from unittest import mock
+
+import pytest
+
+import region_profiler.global_instance
+from region_profiler import RegionProfiler, instrument, uninstrument
+from region_profiler.utils import Timer
+
+MODULE_SOURCE = '''
+import os
+from os.path import join
+
+
+def helper(x):
+    return x + 1
+
+
+def compute(x):
+    return helper(x) * 2
+
+
+def gen(n):
+    for i in range(n):
+        yield i
+
+
+def rec(n):
+    return rec(n - 1) + 1 if n else 0
+
+
+def _private():
+    return 0
+
+
+class Model:
+    def __init__(self, k):
+        self.k = k
+
+    def __repr__(self):
+        return 'Model()'
+
+    def forward(self, x):
+        return compute(x) * self.k
+
+    @staticmethod
+    def create():
+        return Model(1)
+
+    @classmethod
+    def name(cls):
+        return cls.__name__
+'''
+
+
+@pytest.fixture
+def instr_pkg(tmpdir, monkeypatch):
+    """Create a package ``instr_pkg`` with ``models`` submodule
+    and a fresh global profiler.
+    """
+    pkg = tmpdir.mkdir('instr_pkg')
+    pkg.join('__init__.py').write('')
+    pkg.join('models.py').write(textwrap.dedent(MODULE_SOURCE))
+    pkg.join('other.py').write('def foo():\n    return 1\n')
+    monkeypatch.syspath_prepend(str(tmpdir))
+    mock_clock = mock.Mock(side_effect=list(range(1000)))
+    rp = RegionProfiler(timer_cls=lambda: Timer(mock_clock))
+    monkeypatch.setattr(region_profiler.global_instance, '_profiler', rp)
+    yield rp
+    uninstrument()
+    for name in list(sys.modules):
+        if name.startswith('instr_pkg'):
+            del sys.modules[name]
+
+
+def test_instrument_on_import(instr_pkg):
+    """Test that functions and methods of a matching module are wrapped on import.
+    """
+    rp = instr_pkg
+    instrument('instr_pkg.models', exclude=['*._private'])
+    from instr_pkg import models, other
+
+    m = models.Model.create()
+    assert m.forward(1) == 4
+    assert models.Model.name() == 'Model'
+    assert list(models.gen(3)) == [0, 1, 2]
+    assert repr(m) == 'Model()'
+    assert models._private() == 0
+    assert other.foo() == 1
+    assert models.join is models.os.path.join
+
+    assert set(rp.root.children) == {'Model.create()', 'Model.forward()', 'Model.name()', 'gen()'}
+    assert list(rp.root.children['Model.create()'].children) == ['Model.__init__()']
+    forward = rp.root.children['Model.forward()']
+    assert list(forward.children) == ['compute()']
+    assert list(forward.children['compute()'].children) == ['helper()']
+    assert rp.root.children['gen()'].stats.count == 4
+
+
+def test_instrument_imported_module(instr_pkg):
+    """Test instrumentation of an already imported module, include filter and uninstrument.
+    """
+    rp = instr_pkg
+    from instr_pkg import models
+    original = models.compute
+
+    instrument('instr_pkg', include=['*.compute', '*.helper'])
+    assert models.compute is not original
+    assert models.Model.forward.__name__ == 'forward'
+    models.Model(1).forward(1)
+    assert list(rp.root.children) == ['compute()']
+
+    uninstrument()
+    assert models.compute is original
+    assert models.Model.forward.__name__ == 'forward'
+
+
+def test_min_duration(instr_pkg):
+    """Test that fast functions are un-instrumented after warm-up.
+    """
+    rp = instr_pkg
+    instrument('instr_pkg.models', include=['*.helper', '*.compute'],
+               min_duration=1.5, warmup_calls=3)
+    from instr_pkg import models
+    wrapped_helper = models.helper
+
+    for i in range(5):
+        models.compute(i)
+
+    # helper() takes 1 tick, compute() takes 5 ticks
+    assert models.helper is not wrapped_helper
+    assert models.helper.__name__ == 'helper'
+    assert not hasattr(models.helper, '__region_profiler_handle__')
+    assert wrapped_helper(1) == 2
+    compute = rp.root.children['compute()']
+    assert compute.stats.count == 5
+    assert compute.children['helper()'].stats.count == 3
+
+
+def test_min_duration_recursive(instr_pkg):
+    """Test that durations of recursive calls are measured per call.
+    """
+    instrument('instr_pkg.models', include=['*.rec'], min_duration=5, warmup_calls=3)
+    from instr_pkg import models
+
+    assert models.rec(2) == 2
+    # calls take 1, 5 and 9 ticks
+    handle = models.rec.__region_profiler_handle__
+    assert (handle.calls, handle.total) == (3, 15)
+    assert handle.active
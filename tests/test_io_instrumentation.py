@@ -0,0 +1,113 @@
+import io
+import socket
+from unittest import mock
+
+import pytest
+
+import region_profiler
+from region_profiler import RegionProfiler
+from region_profiler import reporter_columns as cols
+from region_profiler.io_instrumentation import instrument_io, timed_file, uninstrument_io
+from region_profiler.reporters import SilentReporter
+from region_profiler.utils import Timer
+
+
+@pytest.fixture
+def rp():
+    """Profiler with instrumented I/O and a fake clock.
+    """
+    mock_clock = mock.Mock(side_effect=list(range(1000)))
+    rp = RegionProfiler(timer_cls=lambda: Timer(mock_clock))
+    instrument_io(lambda: rp)
+    yield rp
+    uninstrument_io()
+
+
+def test_file_io_not_patched(rp, tmpdir):
+    """Test that files are not patched globally and their I/O is not charged to regions.
+    """
+    path = str(tmpdir.join('data.txt'))
+    with rp.region('write'):
+        with open(path, 'w') as f:
+            assert isinstance(f, io.TextIOWrapper)
+            f.write('abc\n')
+
+    write = rp.root.children['write']
+    assert write.io_bytes == 0
+    assert write.io_time == 0
+    assert '<io>' not in write.children
+
+
+def test_timed_file(rp, tmpdir):
+    """Test that reads and writes of an explicitly timed file are charged to the current region.
+    """
+    path = str(tmpdir.join('data.txt'))
+    with rp.region('write'):
+        with timed_file(open(path, 'w'), lambda: rp) as f:
+            assert isinstance(f, io.TextIOWrapper)
+            f.write('abc\n')
+            f.writelines(line for line in ['de\n', 'f\n'])
+    with rp.region('read'):
+        with timed_file(open(path, 'rb'), lambda: rp) as f:
+            assert f.readline() == b'abc\n'
+            buf = bytearray(3)
+            assert f.readinto(buf) == 3
+            assert f.read() == b'f\n'
+
+    write = rp.root.children['write']
+    assert write.io_bytes == 9
+    assert write.io_time == 2
+    assert write.children['<io>'].stats.count == 2
+    read = rp.root.children['read']
+    assert read.io_bytes == 9
+    assert read.children['<io>'].stats.count == 3
+
+    reporter = SilentReporter([cols.name, cols.total_inner_us, cols.io_time_us,
+                               cols.io_bytes, cols.io_percent])
+    reporter.dump_profiler(rp)
+    assert reporter.rows[-2:] == [['write', '3000000', '2000000', '9', '40.00%'],
+                                  ['<io>', '2000000', '0', '0', '0.00%']]
+
+
+def test_socket_io(rp):
+    """Test that socket sends and receives are timed and nested calls are not double-counted.
+    """
+    a, b = socket.socketpair()
+    try:
+        with rp.region('net'):
+            a.sendall(b'hello')
+            assert b.recv(5) == b'hello'
+            a.send(b'xyz\n')
+            with b.makefile('rb') as f:
+                assert f.readline() == b'xyz\n'
+    finally:
+        a.close()
+        b.close()
+
+    net = rp.root.children['net']
+    assert net.io_bytes == 18
+    assert net.children['<io>'].stats.count == 4
+
+    reporter = SilentReporter([cols.name, cols.total_inner_us, cols.io_time_us,
+                               cols.io_bytes, cols.io_percent])
+    reporter.dump_profiler(rp)
+    assert reporter.rows[-2:] == [['net', '5000000', '4000000', '18', '44.44%'],
+                                  ['<io>', '4000000', '0', '0', '0.00%']]
+
+
+def test_io_file_without_profiler(tmpdir):
+    """Test that io_file returns an untouched file, when profiling is off.
+    """
+    path = str(tmpdir.join('data.txt'))
+    with region_profiler.io_file(open(path, 'w')) as f:
+        assert 'write' not in vars(f)
+
+
+def test_uninstrument():
+    """Test that original functions are restored.
+    """
+    assert 'recv' not in socket.socket.__dict__
+    instrument_io(lambda: None)
+    assert 'recv' in socket.socket.__dict__
+    uninstrument_io()
+    assert 'recv' not in socket.socket.__dict__
@@ -2,6 +2,7 @@ from unittest import mock
 
 from region_profiler import RegionProfiler
 from region_profiler.debug_listener import DebugListener
+from region_profiler.listener import RegionProfilerListener
 from region_profiler.utils import Timer
 
 
@@ -33,3 +34,43 @@ def test_debug_listener(capsys):
     assert 'Exited a at 8' in err
     assert 'Exited foo() at 9' in err
     assert 'Finalizing' in err
+
+
+class CountingListener(RegionProfilerListener):
+    def __init__(self, subscribed_events):
+        self.subscribed_events = subscribed_events
+        self.events = []
+
+    def finalize(self):
+        self.events.append('finalize')
+
+    def region_entered(self, profiler, region):
+        self.events.append('enter ' + region.name)
+
+    def region_exited(self, profiler, region):
+        self.events.append('exit ' + region.name)
+
+    def region_canceled(self, profiler, region):
+        self.events.append('cancel ' + region.name)
+
+
+def test_listener_subscriptions():
+    """Test that listeners receive only subscribed region events.
+    """
+    all_events = CountingListener(('region_entered', 'region_exited', 'region_canceled'))
+    exit_only = CountingListener(('region_exited',))
+    no_events = CountingListener(())
+    rp = RegionProfiler(listeners=[all_events, exit_only])
+    rp.add_listener(no_events)
+
+    with rp.region('a'):
+        for _ in rp.iter_proxy([], 'b'):
+            pass
+
+    rp.finalize()
+
+    root = rp.ROOT_NODE_NAME
+    assert all_events.events == ['enter ' + root, 'enter a', 'enter b', 'cancel b', 'exit b',
+                                 'exit a', 'exit ' + root, 'finalize']
+    assert exit_only.events == ['enter ' + root, 'exit b', 'exit a', 'exit ' + root, 'finalize']
+    assert no_events.events == ['enter ' + root, 'exit ' + root, 'finalize']
@@ -0,0 +1,57 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from region_profiler.__main__ import parse_args
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_parse_args():
+    """Test that runner options are taken from the environment and the command line.
+    """
+    args = parse_args(['--reporter', 'csv', 'script.py', '--reporter', 'x'], {})
+    assert args.reporter == 'csv'
+    assert (args.target, args.is_module, args.args) == ('script.py', False, ['--reporter', 'x'])
+
+    args = parse_args(['--instrument', 'b', '-m', 'pkg.mod', '-v'],
+                      {'REGION_PROFILER': '--instrument a --output "my report.txt"'})
+    assert args.instrument == ['a', 'b']
+    assert args.output == 'my report.txt'
+    assert (args.target, args.is_module, args.args) == ('pkg.mod', True, ['-v'])
+
+    args = parse_args(['--reporter', 'console', 'script.py'], {'REGION_PROFILER': '--reporter csv'})
+    assert args.reporter == 'console'
+
+    with pytest.raises(SystemExit):
+        parse_args(['--reporter', 'csv'], {})
+
+
+def test_run_script(tmpdir):
+    """Test that a script is run with profiling installed and instrumented modules.
+    """
+    tmpdir.join('helper.py').write('def compute(n):\n'
+                                   '    return sum(range(n))\n')
+    tmpdir.join('work.py').write('import sys\n'
+                                 'import helper\n'
+                                 'import region_profiler as rp\n'
+                                 'with rp.region("work"):\n'
+                                 '    helper.compute(10)\n'
+                                 'print(sys.argv[1:])\n'
+                                 'sys.exit(3)\n')
+    output = str(tmpdir.join('report.csv'))
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT, REGION_PROFILER='--reporter csv')
+
+    p = subprocess.run([sys.executable, '-m', 'region_profiler', '--output', output,
+                        '--instrument', 'helper', str(tmpdir.join('work.py')), 'a', '-b'],
+                       env=env, stdout=subprocess.PIPE, universal_newlines=True)
+    assert p.returncode == 3
+    assert p.stdout == "['a', '-b']\n"
+
+    with open(output) as f:
+        rows = [[c.strip() for c in line.split(',')] for line in f]
+    assert [r[1:4] for r in rows[1:]] == [['<main>', '', ''],
+                                          ['work', '0', '<main>'],
+                                          ['compute()', '1', 'work']]
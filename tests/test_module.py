@@ -7,9 +7,9 @@ import pytest
 
 import region_profiler.global_instance
 import region_profiler.profiler
-from region_profiler import RegionProfiler, func
+from region_profiler import RegionProfiler, disable, func
 from region_profiler import install as install_profiler
-from region_profiler import iter_proxy, region
+from region_profiler import aiter_proxy, iter_proxy, region
 from region_profiler import reporter_columns as cols
 from region_profiler.reporters import SilentReporter
 from region_profiler.utils import Timer
@@ -26,6 +26,7 @@ def fresh_region_profiler(monkeypatch):
     """Reset ``region_profiler`` module before a next integration test.
     """
     region_profiler.global_instance._profiler = None
+    monkeypatch.setattr(region_profiler.global_instance, '_disabled', False)
     atexit_functions = []
     monkeypatch.setattr(atexit, 'register', lambda foo: atexit_functions.append(foo))
     yield None
@@ -207,7 +208,108 @@ def test_automatic_naming(monkeypatch, use_cython):
     expected = [['name'],
                 [RegionProfiler.ROOT_NODE_NAME],
                 ['foo()'],
-                ['foo() <test_module.py:198>'],
-                ['foo() <test_module.py:199>']]
+                ['foo() <test_module.py:199>'],
+                ['foo() <test_module.py:200>']]
 
     assert reporter.rows == expected
+
+
+def test_not_installed(monkeypatch):
+    """Test that marked regions work without profiler installed.
+    """
+    def foo(x):
+        return x + 1
+
+    with fresh_region_profiler(monkeypatch):
+        wrapped = func()(foo)
+        assert wrapped(1) == 2
+        assert region('a') is region()
+        with region('a', units=2) as r:
+            r.add_items(3)
+            r.add_bytes(4)
+        data = [1, 2]
+        assert iter_proxy(data) is data
+        assert aiter_proxy(data) is data
+
+
+def test_disable(monkeypatch):
+    """Test that profiling can be disabled with zero overhead.
+    """
+    def foo(x):
+        return x + 1
+
+    with fresh_region_profiler(monkeypatch):
+        disable()
+        assert func()(foo) is foo
+        assert region('a') is region()
+        data = [1, 2]
+        assert iter_proxy(data) is data
+        assert aiter_proxy(data) is data
+        with pytest.warns(UserWarning):
+            assert install_profiler() is None
+        assert region_profiler.global_instance._profiler is None
+
+
+def test_decorated_before_install(monkeypatch):
+    """Test that functions decorated before install() are profiled after it.
+    """
+    reporter = SilentReporter([cols.name, cols.count])
+
+    @func()
+    def foo():
+        pass
+
+    with fresh_region_profiler(monkeypatch):
+        foo()
+        install_profiler(reporter)
+        foo()
+        foo()
+        with pytest.warns(UserWarning):
+            disable()
+
+    assert reporter.rows == [['name', 'count'],
+                             [RegionProfiler.ROOT_NODE_NAME, '1'],
+                             ['foo()', '2']]
+
+
+def test_global_generator_func(monkeypatch):
+    """Test that global decorator times generators on each resume.
+    """
+    reporter = SilentReporter([cols.name, cols.count])
+
+    @func()
+    def gen():
+        yield 1
+        yield 2
+
+    with fresh_region_profiler(monkeypatch):
+        assert list(gen()) == [1, 2]
+        install_profiler(reporter)
+        assert list(gen()) == [1, 2]
+
+    assert reporter.rows == [['name', 'count'],
+                             [RegionProfiler.ROOT_NODE_NAME, '1'],
+                             ['gen()', '3']]
+
+
+def test_lazy_import():
+    """Test that package import does not load profiler, listeners, reporters and inspect.
+    """
+    import subprocess
+    import sys
+
+    code = '\n'.join([
+        'import sys',
+        'import region_profiler as rp',
+        'heavy = ["inspect", "region_profiler.profiler", "region_profiler.reporters",',
+        '         "region_profiler.chrome_trace_listener", "region_profiler.debug_listener"]',
+        'print(sorted(m for m in heavy if m in sys.modules))',
+        'print(rp.RegionProfiler.__name__, rp.instrument.__name__, "RegionProfiler" in dir(rp))',
+        'print("region_profiler.profiler" in sys.modules)',
+    ])
+    out = subprocess.run([sys.executable, '-c', code], check=True,
+                         stdout=subprocess.PIPE, universal_newlines=True).stdout
+    assert out.splitlines() == ['[]', 'RegionProfiler instrument True', 'True']
+
+    with pytest.raises(AttributeError):
+        region_profiler.no_such_attribute
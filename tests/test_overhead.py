@@ -0,0 +1,80 @@
+import io
+from unittest import mock
+
+from region_profiler import RegionProfiler
+from region_profiler.listener import RegionProfilerListener
+from region_profiler.overhead import OverheadStats
+from region_profiler.reporters import ConsoleReporter
+from region_profiler.utils import Timer
+
+
+class EnterListener(RegionProfilerListener):
+    subscribed_events = ('region_entered',)
+
+    def __init__(self):
+        self.entered = []
+
+    def region_entered(self, profiler, region):
+        self.entered.append(region.name)
+
+
+def test_overhead_accounting():
+    """Test that events are counted and time is split between the profiler, listeners and naming.
+    """
+    listener = EnterListener()
+    rp = RegionProfiler(listeners=[listener], measure_overhead=True)
+    rp.overhead.clock = mock.Mock(side_effect=list(range(100)))
+
+    with rp.region('a'):
+        with rp.region():
+            pass
+    for _ in rp.iter_proxy([1], 'it'):
+        pass
+
+    ov = rp.overhead
+    assert ov.counts == {'enter': 4, 'exit': 4, 'cancel': 1}
+    assert ov.naming_count == 1
+    assert ov.naming_time == 1
+    assert ov.listener_names == ['EnterListener']
+    assert ov.listener_time == [4]
+    assert ov.core_time == 9
+    assert ov.total == 14
+    assert ov.event_count == 9
+    assert listener.entered == ['<main>', 'a', 'test_overhead_accounting() <test_overhead.py:29>',
+                                'it', 'it']
+
+
+def test_overhead_disabled():
+    """Test that overhead is not measured by default.
+    """
+    rp = RegionProfiler()
+    with rp.region('a'):
+        pass
+    assert rp.overhead is None
+
+
+def test_overhead_footer():
+    """Test that ConsoleReporter prints overhead summary.
+    """
+    mock_clock = mock.Mock(side_effect=list(range(100)))
+    rp = RegionProfiler(timer_cls=lambda: Timer(mock_clock), listeners=[EnterListener()],
+                        measure_overhead=True)
+    rp.overhead.clock = mock.Mock(side_effect=[0, 0.001, 0.003, 0.004, 0.004])
+    with rp.region('a'):
+        pass
+
+    stream = io.StringIO()
+    ConsoleReporter(stream=stream).dump_profiler(rp)
+    footer = stream.getvalue().strip().split('\n')[-3:]
+    assert footer == ['Profiler overhead: 3.000 ms (0.10% of 3.000 s), 1 enter, 1 exit, 0 cancel events',
+                      '  region events: 1.000 ms',
+                      '  EnterListener: 2.000 ms']
+
+
+def test_overhead_fraction():
+    """Test overhead fraction computation.
+    """
+    ov = OverheadStats()
+    ov.core_time = 1
+    assert ov.fraction(100) == 0.01
+    assert ov.fraction(0) == 0
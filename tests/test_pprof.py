@@ -0,0 +1,109 @@
+import gzip
+from unittest import mock
+
+from region_profiler import RegionProfiler
+from region_profiler.pprof_reporter import PprofReporter, _varint
+from region_profiler.utils import Timer
+
+
+def read_varint(data, pos):
+    result = shift = 0
+    while True:
+        b = data[pos]
+        pos += 1
+        result |= (b & 0x7f) << shift
+        shift += 7
+        if not b & 0x80:
+            return result, pos
+
+
+def decode(data):
+    """Minimal protobuf decoder: returns list of (field, value) pairs.
+    """
+    fields = []
+    pos = 0
+    while pos < len(data):
+        key, pos = read_varint(data, pos)
+        field, wire_type = key >> 3, key & 7
+        if wire_type == 0:
+            value, pos = read_varint(data, pos)
+        else:
+            assert wire_type == 2
+            size, pos = read_varint(data, pos)
+            value = data[pos:pos + size]
+            pos += size
+        fields.append((field, value))
+    return fields
+
+
+def decode_packed(data):
+    values = []
+    pos = 0
+    while pos < len(data):
+        v, pos = read_varint(data, pos)
+        values.append(v)
+    return values
+
+
+def test_varint():
+    assert _varint(0) == b'\x00'
+    assert _varint(1) == b'\x01'
+    assert _varint(300) == b'\xac\x02'
+    assert _varint(-1) == b'\xff' * 9 + b'\x01'
+
+
+def test_pprof_reporter(tmpdir, capsys):
+    """Test that PprofReporter produces a valid profile.
+    """
+    mock_clock = mock.Mock()
+    mock_clock.side_effect = list(range(0, 100, 1))
+    rp = RegionProfiler(timer_cls=lambda: Timer(mock_clock))
+
+    with rp.region('a'):
+        for _ in [1, 2]:
+            with rp.region('b'):
+                pass
+    with rp.region('b'):
+        pass
+    rp.root.exit_region()
+
+    profile_file = str(tmpdir.join('profile.pb.gz'))
+    PprofReporter(profile_file).dump_profiler(rp)
+
+    with gzip.open(profile_file, 'rb') as f:
+        fields = decode(f.read())
+
+    strings = [v.decode() for f, v in fields if f == 6]
+    assert strings[0] == ''
+
+    sample_types = [dict(decode(v)) for f, v in fields if f == 1]
+    assert [(strings[t[1]], strings[t[2]]) for t in sample_types] == \
+           [('count', 'count'), ('total', 'nanoseconds'), ('self', 'nanoseconds')]
+
+    functions = {}
+    for f, v in fields:
+        if f == 5:
+            fn = dict(decode(v))
+            functions[fn[1]] = strings[fn[2]]
+    locations = {}
+    for f, v in fields:
+        if f == 4:
+            loc = dict(decode(v))
+            locations[loc[1]] = functions[dict(decode(loc[4]))[1]]
+    assert sorted(locations.values()) == sorted([rp.ROOT_NODE_NAME, 'a', 'b'])
+
+    samples = []
+    for f, v in fields:
+        if f == 2:
+            sample = dict(decode(v))
+            stack = [locations[l] for l in decode_packed(sample[1])]
+            samples.append((stack, decode_packed(sample[2])))
+
+    sec = 1000000000
+    assert samples == [([rp.ROOT_NODE_NAME], [1, 9 * sec, 3 * sec]),
+                       (['a', rp.ROOT_NODE_NAME], [1, 5 * sec, 3 * sec]),
+                       (['b', 'a', rp.ROOT_NODE_NAME], [2, 2 * sec, 2 * sec]),
+                       (['b', rp.ROOT_NODE_NAME], [1, 1 * sec, 1 * sec])]
+
+    assert dict(fields)[10] == 9 * sec
+    assert strings[dict(fields)[14]] == 'self'
@@ -29,3 +29,24 @@ def test_column_data():
     assert cols.min_us(s, slices) == '1000000'
     assert cols.max(s, slices) == '4.000 s'
     assert cols.max_us(s, slices) == '4000000'
+    assert cols.consumer(s, slices) == '0 ns'
+    assert cols.consumer_us(s, slices) == '0'
+    assert cols.tags(s, slices) == ''
+    assert cols.items(s, slices) == '0'
+    assert cols.bytes(s, slices) == '0'
+    assert cols.items_per_sec(s, slices) == ''
+    assert cols.mb_per_sec(s, slices) == ''
+    assert cols.ns_per_item(s, slices) == ''
+
+
+def test_throughput_columns():
+    """Assert that rate columns are computed from the region total time.
+    """
+    s = Slice(0, 'a', None, 0, 2, 0.5, 0.5, 0.25, 0.25, items=1000, bytes=3000000)
+    slices = [s]
+
+    assert cols.items(s, slices) == '1000'
+    assert cols.bytes(s, slices) == '3000000'
+    assert cols.items_per_sec(s, slices) == '2000.0'
+    assert cols.mb_per_sec(s, slices) == '6.00'
+    assert cols.ns_per_item(s, slices) == '500000'
@@ -148,3 +148,33 @@ def test_root_cancellation(node_cls, timer_cls):
 
         n = node_cls(timer_cls=t_cls)
         n.cancel_region()
+
+
+def test_compact_storage():
+    """Test that nodes and their timers and stats don't allocate instance dictionaries.
+    """
+    root = RootNode()
+    node = root.get_child('a')
+    for obj in (root, node, node.timer, node.stats, root.stats):
+        assert not hasattr(obj, '__dict__')
+
+
+def test_tagged_stats_lru():
+    """Test that tag values above the limit are folded into the other bucket in LRU order.
+    """
+    n = RegionNode('a')
+    n.add_tagged('bs=1', 1, max_tag_values=2)
+    n.add_tagged('bs=2', 2, max_tag_values=2)
+    n.add_tagged('bs=1', 3, max_tag_values=2)
+    n.add_tagged('bs=3', 5, max_tag_values=2)
+    assert list(n.tag_stats) == ['bs=1', '<other>', 'bs=3']
+    assert n.tag_stats['<other>'] == SeqStats(1, 2, 2, 2)
+    assert n.tag_stats['bs=1'] == SeqStats(2, 4, 1, 3)
+
+    n.add_tagged('bs=4', 7, max_tag_values=2)
+    assert list(n.tag_stats) == ['<other>', 'bs=3', 'bs=4']
+    assert n.tag_stats['<other>'] == SeqStats(3, 6, 1, 3)
+
+    n = RegionNode('b')
+    n.add_tagged('bs=1', 1, max_tag_values=0)
+    assert list(n.tag_stats) == ['<other>']
@@ -3,6 +3,7 @@ import sys
 import pytest
 
 from region_profiler.profiler import RegionProfiler
+from region_profiler.reporters import get_profiler_slice
 
 
 @pytest.mark.parametrize('profiler_cls', [RegionProfiler])
@@ -65,3 +66,18 @@ def test_iter_proxy_custom_exception(profiler_cls, iter_cnt):
     assert n.stats.count == iter_cnt + 1
     # iteration that throws custom exception is calculated
     assert n.recursion_depth == 0  # check that timing is stopped
+
+
+def test_region_units():
+    """Test that processed items and bytes are accumulated in the region node.
+    """
+    rp = RegionProfiler()
+    for _ in range(3):
+        with rp.region('load', units=4) as node:
+            node.add_bytes(10)
+            node.add_items()
+
+    node = rp.root.children['load']
+    assert node.items == 15
+    assert node.bytes == 30
+    assert get_profiler_slice(rp)[1].items == 15
@@ -1,7 +1,12 @@
+import io
+from unittest import mock
+
 import pytest
 
 from region_profiler import RegionProfiler
+from region_profiler import reporter_columns as cols
 from region_profiler.reporters import *
+from region_profiler.utils import Timer
 
 
 class FixedStats:
@@ -133,3 +138,72 @@ def test_csv_reporter(dummy_region_profiler, capsys):
         assert len(row) == len(expected_vals)
         for col, v in zip(row, expected_vals):
             assert col == v
+
+
+def test_flamegraph_reporter(dummy_region_profiler, capsys):
+    """Test :py:class:`FlamegraphReporter` reporter.
+    """
+    r = FlamegraphReporter(stream=sys.stdout)
+
+    r.dump_profiler(dummy_region_profiler)
+
+    root = RegionProfiler.ROOT_NODE_NAME
+    expected = ['{} 10000000'.format(root),
+                '{};a 15000000'.format(root),
+                '{};a;c 20000000'.format(root),
+                '{};a;c;x 10000000'.format(root),
+                '{};a;d 15000000'.format(root),
+                '{};a;d;x 10000000'.format(root),
+                '{};a;b 20000000'.format(root)]
+
+    output, err = capsys.readouterr()
+    assert output.strip().split('\n') == expected
+
+
+def test_flamegraph_reporter_deep_tree(capsys):
+    """Test that a tree deeper than the recursion limit can be reported.
+    """
+    rp = RegionProfiler()
+    depth = sys.getrecursionlimit() + 100
+    node = rp.root
+    for i in range(depth):
+        node = node.get_child('n;{}'.format(i))
+        node.stats.add(1)
+    rp.root.stats = FixedStats(1, 2, 2, 2)
+
+    FlamegraphReporter(stream=sys.stdout).dump_profiler(rp)
+
+    output, err = capsys.readouterr()
+    lines = output.strip().split('\n')
+    assert len(lines) == 2
+    assert lines[0] == '{} 1000000'.format(RegionProfiler.ROOT_NODE_NAME)
+    stack, weight = lines[1].rsplit(' ', 1)
+    assert weight == '1000000'
+    assert stack.split(';')[1:3] == ['n:0', 'n:1']
+    assert len(stack.split(';')) == depth + 1
+
+
+def test_tagged_region_rows():
+    """Test that tagged regions are reported with a row per tag value.
+    """
+    mock_clock = mock.Mock(side_effect=list(range(0, 100, 1)))
+    rp = RegionProfiler(timer_cls=lambda: Timer(mock_clock))
+    for bs in [8, 32, 32]:
+        with rp.region('infer', tags={'bs': bs, 'model': 'm'}):
+            pass
+    with rp.region('plain'):
+        pass
+
+    stream = io.StringIO()
+    CsvReporter([cols.node_id, cols.name, cols.parent_id, cols.tags, cols.count, cols.total_us],
+                stream=stream).dump_profiler(rp)
+    rows = [r.split(', ') for r in stream.getvalue().strip().split('\n')]
+    assert rows[1:] == [['0', '<main>', '', '', '1', '9000000'],
+                        ['1', 'infer', '0', '', '3', '3000000'],
+                        ['1', 'infer', '0', 'bs=32;model=m', '2', '2000000'],
+                        ['1', 'infer', '0', 'bs=8;model=m', '1', '1000000'],
+                        ['2', 'plain', '0', '', '1', '1000000']]
+
+    reporter = SilentReporter([cols.name, cols.count])
+    reporter.dump_profiler(rp)
+    assert len(reporter.rows) == 4
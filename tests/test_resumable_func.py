@@ -0,0 +1,180 @@
+import asyncio
+from unittest import mock
+
+import pytest
+
+from region_profiler import RegionProfiler
+from region_profiler.utils import Timer
+
+
+def make_profiler():
+    mock_clock = mock.Mock()
+    mock_clock.side_effect = list(range(0, 100, 1))
+    return RegionProfiler(timer_cls=lambda: Timer(mock_clock))
+
+
+def run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+def test_generator_func():
+    """Test that generator function is timed on each resume
+    excluding consumer time.
+    """
+    rp = make_profiler()
+
+    @rp.func()
+    def gen(n):
+        for i in range(n):
+            with rp.region('inner'):
+                pass
+            yield i
+
+    values = []
+    for x in gen(2):
+        with rp.region('consumer'):
+            values.append(x)
+
+    assert values == [0, 1]
+    assert set(rp.root.children) == {'gen()', 'consumer'}
+    node = rp.root.children['gen()']
+    assert list(node.children) == ['inner']
+    assert node.stats.count == 3
+    assert node.stats.total == 7
+    assert node.recursion_depth == 0
+    assert rp.current_node is rp.root
+
+
+def test_generator_func_protocol():
+    """Test that send(), throw() and return values are forwarded.
+    """
+    rp = make_profiler()
+
+    @rp.func('echo')
+    def echo():
+        """Docstring"""
+        received = []
+        try:
+            while True:
+                try:
+                    x = yield len(received)
+                    received.append(x)
+                except ValueError:
+                    received.append('error')
+        finally:
+            received.append('closed')
+            sink.extend(received)
+
+    sink = []
+    assert echo.__name__ == 'echo'
+    assert echo.__doc__ == 'Docstring'
+    g = echo()
+    assert next(g) == 0
+    assert g.send('a') == 1
+    assert g.throw(ValueError()) == 2
+    g.close()
+    assert sink == ['a', 'error', 'closed']
+    assert rp.root.children['echo()'].stats.count == 4
+    assert rp.current_node is rp.root
+
+    @rp.func()
+    def ret():
+        yield 1
+        return 42
+
+    assert list(ret()) == [1]
+    g = ret()
+    next(g)
+    with pytest.raises(StopIteration) as e:
+        next(g)
+    assert e.value.value == 42
+
+
+def test_generator_func_exception():
+    """Test that exception, raised by a generator, leaves the profiler consistent.
+    """
+    rp = make_profiler()
+
+    @rp.func()
+    def gen():
+        yield 1
+        raise RuntimeError('Dummy')
+
+    with pytest.raises(RuntimeError):
+        for _ in gen():
+            pass
+    assert rp.root.children['gen()'].stats.count == 2
+    assert rp.current_node is rp.root
+
+
+def test_coroutine_func():
+    """Test that coroutine is timed on each resume
+    excluding time spent awaiting.
+    """
+    rp = RegionProfiler()
+
+    @rp.func()
+    async def work():
+        for _ in range(3):
+            await asyncio.sleep(0.05)
+        return 'done'
+
+    assert asyncio.iscoroutinefunction(work)
+    assert run(work()) == 'done'
+
+    node = rp.root.children['work()']
+    assert node.stats.count == 4
+    assert node.stats.total < 0.05
+    assert rp.current_node is rp.root
+
+
+def test_nested_coroutine_func():
+    """Test that regions entered inside coroutine are nested properly.
+    """
+    rp = RegionProfiler()
+
+    @rp.func()
+    async def inner():
+        await asyncio.sleep(0)
+        return 1
+
+    @rp.func()
+    async def outer():
+        with rp.region('a'):
+            pass
+        return await inner() + await inner()
+
+    assert run(outer()) == 2
+    node = rp.root.children['outer()']
+    assert set(node.children) == {'a', 'inner()'}
+    assert node.children['inner()'].stats.count == 4
+    assert rp.current_node is rp.root
+
+
+def test_async_generator_func():
+    """Test that async generator is timed on each resume.
+    """
+    rp = RegionProfiler()
+
+    @rp.func()
+    async def agen(n):
+        for i in range(n):
+            await asyncio.sleep(0.01)
+            yield i
+
+    async def consume():
+        result = []
+        async for x in agen(3):
+            await asyncio.sleep(0.02)
+            result.append(x)
+        return result
+
+    assert run(consume()) == [0, 1, 2]
+    node = rp.root.children['agen()']
+    assert node.stats.count == 7  # 2 resumes per item (initial and after sleep) + final one
+    assert node.stats.total < 0.03
+    assert rp.current_node is rp.root
@@ -0,0 +1,55 @@
+import io
+import time
+
+from region_profiler import RegionProfiler
+from region_profiler.sampler import StackSampler
+
+
+def hot_function(sampler):
+    sampler.sample()
+
+
+def test_sample_attribution():
+    """Test that a sample is attributed to the active region and the innermost user function.
+    """
+    sampler = StackSampler(interval=1000, stream=None)
+    rp = RegionProfiler(listeners=[sampler])
+    with rp.region('a'):
+        hot_function(sampler)
+        hot_function(sampler)
+    with rp.region('b'):
+        sampler.sample()
+    rp.finalize()
+
+    a = rp.root.children['a']
+    [((name, filename, _), count)] = sampler.hot_functions(a)
+    assert (name, count) == ('hot_function', 2)
+    assert filename == __file__
+    b = rp.root.children['b']
+    assert sampler.hot_functions(b)[0][0][0] == 'test_sample_attribution'
+    assert sampler.hot_functions(rp.root) == []
+    assert sampler.sample_count == 3
+
+    stream = io.StringIO()
+    sampler.dump(stream)
+    lines = stream.getvalue().split('\n')
+    assert lines[1] == '<main> > a: 2 samples'
+    assert lines[2].strip().startswith('100.0%  hot_function (test_sampler.py:')
+    assert lines[3] == '<main> > b: 1 samples'
+
+
+def test_background_sampling():
+    """Test that the background thread collects samples until finalization.
+    """
+    sampler = StackSampler(interval=0.001, stream=None)
+    rp = RegionProfiler(listeners=[sampler])
+    with rp.region('busy'):
+        deadline = time.perf_counter() + 0.2
+        while time.perf_counter() < deadline:
+            pass
+    rp.finalize()
+    assert not sampler._thread.is_alive()
+
+    busy = rp.root.children['busy']
+    assert sampler.hot_functions(busy)
+    assert sampler.hot_functions(busy, 1)[0][0][0] == 'test_background_sampling'
@@ -29,3 +29,17 @@ def test_seq_stats(stats_cls):
     assert s.avg == sum(values) / len(values)
     assert s.min == min(values)
     assert s.max == max(values)
+
+
+def test_seq_stats_merge():
+    """Test that merged stats equal stats of the concatenated sequence.
+    """
+    a = SeqStats()
+    a.merge(SeqStats())
+    assert a == SeqStats()
+    a.merge(SeqStats(2, 10, 4, 6))
+    assert a == SeqStats(2, 10, 4, 6)
+    a.merge(SeqStats(1, 3, 3, 3))
+    assert a == SeqStats(3, 13, 3, 6)
+    a.merge(SeqStats())
+    assert a == SeqStats(3, 13, 3, 6)
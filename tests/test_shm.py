@@ -0,0 +1,121 @@
+import os
+import subprocess
+import sys
+from unittest import mock
+
+import pytest
+
+from region_profiler import RegionProfiler
+from region_profiler.shm import HIST_BUCKETS, ShmExporter, attach, histogram_bucket
+from region_profiler.utils import Timer
+
+
+def test_histogram_bucket():
+    """Test log2 duration histogram buckets.
+    """
+    assert histogram_bucket(0) == 0
+    assert histogram_bucket(0.5e-6) == 0
+    assert histogram_bucket(1e-6) == 1
+    assert histogram_bucket(3e-6) == 2
+    assert histogram_bucket(4e-6) == 3
+    assert histogram_bucket(1e6) == HIST_BUCKETS - 1
+
+
+def test_export(tmpdir):
+    """Test that exported stats are read back while regions are open.
+    """
+    path = str(tmpdir.join('table'))
+    mock_clock = mock.Mock()
+    mock_clock.side_effect = list(range(0, 100, 1))
+    exporter = ShmExporter(path, capacity=4)
+    rp = RegionProfiler(listeners=[exporter], timer_cls=lambda: Timer(mock_clock))
+
+    with rp.region('a'):
+        with rp.region('b'):
+            pass
+        for _ in rp.iter_proxy([1, 2], 'c'):
+            pass
+        with rp.region('d'):
+            with rp.region('e'):
+                pass
+        snapshot = attach(path)
+
+    assert snapshot.pid == os.getpid()
+    assert [(r.name, r.parent, r.count, r.total, r.last) for r in snapshot.records] == [
+        (RegionProfiler.ROOT_NODE_NAME, -1, 0, 0, 0),
+        ('a', 0, 0, 0, 0),
+        ('b', 1, 1, 1, 1),
+        ('c', 1, 2, 2, 1),
+    ]
+    assert snapshot.records[3].histogram[histogram_bucket(1)] == 2
+    assert sum(snapshot.records[3].histogram) == 2
+
+    slices = snapshot.slices()
+    assert [(s.name, s.parent_name, s.count, s.total_time, s.total_inner_time)
+            for s in slices[1:]] == [('a', RegionProfiler.ROOT_NODE_NAME, 0, 0, 0),
+                                     ('c', 'a', 2, 2, 2),
+                                     ('b', 'a', 1, 1, 1)]
+    assert slices[0].count == 1
+    assert slices[0].total_time >= 0
+
+    rp.finalize()
+    assert not os.path.exists(path)
+
+
+def test_export_global_region(tmpdir):
+    """Test that records follow the region tree, not the stack at the first exit.
+    """
+    path = str(tmpdir.join('table'))
+    rp = RegionProfiler(listeners=[ShmExporter(path)])
+
+    with rp.region('a'):
+        with rp.region('b', asglobal=True):
+            with rp.region('c'):
+                pass
+
+    snapshot = attach(path)
+    assert [(r.name, r.parent, r.count) for r in snapshot.records] == [
+        (RegionProfiler.ROOT_NODE_NAME, -1, 0),
+        ('b', 0, 1),
+        ('c', 1, 1),
+        ('a', 0, 1),
+    ]
+    assert [(s.name, s.parent_name) for s in snapshot.slices()][1:] == [
+        ('a', RegionProfiler.ROOT_NODE_NAME), ('b', RegionProfiler.ROOT_NODE_NAME), ('c', 'b')]
+    rp.finalize()
+
+
+def test_attach_pid(tmpdir):
+    """Test that stats of another process are found by its pid.
+    """
+    code = '\n'.join([
+        'import sys',
+        "import region_profiler as rp",
+        "from region_profiler.reporters import SilentReporter",
+        'rp.install(reporter=rp.reporters.SilentReporter([]), shm_export=True)',
+        'with rp.region("work"):',
+        '    pass',
+        'print(flush=True)',
+        'sys.stdin.readline()',
+    ])
+    p = subprocess.Popen([sys.executable, '-c', code], stdin=subprocess.PIPE,
+                         stdout=subprocess.PIPE, universal_newlines=True)
+    try:
+        p.stdout.readline()
+        snapshot = attach(p.pid)
+        assert snapshot.pid == p.pid
+        assert [(r.name, r.count) for r in snapshot.records] == [('<main>', 0), ('work', 1)]
+    finally:
+        p.communicate('\n')
+    assert p.returncode == 0
+    with pytest.raises(FileNotFoundError):
+        attach(p.pid)
+
+
+def test_attach_invalid(tmpdir):
+    """Test that files of other formats are rejected.
+    """
+    path = tmpdir.join('table')
+    path.write('x' * 1024)
+    with pytest.raises(ValueError):
+        attach(str(path))
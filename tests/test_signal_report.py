@@ -0,0 +1,84 @@
+import json
+import os
+import signal
+from unittest import mock
+
+import pytest
+
+from region_profiler import RegionProfiler
+from region_profiler import reporter_columns as cols
+from region_profiler.chrome_trace_listener import ChromeTraceListener
+from region_profiler.pprof_reporter import PprofReporter
+from region_profiler.reporters import CsvReporter, SilentReporter
+from region_profiler.signal_report import (dump_report, register_report_signal,
+                                           report_filename, unregister_report_signal)
+from region_profiler.utils import Timer
+
+
+def test_report_filename():
+    """Test that report file name includes pid and timestamp.
+    """
+    name = report_filename('report.{pid}.{timestamp}.csv')
+    pid, timestamp = name.split('.', 1)[1].rsplit('.', 1)[0].split('.', 1)
+    assert pid == str(os.getpid())
+    assert len(timestamp) == len('20190322-101010.123')
+
+
+@pytest.mark.skipif(not hasattr(signal, 'SIGUSR1'), reason='requires SIGUSR1')
+def test_report_on_signal(tmpdir, capsys):
+    """Test that a signal writes a live report and flushes Chrome Trace while regions are open.
+    """
+    trace_file = tmpdir.join('trace.json')
+    mock_clock = mock.Mock()
+    mock_clock.side_effect = list(range(0, 100, 1))
+    rp = RegionProfiler(listeners=[ChromeTraceListener(str(trace_file))],
+                        timer_cls=lambda: Timer(mock_clock))
+    reporter = CsvReporter([cols.name, cols.total_us, cols.count], stream=None)
+    register_report_signal(signal.SIGUSR1, reporter, str(tmpdir.join('report.{timestamp}.csv')),
+                           get_profiler=lambda: rp)
+    try:
+        with rp.region('a'):
+            with rp.region('b'):
+                pass
+            os.kill(os.getpid(), signal.SIGUSR1)
+            with rp.region('c'):
+                pass
+    finally:
+        unregister_report_signal()
+
+    reports = tmpdir.listdir(lambda p: p.basename.startswith('report.'))
+    assert len(reports) == 1
+    assert reporter.stream is None
+    assert reports[0].read().split('\n') == ['name, total_us, count',
+                                             '<main>, 4000000, 1',
+                                             'a, 0, 0',
+                                             'b, 1000000, 1',
+                                             '']
+    assert 'live report is saved in' in capsys.readouterr().err
+
+    with trace_file.open() as f:
+        trace = json.loads(f.read() + ']')
+    assert [(e['name'], e['ph']) for e in trace[2:]] == [(rp.ROOT_NODE_NAME, 'B'), ('a', 'B'),
+                                                         ('b', 'B'), ('b', 'E')]
+    rp.finalize()
+
+
+def test_dump_report_without_stream(tmpdir):
+    """Test that the report file is created only for reporters with a stream or a file name.
+    """
+    rp = RegionProfiler()
+    with rp.region('a'):
+        pass
+
+    reporter = SilentReporter([cols.name])
+    path = tmpdir.join('report.txt')
+    assert not dump_report(rp, reporter, str(path))
+    assert not path.exists()
+    assert reporter.rows[1:] == [['<main>'], ['a']]
+
+    reporter = PprofReporter(str(tmpdir.join('orig.pb.gz')))
+    path = tmpdir.join('report.pb.gz')
+    assert dump_report(rp, reporter, str(path))
+    assert path.exists()
+    assert not tmpdir.join('orig.pb.gz').exists()
+    rp.finalize()
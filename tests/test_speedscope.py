@@ -0,0 +1,140 @@
+import json
+import os
+from unittest import mock
+
+import pytest
+
+from region_profiler import RegionProfiler
+from region_profiler.speedscope_listener import SpeedscopeListener
+from region_profiler.utils import Timer
+
+
+def load_profile(profile_file):
+    assert os.path.isfile(str(profile_file))
+    with profile_file.open() as f:
+        profile = json.load(f)
+    frames = [f['name'] for f in profile['shared']['frames']]
+    return profile, frames
+
+
+def test_speedscope(tmpdir, capsys):
+    """Test that SpeedscopeListener generates correct sampled and evented profiles.
+    """
+    profile_file = tmpdir.join('profile.json')
+    mock_clock = mock.Mock()
+    mock_clock.side_effect = list(range(0, 100, 1))
+    rp = RegionProfiler(listeners=[SpeedscopeListener(str(profile_file), evented=True)],
+                        timer_cls=lambda: Timer(mock_clock))
+
+    with rp.region('a'):
+        for _ in [1, 2]:
+            with rp.region('b'):
+                pass
+
+    rp.finalize()
+
+    profile, frames = load_profile(profile_file)
+    assert len(profile['profiles']) == 2
+    sampled, evented = profile['profiles']
+
+    assert sampled['type'] == 'sampled'
+    stacks = [[frames[i] for i in s] for s in sampled['samples']]
+    assert stacks == [[rp.ROOT_NODE_NAME], [rp.ROOT_NODE_NAME, 'a'], [rp.ROOT_NODE_NAME, 'a', 'b']]
+    assert sampled['weights'] == [2000000, 3000000, 2000000]
+    assert sampled['endValue'] == 7000000
+
+    assert evented['type'] == 'evented'
+    assert evented['endValue'] == 7000000
+    events = [(e['type'], frames[e['frame']], e['at']) for e in evented['events']]
+    assert events == [('O', rp.ROOT_NODE_NAME, 0),
+                      ('O', 'a', 1000000),
+                      ('O', 'b', 2000000),
+                      ('C', 'b', 3000000),
+                      ('O', 'b', 4000000),
+                      ('C', 'b', 5000000),
+                      ('C', 'a', 6000000),
+                      ('C', rp.ROOT_NODE_NAME, 7000000)]
+
+
+def test_speedscope_node_canceled(tmpdir, capsys):
+    """Assert that SpeedscopeListener doesn't generate events for
+    canceled nodes, unless they have nested regions.
+    """
+    profile_file = tmpdir.join('profile.json')
+    mock_clock = mock.Mock()
+    mock_clock.side_effect = list(range(0, 100, 1))
+    rp = RegionProfiler(listeners=[SpeedscopeListener(str(profile_file), evented=True)],
+                        timer_cls=lambda: Timer(mock_clock))
+
+    def iter_with_region(iterable, last_region):
+        yield from iterable
+        if last_region:
+            with rp.region('exit'):
+                pass
+
+    with rp.region('a'):
+        for _ in rp.iter_proxy(iter_with_region([1], False), 'b'):
+            pass
+        for _ in rp.iter_proxy(iter_with_region([1], True), 'c'):
+            pass
+
+    rp.finalize()
+
+    profile, frames = load_profile(profile_file)
+    events = [(e['type'], frames[e['frame']]) for e in profile['profiles'][1]['events']]
+    assert events == [('O', rp.ROOT_NODE_NAME),
+                      ('O', 'a'),
+                      ('O', 'b'),
+                      ('C', 'b'),
+                      ('O', 'c'),
+                      ('C', 'c'),
+                      ('O', 'c'),
+                      ('O', 'exit'),
+                      ('C', 'exit'),
+                      ('C', 'c'),
+                      ('C', 'a'),
+                      ('C', rp.ROOT_NODE_NAME)]
+
+
+def test_speedscope_sampled_only(tmpdir, capsys):
+    """Test that no timeline is recorded by default.
+    """
+    profile_file = tmpdir.join('profile.json')
+    rp = RegionProfiler(listeners=[SpeedscopeListener(str(profile_file))])
+
+    with rp.region('a'):
+        pass
+
+    rp.finalize()
+
+    profile, frames = load_profile(profile_file)
+    assert [p['type'] for p in profile['profiles']] == ['sampled']
+    assert set(frames) == {rp.ROOT_NODE_NAME, 'a'}
+
+
+def test_speedscope_max_events(tmpdir, capsys):
+    """Test that the timeline is truncated, when the event buffer is full.
+    """
+    profile_file = tmpdir.join('profile.json')
+    listener = SpeedscopeListener(str(profile_file), evented=True, max_events=4)
+    mock_clock = mock.Mock()
+    mock_clock.side_effect = list(range(0, 100, 1))
+    rp = RegionProfiler(listeners=[listener], timer_cls=lambda: Timer(mock_clock))
+
+    with pytest.warns(UserWarning, match='truncated after 4 events'):
+        with rp.region('a'):
+            for _ in range(10):
+                with rp.region('b'):
+                    pass
+
+    rp.finalize()
+
+    assert listener.event_count == 4
+    profile, frames = load_profile(profile_file)
+    events = [(e['type'], frames[e['frame']], e['at']) for e in profile['profiles'][1]['events']]
+    assert events == [('O', rp.ROOT_NODE_NAME, 0),
+                      ('O', 'a', 1000000),
+                      ('O', 'b', 2000000),
+                      ('C', 'b', 3000000),
+                      ('C', 'a', 3000000),
+                      ('C', rp.ROOT_NODE_NAME, 3000000)]
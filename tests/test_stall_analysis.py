@@ -0,0 +1,85 @@
+import io
+from unittest import mock
+
+import pytest
+
+from region_profiler import RegionProfiler
+from region_profiler.stall_analysis import IterHistory, StallReporter, analyze_stalls
+from region_profiler.utils import Timer
+
+
+def make_history(fetch, consumer):
+    h = IterHistory(len(fetch))
+    h.iterations.extend(zip(fetch, consumer))
+    return h
+
+
+def test_stall_pattern_detected():
+    """Test that a batched loader pattern and required prefetch depth are detected.
+    """
+    batch = [0.] * 5 + [0.1] * 3
+    h = make_history([1.] + batch * 10, [0.1] * 81)
+    r = analyze_stalls(h)
+
+    assert r.iterations == 80
+    assert r.blocking_count == 30
+    assert r.pattern == (5, 3)
+    assert r.description == 'first 5 items immediate, then 3 blocking'
+    assert r.stall_ratio == pytest.approx(3 / 11)
+    assert r.prefetch_depth == 8
+    assert 'prefetch depth needed: 8' in str(r)
+
+
+def test_no_stalls():
+    """Test that a loader, that keeps up with the loop, is reported as non-stalling.
+    """
+    h = make_history([0.5] + [1e-6] * 20, [0.01] * 21)
+    r = analyze_stalls(h)
+
+    assert r.blocking_count == 0
+    assert r.pattern is None
+    assert r.prefetch_depth == 0
+    assert r.description == 'no stalls'
+
+
+def test_all_blocking():
+    """Test that a synchronous loader requires prefetching by latency / consumer time.
+    """
+    h = make_history([0.25] * 11, [0.1] * 11)
+    r = analyze_stalls(h)
+
+    assert r.blocking_count == 10
+    assert r.description == 'all items blocking'
+    assert r.prefetch_depth == 3
+    assert analyze_stalls(make_history([0.1], [])) is None
+
+
+def test_iter_proxy_records_history():
+    """Test that iter_proxy records fetch and consumer times of each iteration.
+    """
+    mock_clock = mock.Mock()
+    mock_clock.side_effect = list(range(0, 100, 1))
+    rp = RegionProfiler(timer_cls=lambda: Timer(mock_clock))
+
+    with rp.region('outer'):
+        for _ in rp.iter_proxy(range(3), 'iter'):
+            with rp.region('body'):
+                pass
+
+    n = rp.root.children['outer'].children['iter']
+    assert list(n.iter_history.iterations) == [(1, 3), (1, 3), (1, 3)]
+    assert n.consumer_stats.count == 3
+
+    stream = io.StringIO()
+    StallReporter(stream).dump_profiler(rp)
+    assert stream.getvalue().startswith('<main> > outer > iter: 2 iterations')
+
+    for i in rp.iter_proxy(range(5), 'short_history', history=2):
+        for _ in range(i):
+            mock_clock()
+    # old iterations are dropped without misaligning fetch and consumer times
+    assert list(rp.root.children['short_history'].iter_history.iterations) == [(1, 4), (1, 5)]
+
+    for _ in rp.iter_proxy(range(3), 'no_history', history=0):
+        pass
+    assert rp.root.children['no_history'].iter_history is None
@@ -0,0 +1,78 @@
+from region_profiler.shm import HIST_BUCKETS, ShmRecord, ShmSnapshot, histogram_bucket, \
+    histogram_percentile
+from region_profiler.top import TopModel, format_rows
+
+
+def record(index, name, parent, durations):
+    hist = [0] * HIST_BUCKETS
+    for d in durations:
+        hist[histogram_bucket(d)] += 1
+    return ShmRecord(index, name, parent, len(durations), sum(durations),
+                     min(durations, default=0), max(durations, default=0),
+                     durations[-1] if durations else 0, hist)
+
+
+def snapshot(t, a, b, c):
+    return ShmSnapshot(1, 0, t, [record(0, '<main>', -1, []),
+                                 record(1, 'a', 0, a),
+                                 record(2, 'b', 1, b),
+                                 record(3, 'c', 0, c)])
+
+
+def test_histogram_percentile():
+    """Test percentile estimation from a log2 histogram.
+    """
+    hist = [0] * HIST_BUCKETS
+    assert histogram_percentile(hist, 0.5) is None
+    hist[histogram_bucket(3e-6)] = 90
+    hist[histogram_bucket(100e-6)] = 10
+    assert histogram_percentile(hist, 0.5) == 4e-6
+    assert histogram_percentile(hist, 0.9) == 4e-6
+    assert histogram_percentile(hist, 0.95) == 128e-6
+
+
+def test_model_deltas():
+    """Test that the model computes stats between consecutive snapshots.
+    """
+    model = TopModel()
+    model.update(snapshot(10, [1, 1], [0.5], [2]))
+    assert model.interval == 10
+    assert [(r.name, r.depth, r.count, r.self_time, r.total_time) for r in model.rows] == [
+        ('<main>', 0, 0, 6, 10),
+        ('c', 1, 1, 2, 2),
+        ('a', 1, 2, 1.5, 2),
+        ('b', 2, 1, 0.5, 0.5),
+    ]
+
+    model.update(snapshot(12, [1, 1, 1e-5, 1e-5, 1e-5, 1e-5], [0.5], [2]))
+    assert model.interval == 2
+    rows = {r.name: r for r in model.rows}
+    assert rows['a'].rate == 2
+    assert abs(rows['a'].self_time - 4e-5) < 1e-12
+    assert abs(rows['a'].avg - 1e-5) < 1e-12
+    assert rows['a'].percentiles == [16e-6, 16e-6, 16e-6]
+    # not exited during the interval: all-time stats
+    assert (rows['c'].rate, rows['c'].self_time, rows['c'].avg) == (0, 0, 2)
+    assert [r.name for r in model.rows] == ['<main>', 'a', 'b', 'c']
+
+
+def test_model_views():
+    """Test collapsing regions and the flat view.
+    """
+    model = TopModel()
+    model.update(snapshot(10, [1, 1], [0.5], [2]))
+    model.toggle(1)
+    assert [r.name for r in model.rows] == ['<main>', 'c', 'a']
+    assert model.rows[2].collapsed
+
+    lines = format_rows(model)
+    assert lines[0].split() == ['name', 'calls/s', 'self', '%', 'total', '%',
+                                'avg', 'p50', 'p95', 'p99', 'count']
+    assert lines[1].startswith('- <main>')
+    assert lines[3].startswith('  + a ')
+    assert lines[2].split()[:3] == ['c', '0.1', '20.00%']
+
+    model.toggle(1)
+    model.toggle_tree()
+    assert [(r.name, r.depth) for r in model.rows] == [('<main>', 0), ('c', 0),
+                                                       ('a', 0), ('b', 0)]
@@ -0,0 +1,113 @@
+import queue
+import threading
+import time
+
+import pytest
+
+from region_profiler import RegionProfiler
+from region_profiler.wait_instrumentation import instrument_waits, uninstrument_waits
+
+
+@pytest.fixture
+def rp():
+    """Profiler with patched synchronization primitives.
+    """
+    rp = RegionProfiler()
+    instrument_waits(lambda: rp)
+    yield rp
+    uninstrument_waits()
+
+
+def release_later(fn, delay=0.05):
+    t = threading.Thread(target=lambda: (time.sleep(delay), fn()))
+    t.start()
+    return t
+
+
+def test_uncontended_not_recorded(rp):
+    """Test that uncontended operations do not create wait regions.
+    """
+    lock = threading.Lock()
+    q = queue.Queue()
+    with rp.region('a'):
+        with lock:
+            pass
+        q.put(1)
+        assert q.get() == 1
+        with pytest.raises(queue.Empty):
+            q.get(block=False)
+    assert list(rp.root.children['a'].children) == []
+
+
+def test_locks_not_patched_by_default(rp):
+    """Test that lock factories are replaced only on request.
+    """
+    assert isinstance(threading.Lock(), type(threading.Lock()))
+    assert 'timed' not in repr(threading.RLock())
+
+
+def test_lock_wait():
+    """Test that a contended lock acquisition is charged to the current region.
+    """
+    rp = RegionProfiler()
+    instrument_waits(lambda: rp, locks=True)
+    try:
+        lock = threading.Lock()
+    finally:
+        uninstrument_waits()
+    lock.acquire()
+    t = release_later(lock.release)
+    with rp.region('a'):
+        with lock:
+            pass
+    t.join()
+
+    wait = rp.root.children['a'].children['<lock wait>']
+    assert wait.stats.count == 1
+    assert wait.stats.total > 0.02
+
+
+def test_queue_wait(rp):
+    """Test that a blocking queue get is charged once as a queue wait.
+    """
+    q = queue.Queue()
+    t = release_later(lambda: q.put(1))
+    with rp.region('a'):
+        assert q.get() == 1
+    t.join()
+
+    a = rp.root.children['a']
+    assert list(a.children) == ['<queue wait>']
+    assert a.children['<queue wait>'].stats.count == 1
+    assert a.children['<queue wait>'].stats.total > 0.02
+
+
+def test_other_threads_not_recorded(rp):
+    """Test that waits in threads other than the profiled one are ignored.
+    """
+    lock = threading.Lock()
+    lock.acquire()
+
+    def worker():
+        with lock:
+            pass
+
+    t = threading.Thread(target=worker)
+    t.start()
+    with rp.region('a'):
+        time.sleep(0.02)
+        lock.release()
+    t.join()
+    assert list(rp.root.children['a'].children) == []
+
+
+def test_uninstrument():
+    """Test that original primitives are restored.
+    """
+    lock_factory = threading.Lock
+    get = queue.Queue.get
+    instrument_waits(lambda: None, locks=True)
+    assert threading.Lock is not lock_factory
+    uninstrument_waits()
+    assert threading.Lock is lock_factory
+    assert queue.Queue.get is get